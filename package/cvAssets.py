@@ -0,0 +1,294 @@
+"""
+CV Assets Script
+=================
+
+Author: Hugo REIF FAUDEMER
+Creation Date: 07/05/2023
+Purpose: This script embeds the assets of a generated CV page (stylesheet and photos) into the page itself, so that the page no longer depends on the location of the files it refers to.
+
+Description
+-----------
+
+By default the generated page links to its stylesheet and photo by relative path. The page breaks when it is moved, and the PDF converter needs `enable-local-file-access` to read the files. With inlining:
+    - the stylesheet is embedded in a `<style>` tag, through the `css_content` parameter of `cvBuilder.iter_html`.
+    - each local `<img src="...">` is replaced by a base64 `data:` URI. Photos are downscaled so that their short side matches `G_ASSETS_CONFIG['photo_size']`, about twice the size at which the styles display them, and recompressed. Remote URLs (`http:`, `https:`, `data:`, ...) are left untouched.
+
+Local images are resolved as a browser would resolve the `src` of the page, relative to its directory, so `photo_url` is not restricted to the directory of the CV: any file with an image extension readable by the process, such as `../photos/me.jpg` or an absolute path, is embedded. Only inline CVs whose photo paths you trust, e.g. not CVs submitted by third parties.
+
+Downscaling needs Pillow, which is optional: without it, photos are embedded as they are.
+
+Processed photos are stored in a content-addressed cache, keyed on the SHA-256 of the source file and of the processing settings. The same photo is thus processed once for a whole batch, even across worker processes sharing the cache directory, and moving or renaming it does not invalidate the cache. Within a process, the digests and stylesheets are also memoized on (path, mtime, size), so each file is read once.
+
+Modules and Functions
+---------------------
+
+- `AssetCache`: Loads, processes and caches the assets embedded in the pages.
+- `optimize_image(content, photo_size, quality)`: Downscales and recompresses an image with Pillow.
+- `data_uri(content, mime_type)`: Encodes binary content as a `data:` URI.
+
+Global Variables
+----------------
+
+- `G_ASSETS_CONFIG`: A dictionary holding the asset settings.
+
+Usage
+-----
+
+Example:
+    python cvMain.py my_cv.yml my_style.css --inline
+
+"""
+import base64
+import hashlib
+import html
+import io
+import mimetypes
+import os
+import re
+import uuid
+
+from cvCache import CacheStats
+
+
+# =================== VARIABLES ===================
+"""
+G_ASSETS_CONFIG: dict
+
+A dictionary holding the asset settings.
+
+Attributes:
+    photo_size (int): Size in pixels of the short side of the embedded photos. The styles display the photo at 150px at most, twice that keeps it sharp on high density screens and in PDF.
+    quality (int): JPEG quality of the recompressed photos.
+"""
+G_ASSETS_CONFIG = {
+    'photo_size': 300,
+    'quality': 85,
+}
+
+# `src` attribute of an `<img>` tag
+_IMG_SRC = re.compile(r'(<img\b[^>]*?\bsrc=")([^"]*)(")', re.IGNORECASE)
+# URL scheme, such as 'https:' or 'data:'
+_URL_SCHEME = re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*:')
+
+
+# =================== FUNCTIONS ===================
+
+def _load_pillow():
+    """Imports Pillow on first use, returns None if it is not installed."""
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return None
+    return Image, ImageOps
+
+
+def optimize_image(content, photo_size=None, quality=None):
+    """
+    Downscales and recompresses an image with Pillow.
+
+    The image is scaled so that its short side is `photo_size`, as the styles crop the photo
+    to a square with `object-fit: cover`. Images with transparency are saved as PNG, the
+    others as JPEG.
+
+    :param content: The bytes of the source image.
+    :param photo_size: Size in pixels of the short side, defaults to `G_ASSETS_CONFIG['photo_size']`.
+    :param quality: JPEG quality, defaults to `G_ASSETS_CONFIG['quality']`.
+    :return: A (bytes, mime type) tuple, or None if Pillow is not installed.
+    """
+    pillow = _load_pillow()
+    if pillow is None:
+        return None
+    Image, ImageOps = pillow
+    photo_size = photo_size or G_ASSETS_CONFIG['photo_size']
+    quality = quality or G_ASSETS_CONFIG['quality']
+
+    with Image.open(io.BytesIO(content)) as image:
+        image = ImageOps.exif_transpose(image)
+        scale = photo_size / min(image.size)
+        if scale < 1:
+            image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.LANCZOS)
+        output = io.BytesIO()
+        if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+            image.save(output, format='PNG', optimize=True)
+            return output.getvalue(), 'image/png'
+        image.convert('RGB').save(output, format='JPEG', quality=quality, optimize=True, progressive=True)
+        return output.getvalue(), 'image/jpeg'
+
+
+def data_uri(content, mime_type):
+    """
+    Encodes binary content as a `data:` URI.
+
+    :param content: The bytes to encode.
+    :param mime_type: The MIME type of the content.
+    :return: The URI, as a string.
+    """
+    return f"data:{mime_type};base64,{base64.b64encode(content).decode('ascii')}"
+
+
+# =================== CLASSES ===================
+class AssetCache:
+    """
+    Loads, processes and caches the assets embedded in the pages.
+
+    Attributes:
+        cache_dir (str): Directory of the processed photos, None to keep them in memory only.
+        photo_size (int): Size in pixels of the short side of the embedded photos.
+        quality (int): JPEG quality of the recompressed photos.
+        stats (CacheStats): Counters of the processed photo cache.
+    """
+
+    def __init__(self, cache_dir=None, photo_size=None, quality=None):
+        self.cache_dir = cache_dir
+        self.photo_size = photo_size or G_ASSETS_CONFIG['photo_size']
+        self.quality = quality or G_ASSETS_CONFIG['quality']
+        self.stats = CacheStats('assets')
+        # Content digest and text of each file, keyed on (path, mtime, size)
+        self._digests = {}
+        self._stylesheets = {}
+        # Data URI of each processed photo, keyed on its cache key
+        self._uris = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def _signature(path):
+        stat = os.stat(path)
+        return path, stat.st_mtime_ns, stat.st_size
+
+    def digest(self, path):
+        """
+        Returns the SHA-256 digest of a file content, read once per (path, mtime, size).
+
+        :param path: Path of the file.
+        :return: A hexadecimal digest.
+        :raises OSError: If the file cannot be read.
+        """
+        signature = self._signature(path)
+        digest = self._digests.get(signature)
+        if digest is None:
+            with open(path, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            self._digests[signature] = digest
+        return digest
+
+    def stylesheet(self, css_file):
+        """
+        Returns the content of a stylesheet, to be passed as `css_content` to the builder.
+
+        :param css_file: Path of the CSS file.
+        :return: The content of the file.
+        :raises OSError: If the file cannot be read.
+        """
+        signature = self._signature(css_file)
+        content = self._stylesheets.get(signature)
+        if content is None:
+            with open(css_file, 'r', encoding='utf-8') as f:
+                content = self._stylesheets[signature] = f.read()
+        return content
+
+    def resolve(self, src, base_dir):
+        """
+        Resolves the path of a local image referenced by a page.
+
+        The path is looked up relative to the page directory first, as a browser would, then
+        relative to the current directory. It may lead outside of both, but only files with an
+        image extension are embedded.
+
+        :param src: The `src` attribute of the image, unescaped.
+        :param base_dir: The directory of the page.
+        :return: The path of the image, or None if it is remote, cannot be found or is not an image.
+        """
+        if not src or _URL_SCHEME.match(src) or src.startswith('//'):
+            return None
+        if not (mimetypes.guess_type(src)[0] or '').startswith('image/'):
+            return None
+        for candidate in (os.path.join(base_dir, src), src):
+            if os.path.isfile(candidate):
+                return candidate
+        return None
+
+    def _key(self, digest):
+        """Returns the cache key of a photo from the digest of its content and the processing settings."""
+        settings = f"{self.photo_size}:{self.quality}:{_load_pillow() is not None}"
+        return hashlib.sha256(f"{digest}:{settings}".encode('ascii')).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.uri")
+
+    def photo(self, path):
+        """
+        Returns a photo as a `data:` URI, downscaled and recompressed.
+
+        :param path: Path of the image.
+        :return: The data URI.
+        :raises OSError: If the image cannot be read.
+        """
+        key = self._key(self.digest(path))
+        uri = self._uris.get(key)
+        if uri is not None:
+            self.stats.hits += 1
+            return uri
+
+        entry = self._entry_path(key) if self.cache_dir else None
+        if entry is not None:
+            try:
+                with open(entry, 'r', encoding='ascii') as f:
+                    uri = f.read()
+                # Refreshing the modification time keeps recently used entries away from eviction, see `cvCache.RenderCache.evict`
+                os.utime(entry)
+            except FileNotFoundError:
+                pass
+        if uri is not None:
+            self.stats.hits += 1
+        else:
+            self.stats.misses += 1
+            with open(path, 'rb') as f:
+                content = f.read()
+            optimized = optimize_image(content, self.photo_size, self.quality)
+            if optimized is None:
+                mime_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+                optimized = (content, mime_type)
+            uri = data_uri(*optimized)
+            if entry is not None:
+                os.makedirs(os.path.dirname(entry), exist_ok=True)
+                tmp_path = f"{entry}.{uuid.uuid4().hex}.tmp"
+                with open(tmp_path, 'w', encoding='ascii') as f:
+                    f.write(uri)
+                os.replace(tmp_path, entry)
+                self.stats.stores += 1
+        self._uris[key] = uri
+        return uri
+
+    def inline(self, fragment, base_dir):
+        """
+        Replaces the local images of an HTML fragment by data URIs.
+
+        Images that are remote or cannot be found are left as they are.
+
+        :param fragment: An HTML fragment of the page.
+        :param base_dir: The directory of the page, relative paths are resolved from it.
+        :return: The fragment with its images embedded.
+        """
+        if '<img' not in fragment:
+            return fragment
+
+        def _embed(match):
+            # The attribute is escaped by the templates, e.g. '&' is written '&amp;'
+            path = self.resolve(html.unescape(match.group(2)), base_dir)
+            if path is None:
+                return match.group(0)
+            return match.group(1) + self.photo(path) + match.group(3)
+
+        return _IMG_SRC.sub(_embed, fragment)
+
+    def fingerprint(self, cv, base_dir):
+        """
+        Returns a string identifying the assets embedded in the page of a CV, for the render cache key.
+
+        :param cv: The `CVData` of the page.
+        :param base_dir: The directory of the page.
+        :return: The processing settings and the digest of the photo.
+        """
+        path = self.resolve(cv.get_personal_info().get('photo_url'), base_dir)
+        return self._key(self.digest(path) if path else '')
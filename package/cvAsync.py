@@ -0,0 +1,199 @@
+"""
+CV Async Pipeline Script
+=========================
+
+Author: Hugo REIF FAUDEMER
+Creation Date: 07/05/2023
+Purpose: This script runs batch jobs as an asyncio pipeline that overlaps the reading of the YAML files, the rendering of the pages and the writing of the output files.
+
+Description
+-----------
+
+On network file systems, `cvBatch.render_job` spends most of its time waiting: it reads a YAML file, renders it, writes the page, and only then starts the next file. The pipeline splits a job into three stages connected by bounded queues:
+    - read: `readers` tasks read the YAML files concurrently, in threads since file I/O has no native asyncio API.
+    - render: the contents are parsed and rendered in a pool of `render_workers` processes, so that rendering is not limited by the GIL and never blocks the event loop.
+    - write: `writers` tasks write the pages concurrently, through `cvBuilder.atomic_open`: each page is written to a temporary file renamed over the page, so a partially written page never appears in the output directory.
+
+The queues between stages hold at most `queue_size` items. When a stage falls behind, the stages before it block on the full queue instead of piling contents up in memory (backpressure), so memory stays bounded whatever the number of jobs.
+
+The pipeline reports the same `cvBatch.BatchResult` as `cvBatch.run_batch`, and is used by `cvBatch.py --async`. It does not go through the render cache.
+
+Modules and Functions
+---------------------
+
+- `render_document(job, content)`: Parses and renders the content of a YAML file, in a worker process.
+- `run_pipeline(jobs, ...)`: Coroutine running the jobs through the read, render and write stages.
+- `run_async_batch(jobs, ...)`: Runs the pipeline in a new event loop and returns the results.
+
+Global Variables
+----------------
+
+- `G_ASYNC_CONFIG`: A dictionary holding the default pipeline settings.
+
+Usage
+-----
+
+Example:
+    python cvBatch.py ../candidates/ --async --readers 32 --writers 32 --queue-size 128
+
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from cvAssets import AssetCache
+from cvBatch import BatchResult, check_output, format_error, G_WORKER_ASSETS
+from cvBuilder import render_html, html_output_filename, write_html_file
+from cvDataClass import CVData, CVDataError, parse_document
+
+
+# =================== VARIABLES ===================
+"""
+G_ASYNC_CONFIG: dict
+
+A dictionary holding the default pipeline settings.
+
+Attributes:
+    readers (int): Number of files read at once.
+    writers (int): Number of files written at once.
+    render_workers (int): Number of rendering processes.
+    queue_size (int): Maximum number of items waiting between two stages.
+"""
+G_ASYNC_CONFIG = {
+    'readers': 16,
+    'writers': 16,
+    'render_workers': os.cpu_count() or 1,
+    'queue_size': 64,
+}
+
+
+# =================== FUNCTIONS ===================
+
+def _read_file(path):
+    """Reads a whole file as bytes."""
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def render_document(job, content):
+    """
+    Parses and renders the content of a YAML file, in a worker process.
+
+    :param job: The `cvBatch.BatchJob` the content was read for.
+    :param content: The content of the YAML (or JSON) file.
+    :return: A (path of the page, HTML content) tuple.
+    :raises cvBatch.OutputConflictError: If another job of the batch writes the same page.
+    """
+    check_output(job)
+    cv = CVData.from_data(parse_document(content, job.yaml_file), job.yaml_file)
+    css_content = None
+    assets = None
+    if job.inline:
+        assets_dir = None if job.cache_dir is None else os.path.join(job.cache_dir, 'assets')
+        assets = G_WORKER_ASSETS.get(assets_dir)
+        if assets is None:
+            assets = G_WORKER_ASSETS[assets_dir] = AssetCache(assets_dir)
+        css_content = assets.stylesheet(job.css_file)
+    html_content = render_html(cv, job.css_file, css_content, job.minify)
+    if assets is not None:
+        html_content = assets.inline(html_content, job.output_dir)
+    filename = job.output_name or html_output_filename(cv.get_personal_info())
+    return os.path.join(job.output_dir, filename), html_content
+
+
+async def run_pipeline(jobs, readers=None, writers=None, render_workers=None, queue_size=None, on_result=None):
+    """
+    Runs the jobs through the read, render and write stages.
+
+    :param jobs: List of `cvBatch.BatchJob` to run.
+    :param readers: Number of files read at once, defaults to `G_ASYNC_CONFIG['readers']`.
+    :param writers: Number of files written at once, defaults to `G_ASYNC_CONFIG['writers']`.
+    :param render_workers: Number of rendering processes, defaults to `G_ASYNC_CONFIG['render_workers']`. With 1, pages are rendered in a thread of the current process.
+    :param queue_size: Maximum number of items waiting between two stages, defaults to `G_ASYNC_CONFIG['queue_size']`.
+    :param on_result: Optional callback called with each `cvBatch.BatchResult` as soon as its page is written.
+    :return: The list of results, in completion order.
+    """
+    readers = readers or G_ASYNC_CONFIG['readers']
+    writers = writers or G_ASYNC_CONFIG['writers']
+    render_workers = render_workers or G_ASYNC_CONFIG['render_workers']
+    queue_size = queue_size or G_ASYNC_CONFIG['queue_size']
+
+    loop = asyncio.get_running_loop()
+    read_queue = asyncio.Queue(maxsize=queue_size)
+    render_queue = asyncio.Queue(maxsize=queue_size)
+    write_queue = asyncio.Queue(maxsize=queue_size)
+    results = []
+
+    def _finish(job, start, ok, output, errors=()):
+        result = BatchResult(job, ok, output, time.perf_counter() - start, errors=errors)
+        results.append(result)
+        if on_result:
+            on_result(result)
+
+    async def _feed():
+        for job in jobs:
+            await read_queue.put(job)
+
+    async def _read():
+        while (job := await read_queue.get()) is not None:
+            start = time.perf_counter()
+            try:
+                content = await asyncio.to_thread(_read_file, job.yaml_file)
+            except OSError as error:
+                _finish(job, start, False, format_error(error))
+                continue
+            await render_queue.put((job, start, content))
+
+    async def _render(executor):
+        while (item := await render_queue.get()) is not None:
+            job, start, content = item
+            try:
+                path, html_content = await loop.run_in_executor(executor, render_document, job, content)
+            except Exception as error:
+                _finish(job, start, False, format_error(error), error.errors if isinstance(error, CVDataError) else ())
+                continue
+            await write_queue.put((job, start, path, html_content))
+
+    async def _write():
+        while (item := await write_queue.get()) is not None:
+            job, start, path, html_content = item
+            try:
+                await asyncio.to_thread(write_html_file, path, html_content)
+            except OSError as error:
+                _finish(job, start, False, format_error(error))
+                continue
+            _finish(job, start, True, path)
+
+    async def _stage(tasks, queue, next_stage=None):
+        """Waits for the tasks of a stage, then stops the tasks of the next stage."""
+        await asyncio.gather(*tasks)
+        if next_stage is not None:
+            for _ in next_stage:
+                await queue.put(None)
+
+    if render_workers > 1:
+        executor = ProcessPoolExecutor(max_workers=render_workers)
+    else:
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cv-render')
+    with executor:
+        # Twice as many render tasks as processes keep every process busy while results are handed over
+        read_tasks = [asyncio.create_task(_read()) for _ in range(readers)]
+        render_tasks = [asyncio.create_task(_render(executor)) for _ in range(render_workers * 2)]
+        write_tasks = [asyncio.create_task(_write()) for _ in range(writers)]
+        await asyncio.gather(
+            _stage([asyncio.create_task(_feed())], read_queue, read_tasks),
+            _stage(read_tasks, render_queue, render_tasks),
+            _stage(render_tasks, write_queue, write_tasks),
+            _stage(write_tasks, None),
+        )
+    return results
+
+
+def run_async_batch(jobs, readers=None, writers=None, render_workers=None, queue_size=None, on_result=None):
+    """
+    Runs the jobs through the pipeline in a new event loop, see `run_pipeline`.
+
+    :return: The list of `cvBatch.BatchResult`, in completion order.
+    """
+    return asyncio.run(run_pipeline(jobs, readers, writers, render_workers, queue_size, on_result))
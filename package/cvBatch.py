@@ -0,0 +1,623 @@
+"""
+CV Batch Script
+================
+
+Author: Hugo REIF FAUDEMER
+Creation Date: 07/05/2023
+Purpose: This script generates many CVs in a single Python process. It collects YAML files from directories, glob patterns or manifest files, optionally crosses them with several stylesheets, and renders them over a pool of worker processes.
+
+Description
+-----------
+
+Launching `cvMain.py` once per CV pays the interpreter startup, the PyYAML import and the CSS resolution for every file. This script pays them once per worker instead. Each (YAML, CSS) pair is a job: the job loads the `CVData` and calls `generate_html`. Jobs are sent to the workers in chunks, and every result is printed as soon as its chunk comes back. Unless `--no-cache` is given, jobs go through the render cache of `cvCache.py` and the parse cache of `cvDataClass.py`, and unchanged CVs are reused instead of rebuilt. JSON files with the same structure are accepted wherever YAML files are. A throughput summary (files/s, p50/p99 per-file latency, cache hits and misses) is printed at the end.
+
+With `--pdf`, each generated page is handed to a `cvPdf.PdfPipeline` as soon as it is written, so the PDF conversion runs in batches while the HTML stage goes on. The timings of the two stages are reported separately.
+
+With `--inline`, the stylesheet and the photo are embedded in every page through a `cvAssets.AssetCache`. Processed photos are stored in the `assets` sub-directory of the cache, keyed on their content, so a photo shared by many CVs is downscaled once for the whole batch.
+
+Every CV is validated against the schema of `cvSchema.py` when it is loaded, before any rendering work, and all the errors of a file are reported at once. The summary of a run groups the validation errors of the rejected files by kind. With `--check`, the inputs are only parsed and validated, without rendering anything: the run reports every invalid file and exits with 1 if there is one, so that a large batch can be checked in a fraction of its rendering time.
+
+With `--async`, the jobs run through the asyncio pipeline of `cvAsync.py` instead, which overlaps the reading of the YAML files, the rendering and the writing of the pages. It pays off when the inputs or outputs live on a slow or network file system, where the workers would otherwise wait on I/O. The pipeline does not use the render cache.
+
+Modules and Functions
+---------------------
+
+- `collect_inputs(sources)`: Expands directories, glob patterns and manifest files into a sorted list of YAML files.
+- `OutputConflictError`: Raised for the jobs of a batch that would write their page to the same file.
+- `build_jobs(yaml_files, css_files, output_dir)`: Crosses the YAML files with the stylesheets and assigns an output file to each job.
+- `check_output(job)`: Checks that no other job of the batch writes the page of a job.
+- `format_error(error)`: Formats an exception as the output of a failed `BatchResult`.
+- `render_job(job)`: Loads one CV and renders it, returning a `BatchResult`.
+- `check_file(yaml_file)`: Parses and validates one CV without rendering it, returning a `CheckResult`.
+- `run_checks(yaml_files, workers, chunksize, on_result)`: Validates the files over a process pool and returns the list of results.
+- `run_batch(jobs, workers, chunksize, on_result)`: Runs the jobs over a process pool and returns the list of results.
+- `percentile(values, pct)`: Computes a percentile with linear interpolation.
+- `format_summary(results, elapsed, cache_stats)`: Formats the throughput summary of a batch run.
+- `format_pdf_summary(pipeline, html_elapsed)`: Formats the PDF stage summary of a batch run.
+- `format_error_counts(errors, limit)`: Groups validation errors by kind, most frequent first.
+- `format_check_summary(results, elapsed)`: Formats the summary of a validation run.
+
+Global Variables
+----------------
+
+- `G_BATCH_CONFIG`: A dictionary holding the default batch settings.
+- `G_WORKER_CACHES`: The `RenderCache` of each cache directory, created once per worker process.
+- `G_WORKER_ASSETS`: The `AssetCache` of each asset cache directory, created once per worker process.
+
+Usage
+-----
+
+Render every CV of a directory with two stylesheets over 8 workers:
+
+Example:
+    python cvBatch.py ../candidates/ --css ../styles/style01.css ../styles/style02.css --workers 8
+
+A manifest is a text file listing one YAML path per line (relative paths are resolved from the manifest directory, lines starting with '#' are ignored):
+
+Example:
+    python cvBatch.py candidates.txt "../archive/**/*.yml"
+
+Check a whole directory before rendering it:
+
+Example:
+    python cvBatch.py ../candidates/ --check
+
+Render the CVs of a network share with 32 reads and writes in flight:
+
+Example:
+    python cvBatch.py /mnt/share/candidates/ --async --readers 32 --writers 32
+
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from collections import Counter
+
+from cvBuilder import generate_html, CVData, G_CONFIG_HTML
+from cvDataClass import CVDataError, load_document
+from cvSchema import validate_cv
+from cvCache import RenderCache, CacheStats, G_CACHE_CONFIG
+from cvTemplates import data_path
+# cvPdf and cvAssets are only imported by the options using them, so that a plain batch does not pay
+# for their imports at startup, see cvMain.py
+
+
+# =================== VARIABLES ===================
+"""
+G_BATCH_CONFIG: dict
+
+A dictionary holding the default batch settings.
+
+Attributes:
+    input_extensions (tuple): File extensions picked up when a directory is given as input, JSON files having the same structure as the YAML ones.
+    manifest_extensions (tuple): File extensions identifying a manifest file.
+    workers (int): Default number of worker processes, set to the number of CPUs.
+    chunksize (int): Default number of jobs sent to a worker at once, 0 meaning computed from the batch size.
+"""
+G_BATCH_CONFIG = {
+    'input_extensions': ('.yml', '.yaml', '.json'),
+    'manifest_extensions': ('.txt', '.lst'),
+    'workers': os.cpu_count() or 1,
+    'chunksize': 0,
+}
+
+"""
+G_WORKER_CACHES: dict
+
+The `RenderCache` of each cache directory, created once per worker process so that the
+stylesheet digests are computed once per worker.
+"""
+G_WORKER_CACHES = {}
+
+"""
+G_WORKER_ASSETS: dict
+
+The `AssetCache` of each asset cache directory, created once per worker process so that each
+photo and stylesheet is read once per worker.
+"""
+G_WORKER_ASSETS = {}
+
+# List index in an error path, replaced by '[]' to group the errors by kind
+_INDEX = re.compile(r'\[\d+\]')
+
+
+# =================== CLASSES ===================
+class OutputConflictError(ValueError):
+    """Raised for the jobs of a batch that would write their page to the same file."""
+
+
+class BatchJob(NamedTuple):
+    """A single rendering job: one YAML file rendered with one stylesheet into one directory, through the render cache stored in `cache_dir` unless it is None. With `inline`, the stylesheet and photo are embedded in the page, with `minify` the page is rendered with minified templates. The page is written to `output_name`, named after the YAML file by `build_jobs`, or after the name of the person if it is None. `conflict` is the other input of the batch writing the same file, if any, in which case the job fails."""
+    yaml_file: str
+    css_file: str
+    output_dir: str
+    cache_dir: Optional[str] = None
+    inline: bool = False
+    minify: bool = False
+    output_name: Optional[str] = None
+    conflict: Optional[str] = None
+
+
+class BatchResult(NamedTuple):
+    """The outcome of a `BatchJob`.
+
+    Attributes:
+        job (BatchJob): The job that was run.
+        ok (bool): True if the CV was rendered.
+        output (str): The path of the generated HTML file, or the error message on failure.
+        elapsed (float): Wall time spent on the job, in seconds.
+        cached (bool): True if the page was reused from the render cache.
+        errors (Tuple[str, ...]): The validation errors of the CV, if it was rejected by the schema.
+    """
+    job: BatchJob
+    ok: bool
+    output: str
+    elapsed: float
+    cached: bool = False
+    errors: Tuple[str, ...] = ()
+
+
+class CheckResult(NamedTuple):
+    """The outcome of the validation of one file by `check_file`.
+
+    Attributes:
+        yaml_file (str): The path of the file.
+        errors (Tuple[str, ...]): The validation errors, or the parse error, empty if the file is valid.
+        elapsed (float): Wall time spent on the validation alone, without the parsing, in seconds.
+        parsed (bool): False if the file could not be parsed, and was thus not validated.
+    """
+    yaml_file: str
+    errors: Tuple[str, ...]
+    elapsed: float
+    parsed: bool = True
+
+
+# =================== FUNCTIONS ===================
+
+def _is_glob(source):
+    """Returns True if the source contains glob wildcards."""
+    return any(char in source for char in '*?[')
+
+
+def _read_manifest(manifest_path):
+    """Reads a manifest file and returns the YAML paths it lists.
+
+    :param manifest_path: Path to a text file listing one YAML path per line.
+    :return: A list of paths, resolved relative to the manifest directory.
+    """
+    base_dir = os.path.dirname(manifest_path)
+    paths = []
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            paths.append(line if os.path.isabs(line) else os.path.join(base_dir, line))
+    return paths
+
+
+def collect_inputs(sources):
+    """Expands directories, glob patterns and manifest files into a list of YAML files.
+
+    Duplicates are removed, and the order is stable so that two runs over the same inputs
+    produce the same output.
+
+    :param sources: List of directories, glob patterns, manifest files or YAML files.
+    :return: A sorted list of YAML file paths.
+    """
+    input_extensions = G_BATCH_CONFIG['input_extensions']
+    files = []
+    for source in sources:
+        if os.path.isdir(source):
+            for root, _, names in os.walk(source):
+                files.extend(os.path.join(root, name) for name in names if name.endswith(input_extensions))
+        elif _is_glob(source):
+            files.extend(path for path in glob.glob(source, recursive=True) if os.path.isfile(path))
+        elif source.endswith(G_BATCH_CONFIG['manifest_extensions']):
+            files.extend(_read_manifest(source))
+        else:
+            files.append(source)
+    return sorted(set(os.path.normpath(path) for path in files))
+
+
+def build_jobs(yaml_files, css_files, output_dir, cache_dir=None, inline=False, minify=False):
+    """Crosses the YAML files with the stylesheets.
+
+    With a single stylesheet the CVs are written directly in `output_dir`. With several, each
+    stylesheet gets its own sub-directory named after it, so that the outputs do not overwrite each other.
+
+    Each page is named after its YAML file (`jane_doe.yml` gives `jane_doe.html`), since several
+    CVs of a batch may belong to people with the same name. The jobs of the files that would still
+    write the same page, such as `a/cv.yml` and `b/cv.yml`, are marked with their `conflict` and fail
+    instead of overwriting each other.
+
+    :param yaml_files: List of YAML file paths.
+    :param css_files: List of CSS file paths.
+    :param output_dir: Directory where the generated HTML files are saved.
+    :param cache_dir: Directory of the render cache, None to disable it.
+    :param inline: If True, the stylesheet and photo are embedded in the pages.
+    :param minify: If True, the pages are rendered with minified templates.
+    :return: A list of `BatchJob`.
+    """
+    names = [os.path.splitext(os.path.basename(yaml_file))[0] + '.html' for yaml_file in yaml_files]
+    # Inputs of each page, compared case-insensitively for the case-insensitive file systems
+    inputs = {}
+    for yaml_file, name in zip(yaml_files, names):
+        inputs.setdefault(name.casefold(), []).append(yaml_file)
+
+    jobs = []
+    for css_file in css_files:
+        if len(css_files) > 1:
+            style_name = os.path.splitext(os.path.basename(css_file))[0]
+            style_dir = os.path.join(output_dir, style_name)
+        else:
+            style_dir = output_dir
+        os.makedirs(style_dir, exist_ok=True)
+        for yaml_file, name in zip(yaml_files, names):
+            conflict = next((other for other in inputs[name.casefold()] if other != yaml_file), None)
+            jobs.append(BatchJob(yaml_file, css_file, style_dir, cache_dir, inline, minify, name, conflict))
+    return jobs
+
+
+def check_output(job):
+    """Checks that no other job of the batch writes the page of a job.
+
+    :param job: The `BatchJob` about to run.
+    :raises OutputConflictError: If the job has a `conflict`.
+    """
+    if job.conflict is not None:
+        raise OutputConflictError(f"{job.output_name} is also the output of {job.conflict}, "
+                                  f"rename one of the input files")
+
+
+def format_error(error):
+    """Formats an exception as the output of a failed `BatchResult`.
+
+    The message is kept on one line so that each result stays on its own output line.
+
+    :param error: The exception raised by the job.
+    :return: The error type and message.
+    """
+    return f"{type(error).__name__}: {' '.join(str(error).split())}"
+
+
+def render_job(job):
+    """Loads one CV and renders it to HTML.
+
+    Errors are caught and reported in the result, so that a bad file does not stop the batch.
+
+    :param job: The `BatchJob` to run.
+    :return: A `BatchResult`.
+    """
+    start = time.perf_counter()
+    cached = False
+    errors = ()
+    try:
+        check_output(job)
+        parse_cache_dir = None if job.cache_dir is None else os.path.join(job.cache_dir, 'parsed')
+        cv = CVData(job.yaml_file, parse_cache_dir)
+        assets = None
+        if job.inline:
+            assets_dir = None if job.cache_dir is None else os.path.join(job.cache_dir, 'assets')
+            assets = G_WORKER_ASSETS.get(assets_dir)
+            if assets is None:
+                from cvAssets import AssetCache
+                assets = G_WORKER_ASSETS[assets_dir] = AssetCache(assets_dir)
+        if job.cache_dir is None:
+            output = generate_html(cv, job.css_file, output_path=job.output_dir, assets=assets, minify=job.minify,
+                                   filename=job.output_name)
+        else:
+            cache = G_WORKER_CACHES.get(job.cache_dir)
+            if cache is None:
+                cache = G_WORKER_CACHES[job.cache_dir] = RenderCache(job.cache_dir)
+            hits = cache.stats.hits
+            output = cache.generate_html(cv, job.css_file, output_path=job.output_dir, assets=assets, minify=job.minify,
+                                         filename=job.output_name)
+            cached = cache.stats.hits > hits
+        ok = True
+    except Exception as error:
+        output = format_error(error)
+        ok = False
+        if isinstance(error, CVDataError):
+            errors = error.errors
+    return BatchResult(job, ok, output, time.perf_counter() - start, cached, errors)
+
+
+def _render_chunk(jobs):
+    """Runs a chunk of jobs in a worker process."""
+    return [render_job(job) for job in jobs]
+
+
+def run_batch(jobs, workers=None, chunksize=None, on_result: Optional[Callable[[BatchResult], None]] = None) -> List[BatchResult]:
+    """Runs the jobs over a pool of worker processes.
+
+    Jobs are grouped in chunks to amortize the inter-process communication. With a single
+    worker, the jobs are run in the current process.
+
+    :param jobs: List of `BatchJob` to run.
+    :param workers: Number of worker processes, defaults to `G_BATCH_CONFIG['workers']`.
+    :param chunksize: Number of jobs sent to a worker at once, computed from the batch size if not set.
+    :param on_result: Optional callback called with each `BatchResult` as soon as it is available.
+    :return: The list of results, in completion order.
+    """
+    workers = workers or G_BATCH_CONFIG['workers']
+    chunksize = chunksize or G_BATCH_CONFIG['chunksize'] or max(1, min(64, len(jobs) // (workers * 4)))
+    results = []
+
+    def _collect(chunk_results):
+        for result in chunk_results:
+            results.append(result)
+            if on_result:
+                on_result(result)
+
+    if workers == 1:
+        for job in jobs:
+            _collect([render_job(job)])
+        return results
+
+    chunks = [jobs[i:i + chunksize] for i in range(0, len(jobs), chunksize)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_render_chunk, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            _collect(future.result())
+    return results
+
+
+def check_file(yaml_file):
+    """Parses and validates one CV without rendering it.
+
+    :param yaml_file: Path of the YAML or JSON file.
+    :return: A `CheckResult`, with the parse error as its only error if the file cannot be parsed.
+    """
+    try:
+        data = load_document(yaml_file)
+    except Exception as error:
+        return CheckResult(yaml_file, (format_error(error),), 0.0, parsed=False)
+    start = time.perf_counter()
+    _, errors = validate_cv(data)
+    return CheckResult(yaml_file, tuple(errors), time.perf_counter() - start)
+
+
+def run_checks(yaml_files, workers=None, chunksize=None, on_result: Optional[Callable[[CheckResult], None]] = None) -> List[CheckResult]:
+    """Validates the files over a pool of worker processes, see `run_batch`.
+
+    :param yaml_files: List of YAML or JSON file paths.
+    :param workers: Number of worker processes, defaults to `G_BATCH_CONFIG['workers']`.
+    :param chunksize: Number of files sent to a worker at once, computed from the number of files if not set.
+    :param on_result: Optional callback called with each `CheckResult` as soon as it is available.
+    :return: The list of results, in input order.
+    """
+    workers = workers or G_BATCH_CONFIG['workers']
+    chunksize = chunksize or G_BATCH_CONFIG['chunksize'] or max(1, min(64, len(yaml_files) // (workers * 4)))
+    results = []
+    if workers == 1:
+        checks = map(check_file, yaml_files)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        checks = executor.map(check_file, yaml_files, chunksize=chunksize)
+    try:
+        for result in checks:
+            results.append(result)
+            if on_result:
+                on_result(result)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return results
+
+
+def percentile(values, pct):
+    """Computes a percentile with linear interpolation between the closest ranks.
+
+    :param values: List of numbers.
+    :param pct: The percentile to compute, between 0 and 100.
+    :return: The percentile value, or 0.0 for an empty list.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def format_summary(results, elapsed, cache_stats=None):
+    """Formats the throughput summary of a batch run.
+
+    :param results: List of `BatchResult`.
+    :param elapsed: Total wall time of the batch, in seconds.
+    :param cache_stats: Optional `CacheStats` of the run, added to the summary.
+    :return: A multi-line summary string.
+    """
+    failed = sum(1 for result in results if not result.ok)
+    latencies = [result.elapsed * 1000 for result in results]
+    throughput = len(results) / elapsed if elapsed > 0 else 0.0
+    summary = (
+        f"Processed {len(results)} file(s): {len(results) - failed} ok, {failed} failed in {elapsed:.2f}s\n"
+        f"Throughput: {throughput:.1f} files/s | latency p50: {percentile(latencies, 50):.2f} ms, "
+        f"p99: {percentile(latencies, 99):.2f} ms"
+    )
+    invalid = [result for result in results if result.errors]
+    if invalid:
+        summary += (f"\nInvalid input(s): {len(invalid)} file(s) rejected before rendering, most frequent errors:\n"
+                    f"{format_error_counts(error for result in invalid for error in result.errors)}")
+    if cache_stats is not None:
+        summary += f"\n{cache_stats}"
+    return summary
+
+
+def format_error_counts(errors, limit=10):
+    """Groups validation errors by kind, most frequent first.
+
+    Errors differing only by their list indices, such as the same missing key in several
+    entries, are of the same kind.
+
+    :param errors: Iterable of validation errors.
+    :param limit: Maximum number of kinds listed.
+    :return: One line per kind, with its number of occurrences.
+    """
+    counts = Counter(_INDEX.sub('[]', error) for error in errors)
+    lines = [f"  {count:>6}x {error}" for error, count in counts.most_common(limit)]
+    if len(counts) > limit:
+        lines.append(f"  ... and {len(counts) - limit} other kind(s) of error")
+    return '\n'.join(lines)
+
+
+def format_check_summary(results, elapsed):
+    """Formats the summary of a validation run.
+
+    :param results: List of `CheckResult`.
+    :param elapsed: Total wall time of the run, in seconds.
+    :return: A multi-line summary string.
+    """
+    parsed = [result for result in results if result.parsed]
+    invalid = [result for result in parsed if result.errors]
+    unparsable = len(results) - len(parsed)
+    latencies = [result.elapsed * 1_000_000 for result in parsed]
+    summary = (
+        f"Checked {len(results)} file(s): {len(parsed) - len(invalid)} valid, {len(invalid)} invalid, "
+        f"{unparsable} unparsable in {elapsed:.2f}s\n"
+        f"Validation time per file: p50: {percentile(latencies, 50):.1f} us, p99: {percentile(latencies, 99):.1f} us"
+    )
+    if invalid:
+        summary += f"\nMost frequent errors:\n{format_error_counts(error for result in invalid for error in result.errors)}"
+    return summary
+
+
+def format_pdf_summary(pipeline, html_elapsed):
+    """Formats the PDF stage summary of a batch run, reported apart from the HTML stage.
+
+    :param pipeline: The closed `PdfPipeline` of the run.
+    :param html_elapsed: Wall time of the HTML stage, in seconds.
+    :return: A multi-line summary string.
+    """
+    failed = sum(1 for result in pipeline.results if not result.ok)
+    throughput = pipeline.documents / pipeline.elapsed if pipeline.elapsed > 0 else 0.0
+    return (
+        f"PDF: {pipeline.documents} document(s) in {pipeline.batches} converter run(s), {failed} failed\n"
+        f"Stage timings: HTML {html_elapsed:.2f}s | PDF {pipeline.elapsed:.2f}s wall, "
+        f"{pipeline.busy_time:.2f}s converter time ({throughput:.1f} documents/s)"
+    )
+
+
+def _print_pdf_result(result):
+    """Prints one PDF conversion line as soon as its batch is done."""
+    if result.ok:
+        print(f"[pdf]  {result.html_file} -> {result.pdf_file}", flush=True)
+    else:
+        print(f"[fail] {result.html_file}: PDF conversion failed: {' '.join(result.error.split())}", file=sys.stderr, flush=True)
+
+
+def _print_check_result(result):
+    """Prints every error of an invalid file as soon as it is checked."""
+    for error in result.errors:
+        print(f"[fail] {result.yaml_file}: {error}", file=sys.stderr, flush=True)
+
+
+def _print_result(result):
+    """Prints one result line as soon as it is available."""
+    if result.ok:
+        origin = ', cached' if result.cached else ''
+        print(f"[ok]   {result.job.yaml_file} -> {result.output} ({result.elapsed * 1000:.2f} ms{origin})", flush=True)
+    else:
+        print(f"[fail] {result.job.yaml_file}: {result.output}", file=sys.stderr, flush=True)
+
+
+# =================== MAIN ===================
+def main(argv=None):
+    """Parses the command line and runs the batch.
+
+    :param argv: Command line arguments, defaults to `sys.argv[1:]`.
+    :return: The exit code, 1 if at least one CV failed.
+    """
+    parser = argparse.ArgumentParser(description="Render many CVs in one process over a worker pool.")
+    parser.add_argument('sources', nargs='+', help="YAML files, directories, glob patterns or manifest files.")
+    parser.add_argument('--css', nargs='+', default=[data_path('styles', 'style01.css')], help="Stylesheet(s) to render every CV with (default: styles/style01.css).")
+    parser.add_argument('--output', default=G_CONFIG_HTML['output_dir'], help="Output directory (default: output/ of the project, ~/smartcvbuilder when installed).")
+    parser.add_argument('--workers', type=int, default=G_BATCH_CONFIG['workers'], help="Number of worker processes.")
+    parser.add_argument('--chunksize', type=int, default=G_BATCH_CONFIG['chunksize'], help="Jobs sent to a worker at once.")
+    parser.add_argument('--no-cache', action='store_true', help="Always rebuild the CVs, without using the render cache.")
+    parser.add_argument('--inline', action='store_true', help="Embed the stylesheet and the photo in the HTML pages.")
+    parser.add_argument('--minify', action='store_true', help="Strip the indentation and line breaks of the HTML pages.")
+    parser.add_argument('--pdf', action='store_true', help="Also convert the HTML pages to PDF.")
+    parser.add_argument('--wkhtmltopdf', help="PDF converter executable (default: G_CONFIG_PDF['wkhtmltopdf'] of cvPdf).")
+    parser.add_argument('--pdf-workers', type=int, help="Maximum number of converter processes running at once (default: G_CONFIG_PDF['workers'] of cvPdf).")
+    parser.add_argument('--pdf-batch-size', type=int, help="Documents converted by one converter process (default: G_CONFIG_PDF['batch_size'] of cvPdf).")
+    parser.add_argument('--cache-dir', default=G_CACHE_CONFIG['cache_dir'], help="Directory of the render cache.")
+    parser.add_argument('--check', action='store_true', help="Only validate the inputs, without rendering them.")
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help="Overlap reads, renders and writes in an asyncio pipeline, without the render cache.")
+    parser.add_argument('--readers', type=int, help="Files read at once with --async.")
+    parser.add_argument('--writers', type=int, help="Files written at once with --async.")
+    parser.add_argument('--queue-size', type=int, help="Items waiting between two stages with --async.")
+    args = parser.parse_args(argv)
+
+    yaml_files = collect_inputs(args.sources)
+    if not yaml_files:
+        print("No YAML file found.", file=sys.stderr)
+        return 1
+
+    if args.check:
+        start = time.perf_counter()
+        checks = run_checks(yaml_files, workers=args.workers, chunksize=args.chunksize, on_result=_print_check_result)
+        print(format_check_summary(checks, time.perf_counter() - start))
+        return 1 if any(result.errors for result in checks) else 0
+
+    cache_dir = None if args.no_cache else args.cache_dir
+    jobs = build_jobs(yaml_files, args.css, args.output, cache_dir, args.inline, args.minify)
+    on_result = _print_result
+    pipeline = None
+    if args.pdf:
+        from cvPdf import PdfPipeline, PdfError
+        try:
+            pipeline = PdfPipeline(args.wkhtmltopdf, workers=args.pdf_workers, batch_size=args.pdf_batch_size,
+                                   on_result=_print_pdf_result)
+        except PdfError as error:
+            print(error, file=sys.stderr)
+            return 1
+
+        # PDF conversions start while the HTML pages are still being generated
+        def on_result(result):
+            _print_result(result)
+            if result.ok:
+                pipeline.submit(result.output)
+
+    start = time.perf_counter()
+    if args.use_async:
+        # Imported here as cvAsync builds on this module
+        from cvAsync import run_async_batch
+        results = run_async_batch(jobs, readers=args.readers, writers=args.writers, render_workers=args.workers,
+                                  queue_size=args.queue_size, on_result=on_result)
+    else:
+        results = run_batch(jobs, workers=args.workers, chunksize=args.chunksize, on_result=on_result)
+    elapsed = time.perf_counter() - start
+    pdf_failed = 0
+    if pipeline is not None:
+        pdf_failed = sum(1 for result in pipeline.close() if not result.ok)
+
+    cache_stats = None
+    if cache_dir is not None and not args.use_async:
+        # Workers only report hits and misses, the stores and evictions are accounted here
+        cache_stats = CacheStats()
+        cache_stats.hits = sum(1 for result in results if result.ok and result.cached)
+        cache_stats.misses = sum(1 for result in results if result.ok and not result.cached)
+        cache_stats.stores = cache_stats.misses
+        cache = RenderCache(cache_dir)
+        cache.evict()
+        cache_stats.evictions = cache.stats.evictions
+    print(format_summary(results, elapsed, cache_stats))
+    if pipeline is not None:
+        print(format_pdf_summary(pipeline, elapsed))
+    return 1 if pdf_failed or any(not result.ok for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,786 @@
+"""
+CV Benchmark Script
+====================
+
+Author: Hugo REIF FAUDEMER
+Creation Date: 07/05/2023
+Purpose: This script measures the performance of SmartCVBuilder on synthetic CVs of configurable size.
+
+Description
+-----------
+
+Synthetic CVs are built from `templates/template.yml`, whose entries are repeated to reach the requested number of work experience entries. The loader micro-benchmark writes each synthetic CV as YAML and JSON in a temporary directory and compares the time taken by each way `CVData` can load it:
+    - `yaml.SafeLoader`: the pure-Python PyYAML loader.
+    - `yaml.CSafeLoader`: the libyaml-based loader, when PyYAML was built with it.
+    - `json`: the same document stored as JSON.
+    - `parse cache`: a YAML file loaded again through the parse cache of `cvDataClass.load_document`.
+
+The stage benchmark (`--stages`) renders synthetic CVs from `generate_cv`, with nested projects, long descriptions and non-ASCII text, and times each stage of a generation separately: the YAML load in `CVData`, each section function of `cvBuilder.G_SECTION_BUILDERS`, the final file write and, with `--pdf`, the PDF conversion. The same generator writes a corpus of YAML files to disk with `--corpus`, e.g. to feed `cvBatch.py`.
+
+Results can be saved to a JSON file with `--json` and compared to a previous run with `--compare`: a measure slower than the baseline by more than the threshold (10% by default) is reported as a regression and the script exits with status 1, so that it can gate a commit.
+
+The output benchmark (`--output-size`) renders whole pages of synthetic CVs and reports their size and render time with the former unescaped templates (kept in `_UnescapedTemplateSet` for reference), with the escaped templates, with the minified templates, and with the escaped page minified afterwards by `cvTemplates.minify_html`.
+
+The startup benchmark (`--startup`) times a single-CV invocation in fresh interpreters: the bare interpreter, `import cvMain`, `cvMain.py --help` and a generation without cache, and lists the slowest imports reported by `-X importtime`. It exits with status 1 if the import of `cvMain` takes longer than the budget (`--budget`, `G_BENCH_CONFIG['startup_budget']`) or if it imports one of the modules that must stay lazy (`G_BENCH_CONFIG['lazy_modules']`), so that CI-style checks can enforce the startup time locally.
+
+The render micro-benchmark (`--render`) measures the cost per work experience entry of the experience section, rendered with the compiled templates of `sections/` and with the former hand-written f-string implementation kept in `_legacy_work_experience` for reference.
+
+Modules and Functions
+---------------------
+
+- `scale_cv(data, size)`: Builds a synthetic CV with `size` work experience entries from a template CV.
+- `generate_cv(size, seed, projects, description_words)`: Generates a random CV in the schema of `templates/template.yml`.
+- `write_corpus(directory, sizes, count)`: Writes synthetic CVs as YAML files.
+- `bench_stages(sizes, repeat, pdf)`: Times each stage of the generation of synthetic CVs.
+- `format_stage_table(rows)`: Formats stage benchmark results as a text table.
+- `import_times(module)`: Measures the import of a module in a fresh interpreter with `-X importtime`.
+- `eager_modules(module, lazy_modules)`: Lists the modules that should only be imported on first use but are imported with a module.
+- `bench_startup(repeat)`: Times the startup of a single-CV invocation, each command in a fresh interpreter.
+- `format_startup_table(rows, imports)`: Formats startup benchmark results as a text table.
+- `save_results(path, suite, rows)`: Writes benchmark results to a JSON file.
+- `compare_results(baseline, current, threshold)`: Lists the measures slower than a baseline by more than a threshold.
+- `bench_loaders(sizes, repeat)`: Times each loader on synthetic CVs of the given sizes.
+- `format_table(rows)`: Formats benchmark results as a text table.
+- `bench_render(sizes, repeat)`: Times the rendering of the experience section with the compiled templates and with the former f-string implementation.
+- `format_render_table(rows)`: Formats render benchmark results as a text table.
+- `bench_output(sizes, repeat)`: Measures the size and render time of whole pages, unescaped, escaped and minified.
+- `format_output_table(rows)`: Formats output benchmark results as a text table.
+
+Global Variables
+----------------
+
+- `G_BENCH_CONFIG`: A dictionary holding the default benchmark settings.
+
+Usage
+-----
+
+Example:
+    python cvBench.py --sizes 10 100 1000 --repeat 5
+    python cvBench.py --render
+    python cvBench.py --output-size --sizes 100 1000
+    python cvBench.py --stages --sizes 1 100 10000 --json bench.json --compare baseline.json
+    python cvBench.py --startup --budget 0.1
+    python cvBench.py --corpus ../corpus --sizes 10 100 --count 50
+
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+from cvBuilder import (HtmlPage, add_content_to_page, adding_work_experience, section_inputs, init_html_structure,
+                       ending_html_page, write_html_file, G_SECTION_BUILDERS, G_BUILDER_VERSION)
+from cvDataClass import CVData, load_document, parse_yaml
+from cvLocales import load_locale
+from cvPdf import convert_to_pdf, G_CONFIG_PDF
+from cvTemplates import (TemplateSet, compile_block, data_path, get_template_set, minify_html, parse_blocks,
+                         translate_block)
+
+
+# =================== VARIABLES ===================
+"""
+G_BENCH_CONFIG: dict
+
+A dictionary holding the default benchmark settings.
+
+Attributes:
+    template (str): Template CV the synthetic CVs are built from.
+    sizes (list): Default numbers of work experience entries of the synthetic CVs.
+    repeat (int): Number of timed runs per measure, the best one is kept.
+    css_file (str): Stylesheet of the pages rendered by the stage benchmark.
+    projects (int): Maximum number of projects of a generated work experience entry.
+    description_words (int): Average number of words of a generated description.
+    threshold (float): Relative slowdown over the baseline reported as a regression.
+    noise_floor (float): Absolute slowdown in seconds below which a measure is never a regression, so that sub-millisecond stages do not fail on timer noise.
+    startup_budget (float): Maximum import time of `cvMain` in seconds, as measured by `-X importtime`, enforced by `--startup`.
+    lazy_modules (tuple): Modules that `import cvMain` must not import, as only some options need them.
+"""
+G_BENCH_CONFIG = {
+    'template': data_path('templates', 'template.yml'),
+    'sizes': [10, 100, 1000],
+    'repeat': 5,
+    'css_file': data_path('styles', 'style01.css'),
+    'projects': 3,
+    'description_words': 60,
+    'threshold': 0.10,
+    'noise_floor': 0.0005,
+    'startup_budget': 0.120,
+    'lazy_modules': ('yaml', 'cvPdf', 'cvWatch', 'cvAssets', 'cvAsync', 'cvLayout', 'cProfile', 'asyncio', 'subprocess',
+                     'concurrent.futures'),
+}
+
+# Directory of the SmartCVBuilder modules, added to the path of the interpreters started by `--startup`
+_MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+# A line of the `-X importtime` report: "import time: <self us> | <cumulative us> | <indented module name>"
+_IMPORT_TIME = re.compile(r'import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(.*)$')
+
+# Vocabulary of the generated CVs, with accented, non-Latin and non-BMP text
+_WORDS = (
+    'design', 'embedded', 'firmware', 'pipeline', 'latency', 'team', 'delivered', 'system', 'real-time', 'driver',
+    'architecture', 'testing', 'release', 'customer', 'performance', 'réseau', 'qualité', 'développement', 'Straße',
+    'übernahme', 'señal', 'система', 'разработка', '設計', 'ソフトウェア', '開発', 'تطوير', 'λογισμικό', '🚀', '✓',
+)
+_NAMES = ('Ana', 'Zoë', 'José', 'Łukasz', 'Søren', 'Анна', '李', 'Nguyễn', 'Chloé', 'François', 'Μαρία', 'Oğuz')
+
+
+# =================== FUNCTIONS ===================
+
+def scale_cv(data, size):
+    """
+    Builds a synthetic CV with `size` work experience entries from a template CV.
+
+    The template entries of each list section are repeated and numbered, so that every entry is distinct.
+
+    :param data: The template CV data.
+    :param size: Number of work experience entries, the other list sections get proportional sizes.
+    :return: The synthetic CV data.
+    """
+    cv = copy.deepcopy(data)
+    sections = cv['cv']
+
+    def _repeat(entries, count, field):
+        result = []
+        for i in range(count):
+            entry = copy.deepcopy(entries[i % len(entries)])
+            if field in entry:
+                entry[field] = f"{entry[field]} {i + 1}"
+            result.append(entry)
+        return result
+
+    sections['work_experience'] = _repeat(sections['work_experience'], size, 'job_title')
+    sections['education'] = _repeat(sections['education'], max(1, size // 10), 'degree')
+    sections['personal_projects'] = _repeat(sections['personal_projects'], max(1, size // 2), 'project_title')
+    sections['skills'] = _repeat(sections['skills'], max(3, size // 5), 'skill')
+    return cv
+
+
+def generate_cv(size, seed=0, projects=None, description_words=None):
+    """
+    Generates a random CV in the schema of `templates/template.yml`.
+
+    The CV is reproducible for a given seed. Work experience entries have up to `projects`
+    nested projects, descriptions are drawn from a vocabulary mixing ASCII, accented,
+    non-Latin and emoji words, and the other list sections get sizes proportional to `size`.
+
+    :param size: Number of work experience entries.
+    :param seed: Seed of the random generator.
+    :param projects: Maximum number of projects per work experience entry, defaults to `G_BENCH_CONFIG['projects']`.
+    :param description_words: Average number of words of a description, defaults to `G_BENCH_CONFIG['description_words']`.
+    :return: The CV data, as parsed from a YAML file.
+    """
+    rng = random.Random(seed)
+    projects = G_BENCH_CONFIG['projects'] if projects is None else projects
+    description_words = description_words or G_BENCH_CONFIG['description_words']
+
+    def _text(words):
+        return ' '.join(rng.choice(_WORDS) for _ in range(max(1, words))).capitalize() + '.'
+
+    def _description():
+        return _text(rng.randint(description_words // 2, description_words * 3 // 2))
+
+    def _years():
+        start = rng.randint(1990, 2023)
+        return str(start), str(rng.randint(start, 2024))
+
+    work_experience = []
+    for i in range(size):
+        start, end = _years()
+        job = {
+            'job_title': f"{_text(2)[:-1]} {i + 1}",
+            'company_name': f"{rng.choice(_NAMES)} & Co",
+            'employment_dates_start': start,
+            'employment_dates_end': end,
+            'job_description': _description(),
+        }
+        job_projects = [
+            {'project_name': _text(3)[:-1], 'client': rng.choice(_NAMES), 'project_description': _description()}
+            for _ in range(rng.randint(0, projects))
+        ]
+        if job_projects:
+            job['projects'] = job_projects
+        work_experience.append(job)
+
+    education = []
+    for i in range(max(1, size // 10)):
+        start, end = _years()
+        education.append({
+            'degree': f"{_text(2)[:-1]} {i + 1}",
+            'university_name': f"Université {rng.choice(_NAMES)}",
+            'attendance_dates_start': start,
+            'attendance_dates_end': end,
+            'study_description': _description(),
+        })
+
+    return {'cv': {
+        'personal_info': {
+            'name': f"{rng.choice(_NAMES)} {rng.choice(_NAMES)} {seed}",
+            'photo_url': '../templates/template.jpg',
+            'job': _text(3)[:-1],
+            'email': f"person{seed}@example.com",
+            'phone_number': f"06 {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)}",
+        },
+        'work_experience': work_experience,
+        'education': education,
+        'personal_projects': [
+            {'project_title': f"{_text(2)[:-1]} {i + 1}", 'project_description': _description(),
+             'project_link': f"https://example.com/project/{i + 1}"}
+            for i in range(max(1, size // 2))
+        ],
+        'skills': [{'skill': _text(1)[:-1]} for _ in range(max(3, size // 5))],
+        'hobbies': [{'hobbie': _text(1)[:-1]} for _ in range(3)],
+        'social_links': [{'url': f"https://example.com/{seed}"}],
+    }}
+
+
+def write_corpus(directory, sizes=None, count=1):
+    """
+    Writes synthetic CVs as YAML files.
+
+    :param directory: Directory of the corpus, created if needed.
+    :param sizes: Numbers of work experience entries of the CVs, defaults to `G_BENCH_CONFIG['sizes']`.
+    :param count: Number of CVs of each size, each with its own seed.
+    :return: The list of written paths.
+    """
+    sizes = sizes or G_BENCH_CONFIG['sizes']
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for size in sizes:
+        for seed in range(count):
+            path = os.path.join(directory, f"cv_{size}_{seed}.yml")
+            with open(path, 'w', encoding='utf-8') as f:
+                yaml.safe_dump(generate_cv(size, seed), f, allow_unicode=True, sort_keys=False)
+            paths.append(path)
+    return paths
+
+
+def _best_time(func, repeat):
+    """Runs a function `repeat` times and returns the best wall time, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_loaders(sizes=None, repeat=None):
+    """
+    Times each loader on synthetic CVs of the given sizes.
+
+    :param sizes: Numbers of work experience entries of the synthetic CVs.
+    :param repeat: Number of timed runs per measure, the best one is kept.
+    :return: A list of (size, loader name, file size in bytes, best time in seconds) tuples.
+    """
+    sizes = sizes or G_BENCH_CONFIG['sizes']
+    repeat = repeat or G_BENCH_CONFIG['repeat']
+    with open(G_BENCH_CONFIG['template'], 'rb') as f:
+        template = parse_yaml(f)
+
+    def _load_with(loader, path):
+        with open(path, 'rb') as f:
+            return yaml.load(f, Loader=loader)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            data = scale_cv(template, size)
+            yaml_path = os.path.join(tmp_dir, f"cv_{size}.yml")
+            json_path = os.path.join(tmp_dir, f"cv_{size}.json")
+            with open(yaml_path, 'w', encoding='utf-8') as f:
+                yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+
+            cache_dir = os.path.join(tmp_dir, 'parsed')
+            load_document(yaml_path, cache_dir)  # Fills the parse cache
+
+            loaders = [('yaml.SafeLoader', lambda: _load_with(yaml.SafeLoader, yaml_path), yaml_path)]
+            if hasattr(yaml, 'CSafeLoader'):
+                loaders.append(('yaml.CSafeLoader', lambda: _load_with(yaml.CSafeLoader, yaml_path), yaml_path))
+            loaders.append(('json', lambda: load_document(json_path), json_path))
+            loaders.append(('parse cache', lambda: load_document(yaml_path, cache_dir), yaml_path))
+
+            for name, func, path in loaders:
+                rows.append((size, name, os.path.getsize(path), _best_time(func, repeat)))
+    return rows
+
+
+def format_table(rows):
+    """
+    Formats loader benchmark results as a text table, with the speedup over `yaml.SafeLoader`.
+
+    :param rows: Results of `bench_loaders`.
+    :return: The table as a string.
+    """
+    baselines = {size: seconds for size, name, _, seconds in rows if name == 'yaml.SafeLoader'}
+    lines = [f"{'entries':>8} {'loader':<18} {'file size':>12} {'time (ms)':>12} {'speedup':>9}"]
+    for size, name, file_size, seconds in rows:
+        speedup = baselines.get(size, seconds) / seconds if seconds else 0.0
+        lines.append(f"{size:>8} {name:<18} {file_size:>12} {seconds * 1000:>12.3f} {speedup:>8.1f}x")
+    return '\n'.join(lines)
+
+
+def _legacy_work_experience(page, work_experience):
+    """The experience section as it was rendered before the compiled templates, with hand-written f-strings."""
+    add_content_to_page(page, """
+    <section class="experience">
+        <h2>Experience</h2>
+    """)
+
+    for job in work_experience:
+        job_title = job.get('job_title', 'Job Title')
+        company_name = job.get('company_name', 'Company Name')
+        employment_dates_start = job.get('employment_dates_start', 'Start Date')
+        employment_dates_end = job.get('employment_dates_end', 'End Date')
+        job_description = job.get('job_description', 'Description of the role.')
+
+        add_content_to_page(page, f"""
+        <article>
+            <h3>{job_title} - <span class="company">{company_name}</span></h3>
+            <p class="subdetails">{employment_dates_start} - {employment_dates_end}</p>
+            <p>{job_description}</p>
+        """)
+
+        projects = job.get('projects', [])
+        if projects:
+            for project in projects:
+                project_name = project.get('project_name', 'Project Name')
+                client = project.get('client', 'Client')
+                project_description = project.get('project_description', 'Description of the project.')
+
+                add_content_to_page(page, f"""
+                <div class="project">
+                    <h4>{project_name}</h4>
+                    <p><strong>Client:</strong> {client}</p>
+                    <p>{project_description}</p>
+                </div>
+                """)
+        add_content_to_page(page, "</article>")
+    add_content_to_page(page, "</section>")
+
+
+def bench_render(sizes=None, repeat=None):
+    """
+    Times the rendering of the experience section with the compiled templates and with the former f-string implementation.
+
+    The templates are compiled before timing, as they are once per process in normal use.
+
+    :param sizes: Numbers of work experience entries of the synthetic CVs.
+    :param repeat: Number of timed runs per measure, the best one is kept.
+    :return: A list of (size, implementation name, best time in seconds) tuples.
+    """
+    sizes = sizes or G_BENCH_CONFIG['sizes']
+    repeat = repeat or G_BENCH_CONFIG['repeat']
+    with open(G_BENCH_CONFIG['template'], 'rb') as f:
+        template = parse_yaml(f)
+    templates = get_template_set()
+    templates['experience']  # Compiles the section before timing
+
+    def _render(function, work_experience, page_templates=None):
+        page = HtmlPage(page_templates)
+        function(page, work_experience)
+        return page.getvalue()
+
+    rows = []
+    for size in sizes:
+        work_experience = CVData.from_data(scale_cv(template, size)).get_work_experience()
+        implementations = [
+            ('f-strings', lambda: _render(_legacy_work_experience, work_experience, templates)),
+            ('compiled templates', lambda: _render(adding_work_experience, work_experience, templates)),
+        ]
+        for name, func in implementations:
+            rows.append((size, name, _best_time(func, repeat)))
+    return rows
+
+
+def format_render_table(rows):
+    """
+    Formats render benchmark results as a text table, with the time per entry and the speedup over the f-strings.
+
+    :param rows: Results of `bench_render`.
+    :return: The table as a string.
+    """
+    baselines = {size: seconds for size, name, seconds in rows if name == 'f-strings'}
+    lines = [f"{'entries':>8} {'implementation':<20} {'time (ms)':>12} {'per entry (us)':>15} {'speedup':>9}"]
+    for size, name, seconds in rows:
+        speedup = baselines.get(size, seconds) / seconds if seconds else 0.0
+        lines.append(f"{size:>8} {name:<20} {seconds * 1000:>12.3f} {seconds * 1e6 / size:>15.2f} {speedup:>8.1f}x")
+    return '\n'.join(lines)
+
+
+class _UnescapedTemplateSet(TemplateSet):
+    """The templates of `sections/` with every field inserted as it is, as before fields were escaped, for reference."""
+    _FIELD = re.compile(r'\{\{\s*([A-Za-z]\w*)\s*(?:\|\s*safe\s*)?\}\}')
+
+    def __getitem__(self, section):
+        blocks = self._sections.get(section)
+        if blocks is None:
+            with open(self.path(section), 'r', encoding='utf-8') as f:
+                sources = parse_blocks(f.read())
+            texts = load_locale(self.locale).texts
+            blocks = self._sections[section] = {
+                name: compile_block(self._FIELD.sub(r'{{ \1 | safe }}', translate_block(source, texts)), f"{section}.{name}")
+                for name, source in sources.items()
+            }
+        return blocks
+
+
+def _render_page(cv, templates, css_file):
+    """Renders a whole page with the given templates."""
+    page = HtmlPage(templates)
+    init_html_structure(page, css_file)
+    for name, args in section_inputs(cv).items():
+        G_SECTION_BUILDERS[name](page, *args)
+    ending_html_page(page)
+    return page.getvalue()
+
+
+def bench_output(sizes=None, repeat=None):
+    """
+    Measures the size and render time of whole pages of synthetic CVs.
+
+    Each page is rendered with the former unescaped templates, with the escaped templates,
+    with the minified templates, and with the escaped templates then minified as a whole by
+    `minify_html`. The templates are compiled before timing.
+
+    :param sizes: Numbers of work experience entries of the synthetic CVs.
+    :param repeat: Number of timed runs per measure, the best one is kept.
+    :return: A list of (size, variant name, page size in bytes, best time in seconds) tuples.
+    """
+    sizes = sizes or G_BENCH_CONFIG['sizes']
+    repeat = repeat or G_BENCH_CONFIG['repeat']
+    css_file = G_BENCH_CONFIG['css_file']
+    unescaped = _UnescapedTemplateSet(get_template_set(css_file).directories)
+    escaped = get_template_set(css_file)
+    minified = get_template_set(css_file, minify=True)
+
+    rows = []
+    for size in sizes:
+        cv = CVData.from_data(generate_cv(size))
+        variants = [
+            ('unescaped', lambda: _render_page(cv, unescaped, css_file)),
+            ('escaped', lambda: _render_page(cv, escaped, css_file)),
+            ('minified templates', lambda: _render_page(cv, minified, css_file)),
+            ('escaped + minify_html', lambda: minify_html(_render_page(cv, escaped, css_file))),
+        ]
+        for name, func in variants:
+            nbytes = len(func().encode('utf-8'))
+            rows.append((size, name, nbytes, _best_time(func, repeat)))
+    return rows
+
+
+def format_output_table(rows):
+    """
+    Formats output benchmark results as a text table, with the size and time relative to the unescaped page.
+
+    :param rows: Results of `bench_output`.
+    :return: The table as a string.
+    """
+    baselines = {size: (nbytes, seconds) for size, name, nbytes, seconds in rows if name == 'unescaped'}
+    lines = [f"{'entries':>8} {'variant':<22} {'size (KiB)':>11} {'size':>7} {'time (ms)':>11} {'time':>7}"]
+    for size, name, nbytes, seconds in rows:
+        base_bytes, base_seconds = baselines.get(size, (nbytes, seconds))
+        lines.append(f"{size:>8} {name:<22} {nbytes / 1024:>11.1f} {nbytes / base_bytes * 100:>6.1f}% "
+                     f"{seconds * 1000:>11.3f} {seconds / base_seconds * 100:>6.1f}%")
+    return '\n'.join(lines)
+
+
+def bench_stages(sizes=None, repeat=None, pdf=False, executable=None):
+    """
+    Times each stage of the generation of synthetic CVs.
+
+    The stages are the YAML load in `CVData` (without parse cache), each section function of
+    `G_SECTION_BUILDERS`, the atomic write of the page and, if `pdf` is True, its conversion.
+
+    :param sizes: Numbers of work experience entries of the synthetic CVs.
+    :param repeat: Number of timed runs per measure, the best one is kept.
+    :param pdf: If True, also times the PDF conversion of the page.
+    :param executable: Name or path of the PDF converter.
+    :return: A list of (size, stage name, best time in seconds) tuples.
+    """
+    sizes = sizes or G_BENCH_CONFIG['sizes']
+    repeat = repeat or G_BENCH_CONFIG['repeat']
+    css_file = G_BENCH_CONFIG['css_file']
+    templates = get_template_set(css_file)
+
+    def _render_section(name, args):
+        page = HtmlPage(templates)
+        G_SECTION_BUILDERS[name](page, *args)
+        return page.getvalue()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            yaml_path = os.path.join(tmp_dir, f"cv_{size}.yml")
+            with open(yaml_path, 'w', encoding='utf-8') as f:
+                yaml.safe_dump(generate_cv(size), f, allow_unicode=True, sort_keys=False)
+
+            rows.append((size, 'load', _best_time(lambda: CVData(yaml_path), repeat)))
+            cv = CVData(yaml_path)
+
+            page = HtmlPage(templates)
+            init_html_structure(page, css_file)
+            fragments = [page.drain()]
+            for name, args in section_inputs(cv).items():
+                rows.append((size, f"section:{name}", _best_time(lambda: _render_section(name, args), repeat)))
+                fragments.append(_render_section(name, args))
+            ending_html_page(page)
+            fragments.append(page.drain())
+            html_content = ''.join(fragments)
+
+            html_path = os.path.join(tmp_dir, f"cv_{size}.html")
+            rows.append((size, 'write', _best_time(lambda: write_html_file(html_path, html_content), repeat)))
+            if pdf:
+                rows.append((size, 'pdf', _best_time(lambda: convert_to_pdf([html_path], executable), repeat)))
+    return rows
+
+
+def format_stage_table(rows):
+    """
+    Formats stage benchmark results as a text table, with the share of each stage in the total time of its size.
+
+    :param rows: Results of `bench_stages`.
+    :return: The table as a string.
+    """
+    totals = {}
+    for size, _, seconds in rows:
+        totals[size] = totals.get(size, 0.0) + seconds
+    lines = [f"{'entries':>8} {'stage':<22} {'time (ms)':>12} {'share':>7}"]
+    for size, name, seconds in rows:
+        share = seconds / totals[size] * 100 if totals[size] else 0.0
+        lines.append(f"{size:>8} {name:<22} {seconds * 1000:>12.3f} {share:>6.1f}%")
+    return '\n'.join(lines)
+
+
+def _run_python(args):
+    """Runs the interpreter of the benchmark with the given arguments, the modules of SmartCVBuilder being importable."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, (_MODULE_DIR, env.get('PYTHONPATH'))))
+    return subprocess.run([sys.executable, *args], env=env, capture_output=True, text=True, check=True)
+
+
+def import_times(module='cvMain'):
+    """
+    Measures the import of a module in a fresh interpreter with `-X importtime`.
+
+    :param module: Name of the imported module.
+    :return: A dictionary mapping each imported module to its (self, cumulative) import time in seconds.
+    """
+    times = {}
+    for line in _run_python(['-X', 'importtime', '-c', f"import {module}"]).stderr.splitlines():
+        match = _IMPORT_TIME.match(line)
+        if match:
+            times[match.group(3).strip()] = (int(match.group(1)) / 1e6, int(match.group(2)) / 1e6)
+    return times
+
+
+def eager_modules(module='cvMain', lazy_modules=None):
+    """
+    Lists the modules that should only be imported on first use but are imported with a module.
+
+    :param module: Name of the imported module.
+    :param lazy_modules: Names of the modules that must stay lazy, defaults to `G_BENCH_CONFIG['lazy_modules']`.
+    :return: The sorted list of the lazy modules found in `sys.modules` after the import.
+    """
+    lazy_modules = lazy_modules or G_BENCH_CONFIG['lazy_modules']
+    loaded = set(_run_python(['-c', f"import sys, {module}; print(' '.join(sys.modules))"]).stdout.split())
+    return sorted(loaded.intersection(lazy_modules))
+
+
+def bench_startup(repeat=None):
+    """
+    Times the startup of a single-CV invocation, each command in a fresh interpreter.
+
+    The commands are the bare interpreter, the import of `cvMain` (also measured with
+    `-X importtime`, which excludes the interpreter startup), `cvMain.py --help` and the
+    generation of the template CV without cache.
+
+    :param repeat: Number of timed runs per measure, the best one is kept.
+    :return: A list of (1, command name, best time in seconds) tuples.
+    """
+    repeat = repeat or G_BENCH_CONFIG['repeat']
+    main_script = os.path.join(_MODULE_DIR, 'cvMain.py')
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        commands = (
+            ('python -c pass', ['-c', 'pass']),
+            ('import cvMain', ['-c', 'import cvMain']),
+            ('cvMain.py --help', [main_script, '--help']),
+            ('cvMain.py --no-cache', [main_script, G_BENCH_CONFIG['template'], G_BENCH_CONFIG['css_file'],
+                                      '--output', tmp_dir, '--no-cache']),
+        )
+        for name, args in commands:
+            rows.append((1, name, _best_time(lambda: _run_python(args), repeat)))
+    rows.append((1, 'import cvMain (importtime)', min(import_times()['cvMain'][1] for _ in range(repeat))))
+    return rows
+
+
+def format_startup_table(rows, imports=None, top=10):
+    """
+    Formats startup benchmark results as a text table, with the time of each command over the bare interpreter.
+
+    :param rows: Results of `bench_startup`.
+    :param imports: Optional result of `import_times`, whose slowest modules are listed after the commands.
+    :param top: Number of modules listed.
+    :return: The table as a string.
+    """
+    interpreter = next((seconds for _, name, seconds in rows if name == 'python -c pass'), 0.0)
+    lines = [f"{'command':<28} {'time (ms)':>11} {'over python':>12}"]
+    for _, name, seconds in rows:
+        over = '' if name.endswith('(importtime)') else f"{(seconds - interpreter) * 1000:>12.3f}"
+        lines.append(f"{name:<28} {seconds * 1000:>11.3f} {over:>12}")
+    if imports:
+        lines.append('')
+        lines.append(f"{'module (slowest imports)':<28} {'self (ms)':>11} {'cumul. (ms)':>12}")
+        for name, (own, cumulative) in sorted(imports.items(), key=lambda item: item[1][0], reverse=True)[:top]:
+            lines.append(f"{name:<28} {own * 1000:>11.3f} {cumulative * 1000:>12.3f}")
+    return '\n'.join(lines)
+
+
+def _git_revision():
+    """Returns the current git commit of the working tree, or None outside of a git checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(path, suite, rows):
+    """
+    Writes benchmark results to a JSON file.
+
+    Besides the measures, the file records the builder version, git commit, Python version and
+    platform of the run, so that results from different commits can be told apart.
+
+    :param path: Path of the JSON file.
+    :param suite: Name of the benchmark suite, such as 'stages'.
+    :param rows: Results of the suite, as (size, name, ..., seconds) tuples.
+    :return: The saved document.
+    """
+    document = {
+        'suite': suite,
+        'builder_version': G_BUILDER_VERSION,
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'results': [{'size': row[0], 'name': row[1], 'seconds': row[-1]} for row in rows],
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2)
+    return document
+
+
+def compare_results(baseline, current, threshold=None, noise_floor=None):
+    """
+    Lists the measures slower than a baseline by more than a threshold.
+
+    Measures missing from either side are ignored.
+
+    :param baseline: A document written by `save_results`.
+    :param current: A document written by `save_results`, or its `results` list.
+    :param threshold: Relative slowdown reported as a regression, defaults to `G_BENCH_CONFIG['threshold']`.
+    :param noise_floor: Absolute slowdown in seconds below which a measure is never a regression.
+    :return: A list of (size, name, baseline seconds, current seconds) tuples.
+    """
+    threshold = G_BENCH_CONFIG['threshold'] if threshold is None else threshold
+    noise_floor = G_BENCH_CONFIG['noise_floor'] if noise_floor is None else noise_floor
+    reference = {(entry['size'], entry['name']): entry['seconds'] for entry in baseline['results']}
+    results = current['results'] if isinstance(current, dict) else current
+
+    regressions = []
+    for entry in results:
+        before = reference.get((entry['size'], entry['name']))
+        after = entry['seconds']
+        if before is not None and after > before * (1 + threshold) and after - before > noise_floor:
+            regressions.append((entry['size'], entry['name'], before, after))
+    return regressions
+
+
+# =================== MAIN ===================
+def main(argv=None):
+    """Parses the command line and runs a benchmark suite.
+
+    :param argv: Command line arguments, defaults to `sys.argv[1:]`.
+    :return: The exit code, 1 if a regression was found.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark SmartCVBuilder on synthetic CVs.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=G_BENCH_CONFIG['sizes'], help="Numbers of work experience entries.")
+    parser.add_argument('--repeat', type=int, default=G_BENCH_CONFIG['repeat'], help="Timed runs per measure.")
+    suites = parser.add_mutually_exclusive_group()
+    suites.add_argument('--render', action='store_true', help="Benchmark the section rendering instead of the loaders.")
+    suites.add_argument('--output-size', action='store_true', help="Measure the size and render time of escaped and minified pages.")
+    suites.add_argument('--stages', action='store_true', help="Time each stage of the generation instead of the loaders.")
+    suites.add_argument('--startup', action='store_true', help="Time the startup of a single-CV invocation and check it against the budget.")
+    suites.add_argument('--corpus', metavar='DIR', help="Write a corpus of synthetic CVs to DIR instead of benchmarking.")
+    parser.add_argument('--count', type=int, default=1, help="Number of CVs of each size written with --corpus.")
+    parser.add_argument('--pdf', action='store_true', help="Also time the PDF conversion with --stages.")
+    parser.add_argument('--wkhtmltopdf', default=G_CONFIG_PDF['wkhtmltopdf'], help="PDF converter executable.")
+    parser.add_argument('--json', metavar='PATH', help="Save the results to a JSON file.")
+    parser.add_argument('--compare', metavar='PATH', help="Compare the results with a JSON file saved by a previous run.")
+    parser.add_argument('--budget', type=float, default=G_BENCH_CONFIG['startup_budget'], help="Maximum import time of cvMain in seconds, checked with --startup.")
+    parser.add_argument('--threshold', type=float, default=G_BENCH_CONFIG['threshold'], help="Relative slowdown reported as a regression.")
+    args = parser.parse_args(argv)
+
+    if args.corpus:
+        paths = write_corpus(args.corpus, args.sizes, args.count)
+        print(f"Wrote {len(paths)} CV(s) to {args.corpus}")
+        return 0
+
+    if args.render:
+        suite, rows = 'render', bench_render(args.sizes, args.repeat)
+        print(format_render_table(rows))
+    elif args.output_size:
+        suite, rows = 'output', bench_output(args.sizes, args.repeat)
+        print(format_output_table(rows))
+    elif args.stages:
+        suite, rows = 'stages', bench_stages(args.sizes, args.repeat, args.pdf, args.wkhtmltopdf)
+        print(format_stage_table(rows))
+    elif args.startup:
+        suite, rows = 'startup', bench_startup(args.repeat)
+        print(format_startup_table(rows, import_times()))
+        status = 0
+        import_time = next(seconds for _, name, seconds in rows if name == 'import cvMain (importtime)')
+        if import_time > args.budget:
+            print(f"[budget] import cvMain: {import_time * 1000:.3f} ms > {args.budget * 1000:.3f} ms", file=sys.stderr)
+            status = 1
+        for name in eager_modules():
+            print(f"[budget] import cvMain imports {name}, which should only be imported on first use", file=sys.stderr)
+            status = 1
+        if status:
+            return status
+    else:
+        suite, rows = 'loaders', bench_loaders(args.sizes, args.repeat)
+        print(format_table(rows))
+
+    current = [{'size': row[0], 'name': row[1], 'seconds': row[-1]} for row in rows]
+    if args.json:
+        save_results(args.json, suite, rows)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('suite') != suite:
+            print(f"{args.compare} holds '{baseline.get('suite')}' results, not '{suite}'", file=sys.stderr)
+            return 1
+        regressions = compare_results(baseline, current, args.threshold)
+        for size, name, before, after in regressions:
+            print(f"[regression] {size} entries, {name}: {before * 1000:.3f} ms -> {after * 1000:.3f} ms "
+                  f"(+{(after / before - 1) * 100:.1f}%)", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regression over {args.threshold * 100:.0f}% against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,16 +14,32 @@ This script is designed to create a professional CV in HTML format. It takes in
 Modules and Functions
 ---------------------
 
-- `init_html_structure(css_file)`: Initializes the HTML structure with basic HTML tags and includes a CSS file for styling.
-- `add_content_to_page(content)`: Appends HTML content to the global HTML content variable.
-- `adding_profile_content(personal_info)`: Adds personal profile information to the HTML content, including name, job title, email, phone number, and photo.
-- `generate_html(cv, css_file)`: Main function that generates the complete HTML CV by combining all sections and writing the final HTML to a file.
+- `HtmlPage`: Per-render accumulator of HTML fragments, joined once when the page is complete.
+- `init_html_structure(page, css_file, css_content)`: Initializes the HTML structure with basic HTML tags and links a CSS file for styling, or embeds the stylesheet when its content is given.
+- `add_content_to_page(page, content)`: Appends HTML content to the page being rendered.
+- `adding_profile_content(page, personal_info)`: Adds personal profile information to the HTML content, including name, job title, email, phone number, and photo.
+- `adding_social_links(page, social_links, page_breaks)`: Adds the social links, each with the icon of its platform.
+- `section_inputs(cv, locale)`: Gathers the data of each body section from the CV, localized for the page.
+- `render_section(name, *args)`: Renders a single body section on its own.
+- `iter_html(cv, css_file, css_content, minify, locale)`: Renders the complete HTML CV section by section, as a generator of fragments.
+- `render_html(cv, css_file, css_content, minify, locale)`: Renders the complete HTML CV and returns it as a string.
+- `write_html(cv, css_file, stream, css_content, flush)`: Renders the complete HTML CV directly to a file, pipe or socket, optionally flushing after each section.
+- `atomic_open(path)`: Opens a file for writing through a temporary file renamed over the destination.
+- `write_html_file(path, content)`: Writes a file atomically.
+- `generate_html(cv, css_file, output_path)`: Main function that generates the complete HTML CV by combining all sections and writing the final HTML to a file.
+- `generate_html_styles(cv, css_files, output_path)`: Generates one page per stylesheet, rendering the body sections only once.
+- `generate_html_locales(cv, css_file, output_path, locales)`: Generates one page per locale, rendering the fragments shared by the locales only once.
+- `style_name(css_file)`: Returns the name of a style, used in the output file names.
 - `to continue`:....
+
+Every render works on its own `HtmlPage`, so `generate_html` can be called repeatedly in the same process and concurrently from several threads.
+
 Global Variables
 ----------------
 
-- `G_HTML_CONTENT`: A string containing the entire HTML page to be created.
+- `G_BUILDER_VERSION`: Version of the generated HTML, to bump whenever the output of the builder changes.
 - `G_CONFIG_HTML`: A dictionary configuring HTML generation settings, such as page size, margin, encoding, and local file access.
+- `G_SECTION_BUILDERS`: Maps the name of each body section to the function adding it to the page, in page order.
 
 Usage
 -----
@@ -33,15 +49,23 @@ To use this script, create an instance of `CVData` with the necessary CV informa
 """
 import sys
 import os
+import uuid
+from contextlib import contextmanager
 from cvDataClass import CVData
+from cvIcons import detect_platform, icon_sprite, link_text, link_url, platform_label
+from cvLocales import localize, localize_entries, G_LOCALES_CONFIG
+from cvTemplates import get_template_set, source_path, TemplateError
+from cvProfile import trace
 
 
 # =================== VARIABLES ===================
 """
-G_HTML_CONTENT: str
-    String containing the entire html page to be created
+G_BUILDER_VERSION: str
+
+Version of the generated HTML. It is part of the render cache key, so it must be bumped
+whenever a change of the builder changes its output.
 """
-G_HTML_CONTENT = f''' '''
+G_BUILDER_VERSION = '1.5.0'
 
 """
 G_CONFIG_HTML: dict
@@ -53,50 +77,110 @@ Attributes:
     margin (str): The margins around the content of the html, set to '0mm' indicating no margin.
     encoding (str): The character encoding used in the html, set to 'UTF-8' to support a wide range of characters.
     enable_local_file_access (bool): A flag to determine whether local file access is permitted, set to True.
+    output_dir (str): Default directory of the generated files, `output/` at the root of the project, or `~/smartcvbuilder` when the package is installed.
 """
 G_CONFIG_HTML = {
     'page_size': 'A4',
     'margin': '0mm',
     'encoding': 'UTF-8',
     'enable_local_file_access': True,
+    'output_dir': source_path('output') or os.path.join(os.path.expanduser('~'), 'smartcvbuilder'),
 }
 
+# =================== CLASSES ===================
+class HtmlPage:
+    """
+    Accumulates the HTML fragments of a single render.
+
+    Fragments are kept in a list and joined once by `getvalue`, which avoids the quadratic
+    cost of growing one string. Each render owns its page, so renders never share state.
+
+    Attributes:
+        templates (TemplateSet): The compiled section templates the page is rendered with.
+        shared (Dict[tuple, tuple]): Optional entry fragments shared with the pages of the other locales, see `generate_html_locales`.
+    """
+    __slots__ = ('_fragments', 'templates', 'shared')
+
+    def __init__(self, templates=None, shared=None):
+        """
+        :param templates: The `TemplateSet` to render with, defaults to the templates of `sections/`.
+        :param shared: Optional dictionary of entry fragments, shared by the pages of a CV rendered in several locales.
+        """
+        self._fragments = []
+        self.templates = templates or get_template_set()
+        self.shared = shared
+
+    def add(self, content):
+        """Appends an HTML fragment to the page.
+
+        :param content: The HTML fragment to append.
+        """
+        self._fragments.append(content)
+
+    def extend(self, contents):
+        """Appends several HTML fragments to the page.
+
+        :param contents: An iterable of HTML fragments.
+        """
+        self._fragments.extend(contents)
+
+    def drain(self):
+        """Returns the fragments added since the last call and removes them from the page.
+
+        :return: The concatenation of the drained fragments.
+        :rtype: str
+        """
+        content = ''.join(self._fragments)
+        self._fragments.clear()
+        return content
+
+    def getvalue(self):
+        """Returns the whole HTML page.
+
+        :return: The concatenation of every fragment added so far.
+        :rtype: str
+        """
+        return ''.join(self._fragments)
+
+
 # =================== FUNCTIONS ===================
 
-def add_content_to_page(content):
-    """Adds specific HTML content to the global HTML content variable.
+def add_content_to_page(page, content):
+    """Adds specific HTML content to the page being rendered.
     
-    :param content: The HTML content to add to the global content.
+    :param page: The `HtmlPage` being rendered.
+    :param content: The HTML content to add to the page.
     """
-    global G_HTML_CONTENT
-    G_HTML_CONTENT += content
+    page.add(content)
 
    
-def init_html_structure(css_file):
-    """Initializes the global HTML content variable with a basic HTML structure using add_content."""
-    global G_CONFIG_HTML
-    initial_html = """
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="{encoding}">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>SmartCVBuilder Generation</title>
-        <link rel="stylesheet" href="{css}">
-    </head>
-    <body>
-    """.format(encoding=G_CONFIG_HTML['encoding'], css=css_file)
-    add_content_to_page(initial_html)
-
-
-def adding_profile_content(personal_info):
+def init_html_structure(page, css_file, css_content=None):
+    """Initializes the page with a basic HTML structure using add_content.
+
+    :param page: The `HtmlPage` being rendered.
+    :param css_file: Path to the CSS file linked in the HTML for styling.
+    :param css_content: Optional content of the stylesheet. When given, it is embedded in a `<style>` tag instead of linking `css_file`, so that the page does not depend on the file location.
+    """
+    templates = page.templates['head']
+    if css_content is not None:
+        stylesheet_html = templates['style'](css_content=css_content)
+    else:
+        stylesheet_html = templates['link'](css_file=css_file)
+    initial_html = templates['page'](encoding=G_CONFIG_HTML['encoding'], stylesheet=stylesheet_html)
+    add_content_to_page(page, initial_html)
+
+
+def adding_profile_content(page, personal_info):
     """Adds personal profile content to the HTML page using the provided information, omitting email, phone number, or photo if not provided.
     
+    :param page: The `HtmlPage` being rendered.
     :param personal_info: Dictionary containing personal data such as name, photo URL, email, and phone number.
     """
+    templates = page.templates['profile']
+
     # Elements for email and phone number, shown only if provided
-    email_html = f'<a href="mailto:{personal_info["email"]}">{personal_info["email"]}</a>' if 'email' in personal_info and personal_info['email'] else ''
-    phone_html = personal_info['phone_number'] if 'phone_number' in personal_info and personal_info['phone_number'] else ''
+    email_html = templates['email'](email=personal_info['email']) if 'email' in personal_info and personal_info['email'] else ''
+    phone_html = templates['phone'](phone_number=personal_info['phone_number']) if 'phone_number' in personal_info and personal_info['phone_number'] else ''
 
     # Composing the contact details with proper separators
     contact_details = []
@@ -107,195 +191,460 @@ def adding_profile_content(personal_info):
     contact_html = ' | '.join(contact_details)  # Joins parts with separator only if both parts exist
 
     # Element for the profile photo, shown only if the photo URL is provided
-    photo_html = f"""
-        <div class="profile-photo">
-            <img src="{personal_info['photo_url']}" alt="{personal_info['name']}" class="profile-picture">
-        </div>
-    """ if 'photo_url' in personal_info and personal_info['photo_url'] else ''
-
-    profile_html = f"""
-    <section>
-        <header>
-            <div class="profile">
-                {photo_html}
-                <div class="profile-info">
-                    <h1>{personal_info['name']}</h1>
-                    <p>{personal_info['job']}{( ' | ' + contact_html if contact_html else '')}</p>
-                </div>
-            </div>
-        </header>
-    """
-    add_content_to_page(profile_html)
-
-def adding_work_experience(work_experience):
-    """Adds work experience content to the HTML page using the provided information.
-
-    :param work_experience: List of dictionaries containing work experience data.
+    photo_html = templates['photo'](photo_url=personal_info['photo_url'], name=personal_info['name']) \
+        if 'photo_url' in personal_info and personal_info['photo_url'] else ''
+
+    profile_html = templates['profile'](
+        photo=photo_html,
+        name=personal_info['name'],
+        job=personal_info['job'],
+        contact=' | ' + contact_html if contact_html else '',
+    )
+    add_content_to_page(page, profile_html)
+
+def _page_break(page):
+    """Returns the page break inserted before an entry flagged with `page_break` (see `cvLayout.py`).
+
+    :param page: The `HtmlPage` being rendered.
+    :return: The HTML fragment of the page break.
     """
-    experience_html = """
-    <section class="experience">
-        <h2>Experience</h2>
+    return page.templates['layout']['page_break']()
+
+def _foreign_entry(page, lang, entry_html):
+    """Wraps an entry written in another language than the page, so that it keeps its own `lang` attribute.
+
+    :param page: The `HtmlPage` being rendered.
+    :param lang: The language code of the entry.
+    :param entry_html: The HTML fragment of the entry.
+    :return: The wrapped HTML fragment.
     """
+    return page.templates['layout']['lang'](lang=lang, content=entry_html)
 
-    for job in work_experience:
-        job_title = job.get('job_title', 'Job Title')
-        company_name = job.get('company_name', 'Company Name')
-        employment_dates_start = job.get('employment_dates_start', 'Start Date')
-        employment_dates_end = job.get('employment_dates_end', 'End Date')
-        job_description = job.get('job_description', 'Description of the role.')
+def _open_list_section(page, templates, entries):
+    """Returns the opening fragments of a list section, after a page break if its first entry starts a page.
 
-        experience_html += f"""
-        <article>
-            <h3>{job_title} - <span class="company">{company_name}</span></h3>
-            <p class="subdetails">{employment_dates_start} - {employment_dates_end}</p>
-            <p>{job_description}</p>
-        """
+    The heading of the section thus moves to the next page with its first entry. The page breaks
+    of the other entries are inserted by the section functions, before the entry.
 
+    :param page: The `HtmlPage` being rendered.
+    :param templates: The templates of the section, with an `open` block.
+    :param entries: The entries of the section.
+    :return: The list of opening fragments.
+    """
+    open_html = templates['open']()
+    if entries and entries[0].get('page_break'):
+        return [_page_break(page), open_html]
+    return [open_html]
+
+def adding_work_experience(page, work_experience):
+    """Adds work experience content to the HTML page using the provided information.
+
+    :param page: The `HtmlPage` being rendered.
+    :param work_experience: List of dictionaries containing work experience data.
+    """
+    templates = page.templates['experience']
+    job_template = templates['job']
+    project_template = templates['project']
+
+    fragments = _open_list_section(page, templates, work_experience)
+    page_lang = page.templates.locale
+    # Entries rendered without translated texts are the same in every locale, see `generate_html_locales`
+    shared = page.shared if not job_template.translated else None
+
+    for i, job in enumerate(work_experience):
+        if i and job.get('page_break'):
+            fragments.append(_page_break(page))
         # Check if there are any projects associated with the job
-        projects = job.get('projects', [])
-        if projects:
-            for project in projects:
-                project_name = project.get('project_name', 'Project Name')
-                client = project.get('client', 'Client')
-                project_description = project.get('project_description', 'Description of the project.')
-
-                experience_html += f"""
-                <div class="project">
-                    <h4>{project_name}</h4>
-                    <p><strong>Client:</strong> {client}</p>
-                    <p>{project_description}</p>
-                </div>
-                """
-        experience_html += "</article>"
-    experience_html += "</section>"
-    add_content_to_page(experience_html)
-
-
-def adding_education_content(education):
+        projects = job.get('projects')
+        key = job_html = None
+        if shared is not None and not (projects and project_template.translated):
+            key = (job_template, project_template if projects else None, id(job))
+            cached = shared.get(key)
+            if cached is not None and cached[0] is job:
+                job_html = cached[1]
+        if job_html is None:
+            projects_html = ''.join([
+                project_template(
+                    project_name=project['project_name'],
+                    client=project.get('client', 'Client'),
+                    project_description=project.get('project_description', 'Description of the project.'),
+                )
+                for project in projects
+            ]) if projects else ''
+
+            job_html = job_template(
+                job_title=job['job_title'],
+                company_name=job['company_name'],
+                employment_dates_start=job.get('employment_dates_start', 'Start Date'),
+                employment_dates_end=job.get('employment_dates_end', 'End Date'),
+                job_description=job.get('job_description', 'Description of the role.'),
+                projects=projects_html,
+            )
+            if key is not None:
+                shared[key] = (job, job_html)
+        lang = job.get('lang')
+        fragments.append(_foreign_entry(page, lang, job_html) if lang and lang != page_lang else job_html)
+    fragments.append(templates['close']())
+    page.extend(fragments)
+
+
+def adding_education_content(page, education):
     """Adds education content to the HTML page using the provided information.
 
+    :param page: The `HtmlPage` being rendered.
     :param education: List of dictionaries containing education data.
     """
-    education_html = """
-    <section class="education">
-        <h2>Education</h2>
-    """
-    for entry in education:
-        degree = entry.get('degree', 'Degree')
-        university_name = entry.get('university_name', 'University Name')
-        attendance_dates_start = entry.get('attendance_dates_start', 'Start Date')
-        attendance_dates_end = entry.get('attendance_dates_end', 'End Date')
-        study_description = entry.get('study_description', 'Description of studies.')
-
-        education_html += f"""
-        <article>
-            <h3>{degree}</h3>
-            <p class="subdetails">{university_name} - {attendance_dates_start} - {attendance_dates_end}</p>
-            <p>{study_description}</p>
-        </article>
-        """
-    
-    education_html += "</section>"
-
-    add_content_to_page(education_html)
-
-
-def adding_projects_content(projects):
+    templates = page.templates['education']
+    entry_template = templates['entry']
+
+    fragments = _open_list_section(page, templates, education)
+    page_lang = page.templates.locale
+    shared = page.shared if not entry_template.translated else None
+    for i, entry in enumerate(education):
+        if i and entry.get('page_break'):
+            fragments.append(_page_break(page))
+        key = entry_html = None
+        if shared is not None:
+            key = (entry_template, id(entry))
+            cached = shared.get(key)
+            if cached is not None and cached[0] is entry:
+                entry_html = cached[1]
+        if entry_html is None:
+            entry_html = entry_template(
+                degree=entry['degree'],
+                university_name=entry['university_name'],
+                attendance_dates_start=entry.get('attendance_dates_start', 'Start Date'),
+                attendance_dates_end=entry.get('attendance_dates_end', 'End Date'),
+                study_description=entry.get('study_description', 'Description of studies.'),
+            )
+            if key is not None:
+                shared[key] = (entry, entry_html)
+        lang = entry.get('lang')
+        fragments.append(_foreign_entry(page, lang, entry_html) if lang and lang != page_lang else entry_html)
+    fragments.append(templates['close']())
+    page.extend(fragments)
+
+
+def adding_projects_content(page, projects):
     """Adds personal projects content to the HTML page using the provided information.
 
+    :param page: The `HtmlPage` being rendered.
     :param projects: List of dictionaries containing project data.
     """
-    projects_html = """
-    <section class="projects-achievements">
-        <h2>Projects & Achievements</h2>
-    """
+    templates = page.templates['projects']
+    entry_template = templates['entry']
+    link_template = templates['link']
 
-    for project in projects:
-        project_title = project.get('project_title', 'Project Title')
-        project_description = project.get('project_description', 'Description of the project.')
-        project_link = project.get('project_link', '')
+    fragments = _open_list_section(page, templates, projects)
+    page_lang = page.templates.locale
+    shared = page.shared if not entry_template.translated else None
 
-        projects_html += f"""
-        <article>
-            <h3>{project_title}</h3>
-            <p>{project_description}</p>
-        """
-        
-        if project_link:
-            projects_html += f'<p><a href="{project_link}">View Project</a></p>'
-        
-        projects_html += "</article>"
-    
-    projects_html += "</section>"
-
-    add_content_to_page(projects_html)
-
-
-def adding_sidebar_content(skills, hobbies):
+    for i, project in enumerate(projects):
+        if i and project.get('page_break'):
+            fragments.append(_page_break(page))
+        project_link = project.get('project_link', '')
+        key = entry_html = None
+        if shared is not None and not (project_link and link_template.translated):
+            key = (entry_template, link_template if project_link else None, id(project))
+            cached = shared.get(key)
+            if cached is not None and cached[0] is project:
+                entry_html = cached[1]
+        if entry_html is None:
+            entry_html = entry_template(
+                project_title=project['project_title'],
+                project_description=project.get('project_description', 'Description of the project.'),
+                link=link_template(project_link=project_link) if project_link else '',
+            )
+            if key is not None:
+                shared[key] = (project, entry_html)
+        lang = project.get('lang')
+        fragments.append(_foreign_entry(page, lang, entry_html) if lang and lang != page_lang else entry_html)
+    fragments.append(templates['close']())
+    page.extend(fragments)
+
+
+def adding_sidebar_content(page, skills, hobbies):
     """Adds sidebar content to the HTML page using the provided skills and hobbies lists.
 
+    :param page: The `HtmlPage` being rendered.
     :param skills: List containing skill names.
     :param hobbies: List containing hobby names.
     """
-    # Creating HTML list items for skills
-    skill_items = ''.join([f'<li>{skill}</li>' for skill in skills if skill is not None])
-    
-    # Creating HTML list items for hobbies
-    hobby_items = ''.join([f'<li>{hobby}</li>' for hobby in hobbies if hobby is not None])
+    templates = page.templates['sidebar']
+    item_template = templates['item']
 
     # Composing the sidebar section
-    sidebar_html = """
-    <div class="container">
-        <aside class="sidebar">
-    """
+    sidebar_html = [templates['open']()]
 
     if skills:
-        sidebar_html += f"""
-            <section class="skills">
-                <h2>Skills</h2>
-                <ul>
-                    {skill_items}
-                </ul>
-            </section>
-        """
+        # Creating HTML list items for skills
+        skill_items = ''.join([item_template(value=skill) for skill in skills if skill is not None])
+        sidebar_html.append(templates['skills'](items=skill_items))
     if hobbies:
-        sidebar_html += f"""
-            <section class="hobbies">
-                <h2>Hobbies</h2>
-                <ul>
-                    {hobby_items}
-                </ul>
-            </section>
-        """
+        # Creating HTML list items for hobbies
+        hobby_items = ''.join([item_template(value=hobby) for hobby in hobbies if hobby is not None])
+        sidebar_html.append(templates['hobbies'](items=hobby_items))
 
-    sidebar_html += """
-        </aside>
-        <main class="main-content">
-    """
+    sidebar_html.append(templates['close']())
 
-    add_content_to_page(sidebar_html)
+    add_content_to_page(page, ''.join(sidebar_html))
 
-def adding_social_links(social_links):
-    NotImplemented
+def adding_social_links(page, social_links, page_breaks=()):
+    """Adds the social links section to the HTML page, with the icon of the platform of each link.
 
-def ending_html_page():
+    The platform is detected from the URL of the link (see `cvIcons.detect_platform`), and its
+    icon is drawn from the SVG sprite embedded with the section, which only holds the icons of the
+    platforms of the page, so the links need no extra file or network fetch. URLs written without
+    their scheme, such as 'github.com/your-name', link to their site (see `cvIcons.link_url`).
+    Nothing is added for a CV without links.
+
+    :param page: The `HtmlPage` being rendered.
+    :param social_links: List containing the URLs of the links.
+    :param page_breaks: Indexes of the links flagged with `page_break` (see `cvLayout.py`).
+    """
+    if not social_links:
+        return
+    templates = page.templates['social_links']
+    link_template = templates['link']
+    urls = [link_url(url) for url in social_links]
+    platforms = [detect_platform(url) for url in urls]
+
+    fragments = [_page_break(page)] if 0 in page_breaks else []
+    fragments.append(templates['open'](sprite=icon_sprite(platforms)))
+    for i, (url, platform) in enumerate(zip(urls, platforms)):
+        if i and i in page_breaks:
+            fragments.append(templates['page_break'](page_break=_page_break(page)))
+        fragments.append(link_template(url=url, platform=platform, label=platform_label(platform),
+                                       text=link_text(url)))
+    fragments.append(templates['close']())
+    page.extend(fragments)
+
+def ending_html_page(page):
     """
     Adds the closing HTML tags to the page.
 
     This function appends the necessary closing tags for the main content section,
     the body, and the HTML document. It ensures that the HTML structure is properly
     terminated.
+
+    :param page: The `HtmlPage` being rendered.
+    """
+    add_content_to_page(page, page.templates['ending']['page']())
+
+"""
+G_SECTION_BUILDERS: dict
+
+Maps the name of each body section to the function adding it to the page, in page order.
+The arguments of each function are given by `section_inputs`.
+"""
+G_SECTION_BUILDERS = {
+    'profile': adding_profile_content,
+    'sidebar': adding_sidebar_content,
+    'experience': adding_work_experience,
+    'education': adding_education_content,
+    'projects': adding_projects_content,
+    'social_links': adding_social_links,
+}
+
+def section_inputs(cv, locale=None):
+    """
+    Gathers the data of each body section from the CV.
+
+    The personal information and the entries are localized for the page, see `cvLocales.localize`.
+
+    :param cv: Object containing the CV data.
+    :param locale: Code of the locale of the page, defaults to `G_LOCALES_CONFIG['default']`.
+    :return: A dictionary mapping each section name of `G_SECTION_BUILDERS` to the tuple of arguments of its function, without the page.
+    :rtype: Dict[str, tuple]
+    """
+    locale = locale or G_LOCALES_CONFIG['default']
+    personal_info = cv.get_personal_info()
+    work_experience = cv.get_work_experience()
+    education = cv.get_education()
+    personal_projects = cv.get_personal_projects()
+    # Only the CVs with translations in the locale need localized entries
+    if locale in cv.translated_locales:
+        personal_info = localize(personal_info, locale)
+        work_experience = localize_entries(work_experience, locale)
+        education = localize_entries(education, locale)
+        personal_projects = localize_entries(personal_projects, locale)
+    return {
+        'profile': (personal_info,),
+        'sidebar': (cv.get_skills(), cv.get_hobbies()),
+        'experience': (work_experience,),
+        'education': (education,),
+        'projects': (personal_projects,),
+        'social_links': (cv.get_social_links(), tuple(i for i, link in enumerate(cv.social_links) if link.page_break)),
+    }
+
+def render_section(name, *args, templates=None):
+    """
+    Renders a single body section on its own.
+
+    :param name: The section name, a key of `G_SECTION_BUILDERS`.
+    :param args: The arguments of the section function, as given by `section_inputs`.
+    :param templates: The `TemplateSet` to render with, defaults to the templates of `sections/`.
+    :return: The HTML fragment of the section.
+    :rtype: str
+    """
+    page = HtmlPage(templates)
+    G_SECTION_BUILDERS[name](page, *args)
+    return page.getvalue()
+
+def _run_step(page, function, *args):
+    """
+    Runs a page function and returns the fragment it added to the page.
+
+    The step is measured by the active `cvProfile.Tracer`, if any, under the name of the function.
+
+    :param page: The `HtmlPage` being rendered.
+    :param function: A function adding content to the page, such as `adding_work_experience`.
+    :param args: The arguments of the function, without the page.
+    :return: The HTML fragment added by the function.
+    :rtype: str
+    """
+    with trace(function.__name__) as span:
+        function(page, *args)
+        fragment = page.drain()
+        if span is not None:
+            span.bytes = len(fragment.encode('utf-8'))
+    return fragment
+
+def iter_html(cv, css_file, css_content=None, minify=False, locale=None):
+    """
+    Renders the complete HTML CV page section by section.
+
+    The head, each body section of `G_SECTION_BUILDERS` and the closing tags are yielded in
+    page order as soon as they are rendered. Only one section is held in memory at a time,
+    and the caller can send the first sections before the last ones are rendered.
+
+    :param cv: Object containing the CV data, including personal info, skills, work experience, education, and projects.
+    :param css_file: Path to the CSS file to be linked in the HTML for styling.
+    :param css_content: Optional content of the stylesheet, embedded in the page instead of linking `css_file`.
+    :param minify: If True, the page is rendered with minified templates, without their indentation and line breaks.
+    :param locale: Code of the locale of the page, defaults to `G_LOCALES_CONFIG['default']`.
+    :return: A generator of HTML fragments.
+    :rtype: Iterator[str]
     """
-    ending_html= """
-    </main>
-    </div>
-    </section>
-    </body>
-    </html>
+    page = HtmlPage(get_template_set(css_file, minify, locale))
+
+    #create the html page 
+    yield _run_step(page, init_html_structure, css_file, css_content)
+    for name, args in section_inputs(cv, locale).items():
+        yield _run_step(page, G_SECTION_BUILDERS[name], *args)
+    yield _run_step(page, ending_html_page)
+
+def render_html(cv, css_file, css_content=None, minify=False, locale=None):
+    """
+    Renders the complete HTML CV page and returns it.
+
+    The page is built on a fresh `HtmlPage`, so this function is reentrant and can be
+    called concurrently from several threads.
+
+    :param cv: Object containing the CV data, including personal info, skills, work experience, education, and projects.
+    :param css_file: Path to the CSS file to be linked in the HTML for styling.
+    :param css_content: Optional content of the stylesheet, embedded in the page instead of linking `css_file`.
+    :param minify: If True, the page is rendered with minified templates.
+    :param locale: Code of the locale of the page, defaults to `G_LOCALES_CONFIG['default']`.
+    :return: The complete HTML document.
+    :rtype: str
+    """
+    return ''.join(iter_html(cv, css_file, css_content, minify, locale))
+
+def write_html(cv, css_file, stream, css_content=None, flush=False, assets=None, base_dir='.', minify=False, locale=None):
     """
-    add_content_to_page(ending_html)
+    Renders the complete HTML CV page directly to a stream, section by section.
 
-def generate_html(cv,css_file,output_path):
+    :param cv: Object containing the CV data, including personal info, skills, work experience, education, and projects.
+    :param css_file: Path to the CSS file to be linked in the HTML for styling.
+    :param stream: A writable text stream, such as an open file, `sys.stdout` or a socket wrapper.
+    :param css_content: Optional content of the stylesheet, embedded in the page instead of linking `css_file`.
+    :param flush: If True, the stream is flushed after each section, so that the reader receives it right away.
+    :param assets: Optional `cvAssets.AssetCache`. When given, the stylesheet and the local images are embedded in the page.
+    :param base_dir: Directory of the page, from which the relative image paths are resolved when `assets` is given.
+    :param minify: If True, the page is rendered with minified templates.
+    :param locale: Code of the locale of the page, defaults to `G_LOCALES_CONFIG['default']`.
+    :return: The number of characters written.
+    :rtype: int
+    """
+    if assets is not None and css_content is None:
+        css_content = assets.stylesheet(css_file)
+    written = 0
+    for fragment in iter_html(cv, css_file, css_content, minify, locale):
+        if assets is not None:
+            with trace('inline_assets'):
+                fragment = assets.inline(fragment, base_dir)
+        with trace('write') as span:
+            written += stream.write(fragment)
+            if flush:
+                stream.flush()
+            if span is not None:
+                span.bytes = len(fragment.encode('utf-8'))
+    return written
+
+def style_name(css_file):
+    """
+    Returns the name of a style, the CSS file name without its extension.
+
+    :param css_file: Path to the CSS file.
+    :return: The style name, such as 'style01'.
+    :rtype: str
+    """
+    return os.path.splitext(os.path.basename(css_file))[0]
+
+def html_output_filename(personal_info, style=None, locale=None):
+    """
+    Builds the name of the HTML file generated for a CV.
+
+    :param personal_info: Dictionary containing personal data, the name is used in the file name.
+    :param style: Optional style name, appended to the file name so that the pages of several styles do not overwrite each other.
+    :param locale: Optional locale code, appended after the style for the same reason.
+    :return: The file name, such as 'CV_Your_Name.html', 'CV_Your_Name_style01.html' with a style or 'CV_Your_Name_fr.html' with a locale.
+    :rtype: str
+    """
+    # Creating file name from user name
+    base_filename = "CV_" + personal_info['name'].replace(" ", "_")
+    if style:
+        base_filename += f"_{style}"
+    if locale:
+        base_filename += f"_{locale}"
+    return f"{base_filename}.html"
+
+@contextmanager
+def atomic_open(path):
+    """
+    Opens a file for writing atomically.
+
+    The content is written to a temporary file of the same directory, renamed over the
+    destination when the block exits without error, and removed otherwise. Readers never see
+    a partially written file, and a destination hard-linked elsewhere (e.g. by the render
+    cache) is replaced instead of being modified in place.
+
+    :param path: Path of the file to write.
+    :return: A context manager giving the open text file.
+    """
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(directory, f".{name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, 'x', encoding='utf-8') as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def write_html_file(path, content):
+    """
+    Writes a file atomically, see `atomic_open`.
+
+    :param path: Path of the file to write.
+    :param content: The text to write.
+    """
+    with atomic_open(path) as f:
+        f.write(content)
+
+def generate_html(cv,css_file,output_path, assets=None, minify=False, locale=None, filename=None):
     """
     Generates the complete HTML CV page and writes it to a file.
 
@@ -303,37 +652,134 @@ def generate_html(cv,css_file,output_path):
     gathering personal information, skills, work experience, education, and projects
     from the provided CV object. It initializes the HTML structure, adds various
     sections to the page, and then writes the final HTML content to a specified file.
+    Sections are written as soon as they are rendered, so the whole page is never held in memory.
 
     :param cv: Object containing the CV data, including personal info, skills, work experience, education, and projects.
     :param css_file: Path to the CSS file to be linked in the HTML for styling.
     :param output_path: Directory path where the generated HTML file will be saved.
+    :param assets: Optional `cvAssets.AssetCache`, to embed the stylesheet and the photo in the page.
+    :param minify: If True, the page is rendered with minified templates.
+    :param locale: Code of the locale of the page, defaults to `G_LOCALES_CONFIG['default']`. The file name does not depend on it.
+    :param filename: Name of the HTML file, defaults to the name given by `html_output_filename`.
+    :return: The path of the written HTML file.
     """
-    personal_info = cv.get_personal_info()
-    skills = cv.get_skills()
-    work_experience = cv.get_work_experience()
-    education = cv.get_education()
-    projects = cv.get_personal_projects()
-    hobbies = cv.get_hobbies()
-    social_link = cv.get_social_links()
+    html_output_path = os.path.join(output_path, filename or html_output_filename(cv.get_personal_info()))
 
-    
-    #create the html page 
-    init_html_structure(css_file)
-    adding_profile_content(personal_info)
-    adding_sidebar_content(skills, hobbies)
-    adding_work_experience(work_experience)
-    adding_education_content(education)
-    adding_projects_content(projects)
-    #not implemented yet 
-    adding_social_links(social_link)
-    ending_html_page()
+    # Writing HTML content to a file
+    with atomic_open(html_output_path) as f:
+        write_html(cv, css_file, f, assets=assets, base_dir=output_path, minify=minify, locale=locale)
 
-    # Creating file name from user name
-    base_filename = "CV_" + personal_info['name'].replace(" ", "_")
-    html_file = f"{base_filename}.html"
+    return html_output_path
 
-    html_output_path = os.path.join(output_path, html_file)
+def generate_html_styles(cv, css_files, output_path, assets=None, minify=False, locale=None):
+    """
+    Generates the HTML CV page once per stylesheet, rendering the body only once.
 
-    # Writing HTML content to a file
-    with open(html_output_path, 'w', encoding='utf-8') as f:
-        f.write(G_HTML_CONTENT)
+    Only the head, which links or embeds the stylesheet, differs between the pages. The body
+    sections are rendered once for all the styles sharing the same section templates, which
+    is every style unless some have their own templates in `sections/<style name>/`. Each page
+    is named after its style, see `html_output_filename`.
+
+    :param cv: Object containing the CV data, including personal info, skills, work experience, education, and projects.
+    :param css_files: Paths to the CSS files, one page is written per file.
+    :param output_path: Directory path where the generated HTML files will be saved.
+    :param assets: Optional `cvAssets.AssetCache`, to embed the stylesheets and the photo in the pages.
+    :param minify: If True, the pages are rendered with minified templates.
+    :param locale: Code of the locale of the pages, defaults to `G_LOCALES_CONFIG['default']`.
+    :return: The paths of the written HTML files, in the order of `css_files`.
+    :raises ValueError: If two stylesheets have the same style name.
+    """
+    names = [style_name(css_file) for css_file in css_files]
+    duplicates = sorted(set(name for name in names if names.count(name) > 1))
+    if duplicates:
+        raise ValueError(f"Several stylesheets are named {', '.join(duplicates)}, their pages would overwrite each other")
+
+    personal_info = cv.get_personal_info()
+    inputs = section_inputs(cv, locale)
+    # Body fragments (sections and closing tags) of each set of section templates
+    bodies = {}
+    paths = []
+    for css_file, name in zip(css_files, names):
+        templates = get_template_set(css_file, minify, locale)
+        page = HtmlPage(templates)
+        body = bodies.get(templates)
+        if body is None:
+            body = [_run_step(page, G_SECTION_BUILDERS[section], *args) for section, args in inputs.items()]
+            body.append(_run_step(page, ending_html_page))
+            if assets is not None:
+                with trace('inline_assets'):
+                    body = [assets.inline(fragment, output_path) for fragment in body]
+            bodies[templates] = body
+
+        css_content = assets.stylesheet(css_file) if assets is not None else None
+        head = _run_step(page, init_html_structure, css_file, css_content)
+
+        html_output_path = os.path.join(output_path, html_output_filename(personal_info, name))
+        with atomic_open(html_output_path) as f, trace('write') as span:
+            f.write(head)
+            f.writelines(body)
+            if span is not None:
+                span.bytes = f.tell()
+        paths.append(html_output_path)
+    return paths
+
+def generate_html_locales(cv, css_file, output_path, locales, assets=None, minify=False):
+    """
+    Generates the HTML CV page once per locale, in a single pass over the CV.
+
+    The translation tables are compiled into the templates of each locale, so the headings
+    of a locale cost nothing to render. The entries rendered without translated texts, such as
+    an education entry or a job without projects, are kept in a dictionary shared by the pages,
+    keyed on the entry and the compiled blocks it is rendered with: unless the entry itself has
+    translations, it is rendered for the first locale and reused by the others. The sections
+    identical in two locales, such as the profile, are reused as a whole. Each page is named
+    after its locale, see `html_output_filename`.
+
+    :param cv: Object containing the CV data, including personal info, skills, work experience, education, and projects.
+    :param css_file: Path to the CSS file to be linked in the HTML for styling.
+    :param output_path: Directory path where the generated HTML files will be saved.
+    :param locales: Codes of the locales, one page is written per locale.
+    :param assets: Optional `cvAssets.AssetCache`, to embed the stylesheet and the photo in the pages.
+    :param minify: If True, the pages are rendered with minified templates.
+    :return: The paths of the written HTML files, in the order of `locales`.
+    :raises ValueError: If a locale is given twice.
+    """
+    duplicates = sorted(set(locale for locale in locales if locales.count(locale) > 1))
+    if duplicates:
+        raise ValueError(f"Locales given several times: {', '.join(duplicates)}")
+
+    personal_info = cv.get_personal_info()
+    css_content = assets.stylesheet(css_file) if assets is not None else None
+    # Entry fragments shared by the pages of every locale
+    shared = {}
+    # Section name -> (section templates, section inputs, fragment) of the previous locale
+    previous = {}
+    paths = []
+    for locale in locales:
+        page = HtmlPage(get_template_set(css_file, minify, locale), shared)
+        html = [_run_step(page, init_html_structure, css_file, css_content)]
+        for section, args in section_inputs(cv, locale).items():
+            # A section rendered by the same blocks from the same inputs is identical
+            try:
+                templates = page.templates[section]
+            except TemplateError:
+                templates = None
+            last = previous.get(section)
+            if last is not None and last[0] == templates and all(a is b for a, b in zip(last[1], args)):
+                html.append(last[2])
+                continue
+            fragment = _run_step(page, G_SECTION_BUILDERS[section], *args)
+            previous[section] = (templates, args, fragment)
+            html.append(fragment)
+        html.append(_run_step(page, ending_html_page))
+        if assets is not None:
+            with trace('inline_assets'):
+                html = [assets.inline(fragment, output_path) for fragment in html]
+
+        html_output_path = os.path.join(output_path, html_output_filename(personal_info, locale=locale))
+        with atomic_open(html_output_path) as f, trace('write') as span:
+            f.writelines(html)
+            if span is not None:
+                span.bytes = f.tell()
+        paths.append(html_output_path)
+    return paths
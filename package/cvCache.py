@@ -0,0 +1,388 @@
+"""
+CV Render Cache Script
+=======================
+
+Author: Hugo REIF FAUDEMER
+Creation Date: 07/05/2023
+Purpose: This script defines an on-disk, content-addressed cache in front of `generate_html`, so that regenerating a CV whose data, stylesheet and builder did not change reuses the previous output instead of rebuilding it.
+
+Description
+-----------
+
+The cache key is a SHA-256 hash of the normalized CV data (`CVData.data` serialized as JSON with sorted keys), the path and content of the CSS file, the content of the section templates it is rendered with (see `cvTemplates.get_template_set`), the locale and its translation table, and `G_BUILDER_VERSION`. Each rendered page is stored once under its key. On a hit, the stored page is hard-linked to the output path (or copied when the cache and the output are on different file systems), and nothing is rendered.
+
+Entries are evicted when they are older than `max_age` or, oldest first, when the cache grows beyond `max_size`. Hits refresh the entry modification time, so the size-based eviction drops the least recently used entries. The parse cache (`parsed/`, see `cvDataClass.load_document`) and the asset cache (`assets/`, see `cvAssets.AssetCache`) keep their entries in the same directory, and are evicted together with the rendered pages under the same bounds.
+
+Modules and Functions
+---------------------
+
+- `CacheStats`: Hit, miss, store and eviction counters.
+- `RenderCache`: The render cache.
+- `RenderCache.key(cv, css_file)`: Computes the cache key of a CV rendered with a stylesheet.
+- `RenderCache.generate_html(cv, css_file, output_path)`: Drop-in replacement of `generate_html` going through the cache.
+- `RenderCache.generate_html_styles(cv, css_files, output_path)`: Same for `generate_html_styles`, rendering only the styles missing from the cache.
+- `RenderCache.generate_html_locales(cv, css_file, output_path, locales)`: Same for `generate_html_locales`, rendering only the locales missing from the cache.
+- `RenderCache.evict()`: Removes expired entries and trims the cache to its maximum size.
+
+Global Variables
+----------------
+
+- `G_CACHE_CONFIG`: A dictionary holding the default cache settings.
+
+Usage
+-----
+
+Example:
+    cache = RenderCache('../.cvcache')
+    html_path = cache.generate_html(cv, '../styles/style01.css', '../output')
+    cache.evict()
+    print(cache.stats)
+
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from dataclasses import dataclass
+
+from cvBuilder import generate_html, generate_html_styles, generate_html_locales, html_output_filename, style_name, G_BUILDER_VERSION
+from cvLocales import load_locale
+from cvTemplates import get_template_set, source_path
+from cvProfile import trace
+
+
+# =================== VARIABLES ===================
+"""
+G_CACHE_CONFIG: dict
+
+A dictionary holding the default cache settings.
+
+Attributes:
+    cache_dir (str): Directory where the rendered pages are stored, `.cvcache/` at the root of the project, or `smartcvbuilder` in the user cache directory (`$XDG_CACHE_HOME`, `~/.cache` by default) when the package is installed.
+    max_size (int): Maximum total size of the cache, in bytes.
+    max_age (float): Maximum age of an entry since its last use, in seconds.
+"""
+G_CACHE_CONFIG = {
+    'cache_dir': (source_path('.cvcache')
+                  or os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+                                  'smartcvbuilder')),
+    'max_size': 512 * 1024 * 1024,
+    'max_age': 30 * 24 * 3600,
+}
+
+# Name of the sharded sub-directories holding the entries, see `RenderCache.entry_path`
+_SHARD = re.compile(r'[0-9a-f]{2}')
+# Entries of the caches sharing the cache directory, as (sub-directory, sharded, file extension): the rendered
+# pages, the parsed documents of `cvDataClass.load_document` and the processed photos of `cvAssets.AssetCache`
+_CACHE_LAYOUT = (
+    ('', True, '.html'),
+    ('parsed', False, '.pickle'),
+    ('assets', True, '.uri'),
+)
+
+
+# =================== CLASSES ===================
+@dataclass
+class CacheStats:
+    """
+    Counters of a `RenderCache`, or of another cache such as `cvAssets.AssetCache`.
+
+    Attributes:
+        label (str): Name of the cache in the printed summary.
+        hits (int): Renders served from the cache.
+        misses (int): Renders that had to be built.
+        stores (int): Pages added to the cache.
+        evictions (int): Entries removed by `evict`.
+    """
+    label: str = 'cache'
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    def merge(self, other):
+        """Adds the counters of another `CacheStats`, e.g. from a worker process."""
+        self.hits += other.hits
+        self.misses += other.misses
+        self.stores += other.stores
+        self.evictions += other.evictions
+
+    def __str__(self):
+        total = self.hits + self.misses
+        ratio = self.hits / total * 100 if total else 0.0
+        return (f"{self.label}: {self.hits} hit(s), {self.misses} miss(es) ({ratio:.1f}% hit rate), "
+                f"{self.stores} store(s), {self.evictions} eviction(s)")
+
+
+class RenderCache:
+    """
+    On-disk, content-addressed cache of rendered CV pages.
+
+    Attributes:
+        cache_dir (str): Directory where the rendered pages are stored.
+        max_size (int): Maximum total size of the cache, in bytes.
+        max_age (float): Maximum age of an entry since its last use, in seconds.
+        stats (CacheStats): Counters of this cache instance.
+    """
+
+    def __init__(self, cache_dir=None, max_size=None, max_age=None):
+        self.cache_dir = cache_dir or G_CACHE_CONFIG['cache_dir']
+        self.max_size = G_CACHE_CONFIG['max_size'] if max_size is None else max_size
+        self.max_age = G_CACHE_CONFIG['max_age'] if max_age is None else max_age
+        self.stats = CacheStats()
+        # Digest of each stylesheet and template file, keyed on (path, mtime, size) so that a batch reads each file once
+        self._file_digests = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _file_digest(self, path):
+        """Returns the digest of a file content, or of nothing if the file does not exist."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return hashlib.sha256(b'').hexdigest()
+        signature = (path, stat.st_mtime_ns, stat.st_size)
+        digest = self._file_digests.get(signature)
+        if digest is None:
+            with open(path, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            self._file_digests[signature] = digest
+        return digest
+
+    def _templates_digest(self, css_file):
+        """Returns the digest of the section templates used with a stylesheet, overrides of its style included."""
+        files = get_template_set(css_file).files()
+        return hashlib.sha256(''.join(f"{section}\0{path}\0{self._file_digest(path)}\0"
+                                      for section, path in sorted(files.items())).encode('utf-8')).hexdigest()
+
+    def key(self, cv, css_file, assets=None, base_dir='.', minify=False, locale=None):
+        """
+        Computes the cache key of a CV rendered with a stylesheet.
+
+        :param cv: The `CVData` to render.
+        :param css_file: Path to the CSS file used for styling.
+        :param assets: The `cvAssets.AssetCache` embedding the assets in the page, None if they are linked.
+        :param base_dir: Directory of the page, from which the photo path is resolved.
+        :param minify: True if the page is rendered with minified templates.
+        :param locale: Code of the locale of the page, defaults to the default locale.
+        :return: A hexadecimal SHA-256 digest.
+        :rtype: str
+        """
+        normalized = json.dumps(cv.data, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+        inlined = assets.fingerprint(cv, base_dir) if assets is not None else ''
+        # The texts of the locale are part of the key, so that editing a translation table renders the pages again
+        texts = json.dumps(dict(load_locale(locale).texts), sort_keys=True, ensure_ascii=False)
+        h = hashlib.sha256()
+        for part in (G_BUILDER_VERSION, css_file, self._file_digest(css_file), self._templates_digest(css_file), inlined,
+                     'minify' if minify else '', texts, normalized):
+            h.update(part.encode('utf-8'))
+            h.update(b'\0')
+        return h.hexdigest()
+
+    def entry_path(self, key):
+        """
+        Returns the path of a cache entry, sharded on the first two characters of the key.
+
+        :param key: A cache key.
+        :return: The path of the stored page.
+        """
+        return os.path.join(self.cache_dir, key[:2], f"{key}.html")
+
+    @staticmethod
+    def _link(source, destination):
+        """Hard-links a file to a destination, replacing it atomically, or copies it across file systems."""
+        tmp_path = f"{destination}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.link(source, tmp_path)
+        except OSError:
+            shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, destination)
+
+    def fetch(self, key, destination):
+        """
+        Materializes a cached page at the destination path.
+
+        :param key: The cache key.
+        :param destination: Path where the page is expected.
+        :return: True on a hit, False if the key is not cached.
+        """
+        entry = self.entry_path(key)
+        try:
+            # The output may still be the link made by a previous run
+            if not (os.path.exists(destination) and os.path.samefile(entry, destination)):
+                self._link(entry, destination)
+            # Refreshing the modification time keeps recently used entries away from eviction
+            os.utime(entry)
+        except FileNotFoundError:
+            # Not cached, or evicted concurrently
+            return False
+        return True
+
+    def store(self, key, source):
+        """
+        Adds a rendered page to the cache.
+
+        :param key: The cache key.
+        :param source: Path of the rendered page.
+        """
+        entry = self.entry_path(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        self._link(source, entry)
+        self.stats.stores += 1
+
+    def generate_html(self, cv, css_file, output_path, assets=None, minify=False, locale=None, filename=None):
+        """
+        Generates the HTML CV page like `cvBuilder.generate_html`, reusing the cached page when the key matches.
+
+        :param cv: The `CVData` to render.
+        :param css_file: Path to the CSS file to be linked in the HTML for styling.
+        :param output_path: Directory path where the generated HTML file will be saved.
+        :param assets: Optional `cvAssets.AssetCache`, to embed the stylesheet and the photo in the page.
+        :param minify: If True, the page is rendered with minified templates.
+        :param locale: Code of the locale of the page, defaults to the default locale.
+        :param filename: Name of the HTML file, defaults to the name given by `html_output_filename`.
+        :return: The path of the HTML file.
+        """
+        with trace('RenderCache.key'):
+            key = self.key(cv, css_file, assets, output_path, minify, locale)
+        destination = os.path.join(output_path, filename or html_output_filename(cv.get_personal_info()))
+        with trace('RenderCache.fetch'):
+            hit = self.fetch(key, destination)
+        if hit:
+            self.stats.hits += 1
+            return destination
+
+        self.stats.misses += 1
+        html_path = generate_html(cv, css_file, output_path, assets, minify, locale, filename)
+        with trace('RenderCache.store'):
+            self.store(key, html_path)
+        return html_path
+
+    def generate_html_styles(self, cv, css_files, output_path, assets=None, minify=False, locale=None):
+        """
+        Generates one page per stylesheet like `cvBuilder.generate_html_styles`, reusing the cached pages.
+
+        Only the styles missing from the cache are rendered, still with a single body render.
+
+        :param cv: The `CVData` to render.
+        :param css_files: Paths to the CSS files, one page is written per file.
+        :param output_path: Directory path where the generated HTML files will be saved.
+        :param assets: Optional `cvAssets.AssetCache`, to embed the stylesheets and the photo in the pages.
+        :param minify: If True, the pages are rendered with minified templates.
+        :param locale: Code of the locale of the pages, defaults to the default locale.
+        :return: The paths of the HTML files, in the order of `css_files`.
+        """
+        personal_info = cv.get_personal_info()
+        paths = []
+        missing = []
+        for css_file in css_files:
+            with trace('RenderCache.key'):
+                key = self.key(cv, css_file, assets, output_path, minify, locale)
+            destination = os.path.join(output_path, html_output_filename(personal_info, style_name(css_file)))
+            with trace('RenderCache.fetch'):
+                hit = self.fetch(key, destination)
+            if hit:
+                self.stats.hits += 1
+            else:
+                self.stats.misses += 1
+                missing.append((css_file, key))
+            paths.append(destination)
+
+        if missing:
+            rendered = generate_html_styles(cv, [css_file for css_file, _ in missing], output_path, assets, minify, locale)
+            with trace('RenderCache.store'):
+                for (_, key), html_path in zip(missing, rendered):
+                    self.store(key, html_path)
+        return paths
+
+    def generate_html_locales(self, cv, css_file, output_path, locales, assets=None, minify=False):
+        """
+        Generates one page per locale like `cvBuilder.generate_html_locales`, reusing the cached pages.
+
+        Only the locales missing from the cache are rendered, still in a single pass.
+
+        :param cv: The `CVData` to render.
+        :param css_file: Path to the CSS file used for styling.
+        :param output_path: Directory path where the generated HTML files will be saved.
+        :param locales: Codes of the locales, one page is written per locale.
+        :param assets: Optional `cvAssets.AssetCache`, to embed the stylesheet and the photo in the pages.
+        :param minify: If True, the pages are rendered with minified templates.
+        :return: The paths of the HTML files, in the order of `locales`.
+        """
+        personal_info = cv.get_personal_info()
+        paths = []
+        missing = []
+        for locale in locales:
+            with trace('RenderCache.key'):
+                key = self.key(cv, css_file, assets, output_path, minify, locale)
+            destination = os.path.join(output_path, html_output_filename(personal_info, locale=locale))
+            with trace('RenderCache.fetch'):
+                hit = self.fetch(key, destination)
+            if hit:
+                self.stats.hits += 1
+            else:
+                self.stats.misses += 1
+                missing.append((locale, key))
+            paths.append(destination)
+
+        if missing:
+            rendered = generate_html_locales(cv, css_file, output_path, [locale for locale, _ in missing], assets, minify)
+            with trace('RenderCache.store'):
+                for (_, key), html_path in zip(missing, rendered):
+                    self.store(key, html_path)
+        return paths
+
+    def _entry_files(self):
+        """Yields the (modification time, size, path) of each entry of the caches sharing the directory, see `_CACHE_LAYOUT`."""
+        for sub_dir, sharded, extension in _CACHE_LAYOUT:
+            root = os.path.join(self.cache_dir, sub_dir)
+            directories = [root]
+            if sharded:
+                try:
+                    directories = [os.path.join(root, name) for name in os.listdir(root) if _SHARD.fullmatch(name)]
+                except (FileNotFoundError, NotADirectoryError):
+                    continue
+            for directory in directories:
+                try:
+                    names = os.listdir(directory)
+                except (FileNotFoundError, NotADirectoryError):
+                    continue
+                for name in names:
+                    # Temporary files are being written, and other files are not cache entries
+                    if not name.endswith(extension):
+                        continue
+                    path = os.path.join(directory, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield stat.st_mtime, stat.st_size, path
+
+    def evict(self):
+        """
+        Removes the entries unused for more than `max_age`, then the least recently used ones
+        until the cache fits in `max_size`.
+
+        The parsed documents of `parsed/` and the processed photos of `assets/`, stored in the same
+        directory by the parse and asset caches, are entries as well, and count towards `max_size`.
+
+        :return: The number of removed entries.
+        """
+        now = time.time()
+        entries = list(self._entry_files())
+        entries.sort()
+        total_size = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            if now - mtime <= self.max_age and total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+            removed += 1
+        self.stats.evictions += removed
+        return removed
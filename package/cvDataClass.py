@@ -4,28 +4,41 @@ CV Data Management Script
 
 Author: Hugo REIF FAUDEMER
 Creation Date: 07/05/2023
-Purpose: This script defines a class to handle operations related to Curriculum Vitae (CV) data stored in a YAML file. The class provides methods to retrieve various sections of the CV, such as personal information, work experience, education, personal projects, skills, and social links.
+Purpose: This script defines a class to handle operations related to Curriculum Vitae (CV) data stored in a YAML (or JSON) file. The class provides methods to retrieve various sections of the CV, such as personal information, work experience, education, personal projects, skills, and social links.
 
 Description
 -----------
 
 The `CVData` class is designed to manage and extract data from a CV stored in a YAML file. It allows easy access to different sections of the CV, making it convenient to use this data for generating CVs in different formats or for further processing.
 
+Loading is tuned for large files and large batches:
+    - YAML is parsed with the libyaml-based `yaml.CSafeLoader` when PyYAML was built with it, and falls back to the pure-Python `yaml.SafeLoader` otherwise.
+    - Files with a `.json` extension are parsed with the standard `json` module, which is much faster than any YAML loader.
+    - An optional parse cache stores the parsed document as a pickle, keyed on the file path, modification time and size. Loading an unchanged file again skips the parsing entirely.
+
 Modules and Functions
 ---------------------
 
-- `__init__(self, file_path: str)`: Initializes the `CVData` object by loading data from the specified YAML file.
-- `get_personal_info(self) -> Dict[str, Any]`: Retrieves personal information from the CV.
-- `get_work_experience(self) -> List[Dict[str, Any]]`: Retrieves work experience entries from the CV.
-- `get_education(self) -> List[Dict[str, Any]]`: Retrieves education history from the CV.
-- `get_personal_projects(self) -> List[Dict[str, Any]]`: Retrieves personal projects from the CV.
-- `get_skills(self) -> List[str]`: Retrieves a list of skills from the CV.
-- `get_social_links(self) -> List[str]`: Retrieves social media and other relevant links from the CV.
+- `parse_yaml(stream)`: Parses a YAML document with the fastest available safe loader.
+- `parse_document(content, file_path)`: Parses the content of a YAML or JSON file already read in memory.
+- `load_document(file_path, parse_cache_dir)`: Loads a YAML or JSON file, through the parse cache if a directory is given.
+- `CVDataError`: Raised when the CV data does not have the structure of `templates/template.yml`.
+- `PersonalInfo`, `Job`, `JobProject`, `Education`, `Project`, `SocialLink`: Typed records of the CV sections.
+- `__init__(self, file_path: str, parse_cache_dir: str)`: Initializes the `CVData` object by loading data from the specified YAML or JSON file.
+- `from_data(cls, data: Dict[str, Any], source: str)`: Builds a `CVData` object from already parsed CV data, such as a request body.
+- `get_personal_info(self) -> Mapping[str, Any]`: Retrieves personal information from the CV.
+- `get_work_experience(self) -> Sequence[Mapping[str, Any]]`: Retrieves work experience entries from the CV.
+- `get_education(self) -> Sequence[Mapping[str, Any]]`: Retrieves education history from the CV.
+- `get_personal_projects(self) -> Sequence[Mapping[str, Any]]`: Retrieves personal projects from the CV.
+- `get_skills(self) -> Sequence[str]`: Retrieves a list of skills from the CV.
+- `get_social_links(self) -> Sequence[str]`: Retrieves social media and other relevant links from the CV.
+
+The document is validated and normalized once at load time against the schema of `cvSchema.py`: each section is turned into typed records (`CVData.work_experience`, `CVData.skills`...) and the getters return cached read-only views. Every error of the document, such as a missing name or a section that is not a list, is reported at once in a `CVDataError`, with the path of each faulty entry.
 
 Global Variables
 ----------------
 
-None.
+- `G_YAML_LOADER`: The YAML loader class used to parse CV files.
 
 Usage
 -----
@@ -42,17 +55,211 @@ Example:
     print(cv.get_social_links())
 
 """
-import yaml
-from typing import List, Dict, Any
+import hashlib
+import json
+import os
+import pickle
+import uuid
+from itertools import chain
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from cvProfile import trace
+from cvSchema import validate_cv
+
+
+# =================== VARIABLES ===================
+"""
+G_YAML_LOADER: type
+
+The YAML loader class used to parse CV files: the libyaml-based `yaml.CSafeLoader` when
+available, the pure-Python `yaml.SafeLoader` otherwise. Both only build plain Python objects.
+PyYAML is imported by the first YAML parse, so the loader is None until then: JSON inputs,
+cached documents and `--help` never import it.
+"""
+G_YAML_LOADER = None
+
+
+# =================== FUNCTIONS ===================
+
+def parse_yaml(stream):
+    """
+    Parses a YAML document with the fastest available safe loader.
+
+    :param stream: A YAML string or an open file.
+    :return: The parsed document.
+    """
+    global G_YAML_LOADER
+    import yaml
+    if G_YAML_LOADER is None:
+        G_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    return yaml.load(stream, Loader=G_YAML_LOADER)
+
+
+def parse_document(content, file_path='<document>'):
+    """
+    Parses the content of a JSON or YAML file, depending on the extension of its path.
+
+    :param content: The content of the file, as bytes or string.
+    :param file_path: The path of the file, '.json' files are parsed as JSON and the others as YAML.
+    :return: The parsed document.
+    :raises json.JSONDecodeError: If a JSON document is malformed, the message starts with the path of the file.
+    """
+    if file_path.endswith('.json'):
+        return _parse_json(content, file_path)
+    return parse_yaml(content)
+
+
+def _parse_json(content, file_path):
+    """Parses a JSON document, naming the file in the error message as the YAML parser does."""
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError as error:
+        raise json.JSONDecodeError(f"{file_path}: {error.msg}", error.doc, error.pos) from None
+
+
+def _parse_file(file_path):
+    """Parses a JSON or YAML file, depending on its extension."""
+    if file_path.endswith('.json'):
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return _parse_json(file.read(), file_path)
+    with open(file_path, 'rb') as file:
+        return parse_yaml(file)
+
+
+def _freeze(value):
+    """Returns a read-only copy of a parsed value: mappings become `MappingProxyType` and lists tuples, at every level."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def load_document(file_path: str, parse_cache_dir: Optional[str] = None) -> Any:
+    """
+    Loads a YAML or JSON file, through the parse cache if a directory is given.
+
+    The cache entry of a file is named after the hash of its absolute path and records the
+    modification time and size of the file. It is used only if both still match, and is
+    rewritten otherwise. The entries are evicted with the render cache when the directory is
+    the `parsed` sub-directory of the cache, see `cvCache.RenderCache.evict`.
+
+    :param file_path: Path to the YAML or JSON file.
+    :param parse_cache_dir: Directory of the parse cache, None to always parse the file.
+    :return: The parsed document.
+    """
+    if parse_cache_dir is None:
+        return _parse_file(file_path)
+
+    stat = os.stat(file_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    name = hashlib.sha256(os.path.abspath(file_path).encode('utf-8')).hexdigest()
+    entry = os.path.join(parse_cache_dir, f"{name}.pickle")
+    try:
+        with open(entry, 'rb') as f:
+            cached_signature, data = pickle.load(f)
+        if cached_signature == signature:
+            # Refreshing the modification time keeps recently used entries away from eviction, see `cvCache.RenderCache.evict`
+            os.utime(entry)
+            return data
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        pass
+
+    data = _parse_file(file_path)
+    os.makedirs(parse_cache_dir, exist_ok=True)
+    tmp_path = f"{entry}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump((signature, data), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, entry)
+    return data
 
 
 # =================== CLASSES ===================
+class CVDataError(ValueError):
+    """
+    Raised when the CV data does not have the structure of `templates/template.yml`.
+
+    Attributes:
+        errors (Tuple[str, ...]): Every error found in the document, each prefixed by the path of the faulty value.
+    """
+
+    def __init__(self, message, errors=()):
+        super().__init__(message)
+        self.errors = tuple(errors)
+
+    def __reduce__(self):
+        # Keeps the errors when the exception is sent back from a worker process
+        return type(self), (str(self), self.errors)
+
+
+class PersonalInfo(NamedTuple):
+    """Personal information of the CV, missing fields are None."""
+    name: Optional[str]
+    job: Optional[str]
+    email: Optional[str]
+    phone_number: Optional[str]
+    photo_url: Optional[str]
+
+
+class JobProject(NamedTuple):
+    """A project carried out as part of a work experience entry, missing fields are None."""
+    project_name: Optional[str]
+    client: Optional[str]
+    project_description: Optional[str]
+
+
+class Job(NamedTuple):
+    """A work experience entry, missing fields are None."""
+    job_title: Optional[str]
+    company_name: Optional[str]
+    employment_dates_start: Optional[str]
+    employment_dates_end: Optional[str]
+    job_description: Optional[str]
+    projects: Tuple[JobProject, ...]
+
+
+class Education(NamedTuple):
+    """An education entry, missing fields are None."""
+    degree: Optional[str]
+    university_name: Optional[str]
+    attendance_dates_start: Optional[str]
+    attendance_dates_end: Optional[str]
+    study_description: Optional[str]
+
+
+class Project(NamedTuple):
+    """A personal project entry, missing fields are None."""
+    project_title: Optional[str]
+    project_description: Optional[str]
+    project_link: Optional[str]
+
+
+class SocialLink(NamedTuple):
+    """A social media or other relevant link, `page_break` is True if the link starts a page (see `cvLayout.py`)."""
+    url: str
+    page_break: bool = False
+
+
 class CVData:
     """
     A class to handle operations related to Curriculum Vitae (CV) data stored in a YAML file.
 
+    The document is validated and normalized once, when it is loaded. Each section is then
+    available both as compact typed records and through the `get_*` methods, which return
+    cached read-only views instead of walking the document on every call. The views are
+    read-only at every level: nested lists, such as the projects of a job, are tuples.
+
     Attributes:
         data (Dict[str, Any]): The CV data loaded from the YAML file.
+        personal_info (PersonalInfo): The personal information record.
+        work_experience (Tuple[Job, ...]): The work experience records.
+        education (Tuple[Education, ...]): The education records.
+        personal_projects (Tuple[Project, ...]): The personal project records.
+        skills (Tuple[str, ...]): The skill names.
+        hobbies (Tuple[str, ...]): The hobby names.
+        social_links (Tuple[SocialLink, ...]): The social link records.
+        translated_locales (FrozenSet[str]): The codes of the locales in which some entries have `translations` (see `cvLocales.py`).
 
     Methods:
         get_personal_info: Retrieves personal information from the CV.
@@ -63,76 +270,146 @@ class CVData:
         get_social_links: Retrieves social links from the CV.
     """
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, parse_cache_dir: Optional[str] = None):
         """
-        Initializes the CVData object by loading data from the specified YAML file.
+        Initializes the CVData object by loading data from the specified YAML or JSON file.
 
-        :param file_path: The path to the YAML file containing the CV data.
+        :param file_path: The path to the YAML file containing the CV data, or to a JSON file with the same structure.
         :type file_path: str
+        :param parse_cache_dir: Optional directory of the parse cache, see `load_document`.
+        :type parse_cache_dir: str
+        :raises CVDataError: If the data does not have the structure of a CV.
+        """
+        with trace('load_document'):
+            data = load_document(file_path, parse_cache_dir)
+        with trace('CVData._load'):
+            self._load(data, file_path)
+
+    @classmethod
+    def from_data(cls, data: Dict[str, Any], source: str = '<data>') -> 'CVData':
+        """
+        Builds a CVData object from already parsed CV data, without reading any file.
+
+        :param data: The CV data, with the same structure as the YAML file.
+        :type data: Dict[str, Any]
+        :param source: Name of the data, such as the path of the file it was read from, used in error messages.
+        :type source: str
+        :return: A CVData object wrapping the data.
+        :rtype: CVData
+        :raises CVDataError: If the data does not have the structure of a CV.
+        """
+        cv = cls.__new__(cls)
+        with trace('CVData._load'):
+            cv._load(data, source)
+        return cv
+
+    def _load(self, data: Any, source: str):
+        """
+        Validates the structure of the document and builds the records and views of each section.
+
+        :param data: The parsed document.
+        :param source: Name of the document, used in error messages.
+        :raises CVDataError: If the data does not have the structure of a CV.
         """
-        with open(file_path, 'r') as file:
-            self.data = yaml.safe_load(file)
+        data, errors = validate_cv(data)
+        if errors:
+            raise CVDataError(f"{source}: {len(errors)} error(s): {'; '.join(errors)}", errors)
+        cv = data['cv']
+        personal_info = cv['personal_info']
+        jobs = cv.get('work_experience', ())
+        education = cv.get('education', ())
+        projects = cv.get('personal_projects', ())
+        links = cv.get('social_links', ())
+
+        self.data = data
 
-    def get_personal_info(self) -> Dict[str, Any]:
+        # Typed records
+        self.personal_info = PersonalInfo(*(personal_info.get(field) for field in PersonalInfo._fields))
+        self.work_experience = tuple(
+            Job(*(job.get(field) for field in Job._fields[:-1]),
+                tuple(JobProject(*(project.get(field) for field in JobProject._fields)) for project in job.get('projects', ())))
+            for job in jobs
+        )
+        self.education = tuple(Education(*(entry.get(field) for field in Education._fields)) for entry in education)
+        self.personal_projects = tuple(Project(*(entry.get(field) for field in Project._fields)) for entry in projects)
+        self.skills = tuple(entry['skill'] for entry in cv.get('skills', ()))
+        self.hobbies = tuple(entry['hobbie'] for entry in cv.get('hobbies', ()))
+        self.social_links = tuple(SocialLink(link['url'], bool(link.get('page_break'))) for link in links)
+
+        # Read-only views returned by the getters
+        self._personal_info_view = _freeze(personal_info)
+        self._work_experience_view = tuple(_freeze(job) for job in jobs)
+        self._education_view = tuple(_freeze(entry) for entry in education)
+        self._personal_projects_view = tuple(_freeze(entry) for entry in projects)
+        self._social_links_view = tuple(link.url for link in self.social_links)
+
+        # Locales with translations, the entries are only localized for these ones
+        self.translated_locales = frozenset(
+            code
+            for entry in chain((personal_info,), jobs, education, projects,
+                               (project for job in jobs for project in job.get('projects', ())))
+            for code in entry.get('translations', ())
+        )
+
+    def get_personal_info(self) -> Mapping[str, Any]:
         """
         Retrieves personal information from the CV.
 
-        :return: A dictionary containing personal information.
-        :rtype: Dict[str, Any]
+        :return: A read-only dictionary containing personal information.
+        :rtype: Mapping[str, Any]
         """
-        return self.data.get('cv', {}).get('personal_info', {})
+        return self._personal_info_view
 
-    def get_work_experience(self) -> List[Dict[str, Any]]:
+    def get_work_experience(self) -> Sequence[Mapping[str, Any]]:
         """
         Retrieves a list of work experience entries from the CV.
 
-        :return: A list of dictionaries, each representing a work experience entry.
-        :rtype: List[Dict[str, Any]]
+        :return: A read-only sequence of dictionaries, each representing a work experience entry.
+        :rtype: Sequence[Mapping[str, Any]]
         """
-        return self.data.get('cv', {}).get('work_experience', [])
+        return self._work_experience_view
 
-    def get_education(self) -> List[Dict[str, Any]]:
+    def get_education(self) -> Sequence[Mapping[str, Any]]:
         """
         Retrieves the education history from the CV.
 
-        :return: A list of dictionaries, each representing an educational entry.
-        :rtype: List[Dict[str, Any]]
+        :return: A read-only sequence of dictionaries, each representing an educational entry.
+        :rtype: Sequence[Mapping[str, Any]]
         """
-        return self.data.get('cv', {}).get('education', [])
+        return self._education_view
 
-    def get_personal_projects(self) -> List[Dict[str, Any]]:
+    def get_personal_projects(self) -> Sequence[Mapping[str, Any]]:
         """
         Retrieves personal projects listed in the CV.
 
-        :return: A list of dictionaries, each representing a personal project.
-        :rtype: List[Dict[str, Any]]
+        :return: A read-only sequence of dictionaries, each representing a personal project.
+        :rtype: Sequence[Mapping[str, Any]]
         """
-        return self.data.get('cv', {}).get('personal_projects', [])
+        return self._personal_projects_view
 
-    def get_skills(self) -> List[str]:
+    def get_skills(self) -> Sequence[str]:
         """
         Retrieves a list of skills from the CV.
 
-        :return: A list of skill names.
-        :rtype: List[str]
+        :return: A read-only sequence of skill names.
+        :rtype: Sequence[str]
         """
-        return [skill['skill'] for skill in self.data.get('cv', {}).get('skills', [])]
+        return self.skills
     
-    def get_hobbies(self) -> List[str]:
+    def get_hobbies(self) -> Sequence[str]:
         """
         Retrieves a list of hobbies from the CV.
 
-        :return: A list of hobbies names.
-        :rtype: List[str]
+        :return: A read-only sequence of hobbies names.
+        :rtype: Sequence[str]
         """
-        return [hobbie['hobbie'] for hobbie in self.data.get('cv', {}).get('hobbies', [])]
+        return self.hobbies
 
-    def get_social_links(self) -> List[str]:
+    def get_social_links(self) -> Sequence[str]:
         """
         Retrieves social media and other relevant links from the CV.
 
-        :return: A list of URLs.
-        :rtype: List[str]
+        :return: A read-only sequence of URLs.
+        :rtype: Sequence[str]
         """
-        return [link['url'] for link in self.data.get('cv', {}).get('social_links', [])]
-
+        return self._social_links_view
@@ -0,0 +1,230 @@
+"""
+CV Icons Script
+================
+
+Author: Hugo REIF FAUDEMER
+Creation Date: 07/05/2023
+Purpose: This script detects the platform of the social links of a CV (LinkedIn, GitHub...) from their URL, and builds the inline SVG sprite holding the icon of every platform.
+
+Description
+-----------
+
+Each platform of `G_SOCIAL_PLATFORMS` is recognized by the host names of its URLs, subdomains included (`gist.github.com` is GitHub), or by the scheme for email addresses (`mailto:`). The other URLs are shown as websites.
+
+Links are often written without their scheme, such as 'github.com/your-name', which a browser would resolve as a path relative to the page. `link_url` gives them the `https:` scheme when they start with a host name, and the `mailto:` scheme when they are an email address. The other URLs are kept as they are.
+
+The icons are not separate files: they are `<symbol>` elements of a single SVG sprite, embedded once in the social links section of the page, and each link draws its icon with `<use href="#icon-<platform>">`. A page thus needs no extra file or network fetch for its icons, which keeps the PDF conversion fast and working offline, and the pages stay valid when moved or inlined (see `cvAssets.py`). The sprite of a page only holds the symbols of the platforms it links to. The symbols, the host index and the sprite of each set of platforms are built on first use and kept for the life of the process, so every CV of a batch worker shares them.
+
+A platform either has a `badge`, drawn as a short text on a rounded square of its `color`, or its own `icon` markup, drawn in the current text color.
+
+Modules and Functions
+---------------------
+
+- `detect_platform(url)`: Returns the platform of a social link.
+- `platform_label(platform)`: Returns the display name of a platform.
+- `link_url(url)`: Returns the target of a social link, with a scheme added to the URLs written without one.
+- `link_text(url)`: Returns the text shown for a social link, the URL without its scheme.
+- `icon_sprite(platforms)`: Returns the SVG sprite of the icons of some platforms, built once per process.
+
+Global Variables
+----------------
+
+- `G_SOCIAL_PLATFORMS`: Maps each platform to its display name, host names and icon.
+
+Usage
+-----
+
+Example:
+    platform = detect_platform('https://www.linkedin.com/in/your-name')   # 'linkedin'
+    html = f"{icon_sprite([platform])}<svg><use href=\"#icon-{platform}\"></use></svg>"
+
+"""
+import re
+import threading
+from urllib.parse import urlsplit
+
+from cvTemplates import escape_attribute, escape_text
+
+
+# =================== VARIABLES ===================
+"""
+G_SOCIAL_PLATFORMS: dict
+
+Maps each platform, whose name is used in the `icon-<platform>` ids of the sprite and in the
+classes of the links, to its settings.
+
+Attributes:
+    label (str): The display name of the platform.
+    hosts (Tuple[str, ...]): The host names of its URLs, their subdomains match as well.
+    schemes (Tuple[str, ...]): The URL schemes of the platform, such as 'mailto' for email addresses.
+    badge (str): Short text drawn on a rounded square of `color`, for the platforms without `icon`.
+    color (str): The color of the badge.
+    icon (str): SVG markup of the icon, on a 24x24 grid, for the platforms without `badge`.
+
+The 'website' platform is used for the URLs of no other platform.
+"""
+G_SOCIAL_PLATFORMS = {
+    'linkedin': {'label': 'LinkedIn', 'hosts': ('linkedin.com', 'lnkd.in'), 'badge': 'in', 'color': '#0a66c2'},
+    'github': {'label': 'GitHub', 'hosts': ('github.com',), 'badge': 'GH', 'color': '#181717'},
+    'gitlab': {'label': 'GitLab', 'hosts': ('gitlab.com',), 'badge': 'GL', 'color': '#fc6d26'},
+    'stackoverflow': {'label': 'Stack Overflow', 'hosts': ('stackoverflow.com', 'stackexchange.com'),
+                      'badge': 'SO', 'color': '#f48024'},
+    'x': {'label': 'X', 'hosts': ('x.com', 'twitter.com'), 'badge': 'X', 'color': '#000000'},
+    'medium': {'label': 'Medium', 'hosts': ('medium.com',), 'badge': 'M', 'color': '#000000'},
+    'youtube': {'label': 'YouTube', 'hosts': ('youtube.com', 'youtu.be'), 'badge': 'YT', 'color': '#ff0000'},
+    'behance': {'label': 'Behance', 'hosts': ('behance.net',), 'badge': 'Be', 'color': '#1769ff'},
+    'dribbble': {'label': 'Dribbble', 'hosts': ('dribbble.com',), 'badge': 'Dr', 'color': '#ea4c89'},
+    'email': {'label': 'Email', 'schemes': ('mailto',),
+              'icon': '<g fill="none" stroke="currentColor" stroke-width="1.6">'
+                      '<rect x="2" y="5" width="20" height="14" rx="2"/><path d="M2 7l10 7 10-7"/></g>'},
+    'website': {'label': 'Website',
+                'icon': '<g fill="none" stroke="currentColor" stroke-width="1.6"><circle cx="12" cy="12" r="10"/>'
+                        '<ellipse cx="12" cy="12" rx="4" ry="10"/><path d="M2 12h20M4 7h16M4 17h16"/></g>'},
+}
+
+_DEFAULT_PLATFORM = 'website'
+
+# A URL starting with a host name, such as 'github.com/your-name' or 'example.com:8080', and an email address
+_HOST_URL = re.compile(r'(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+[a-z]{2,}(?::[0-9]+)?(?:[/?#]|$)', re.IGNORECASE)
+_EMAIL = re.compile(r'[^@\s/:]+@(?:[a-z0-9-]+\.)+[a-z]{2,}', re.IGNORECASE)
+
+# Built on first use by `_build`: the `<symbol>` of each platform, and the platform of each host name and scheme
+_SYMBOLS = None
+_HOSTS = {}
+_SCHEMES = {}
+# Sprite of each tuple of platforms, in the order of `G_SOCIAL_PLATFORMS`. A CV links to a few platforms, so that
+# the pages of a batch share a handful of sprites
+_SPRITES = {}
+_LOCK = threading.Lock()
+
+
+# =================== FUNCTIONS ===================
+
+def _symbol(platform, settings):
+    """Returns the `<symbol>` element of the icon of a platform."""
+    if 'icon' in settings:
+        shape = settings['icon']
+    else:
+        badge = escape_text(settings['badge'])
+        # Longer badges get a smaller font, so that they fit the square
+        font_size = 13 if len(settings['badge']) == 1 else 10
+        shape = (f'<rect width="24" height="24" rx="5" fill="{escape_attribute(settings["color"])}"/>'
+                 f'<text x="12" y="{12 + font_size * 0.36:g}" text-anchor="middle" fill="#fff" '
+                 f'font-family="Arial, Helvetica, sans-serif" font-size="{font_size}" font-weight="bold">{badge}</text>')
+    return f'<symbol id="icon-{escape_attribute(platform)}" viewBox="0 0 24 24">{shape}</symbol>'
+
+
+def _build():
+    """Builds the symbols and the host and scheme indexes from `G_SOCIAL_PLATFORMS`, once per process."""
+    global _SYMBOLS
+    with _LOCK:
+        if _SYMBOLS is not None:
+            return
+        for platform, settings in G_SOCIAL_PLATFORMS.items():
+            for host in settings.get('hosts', ()):
+                _HOSTS[host] = platform
+            for scheme in settings.get('schemes', ()):
+                _SCHEMES[scheme] = platform
+        _SYMBOLS = {platform: _symbol(platform, settings) for platform, settings in G_SOCIAL_PLATFORMS.items()}
+
+
+def icon_sprite(platforms=None):
+    """
+    Returns the SVG sprite of the icons of some platforms.
+
+    The sprite of each set of platforms is built on first use and shared by every page rendered by the process.
+
+    :param platforms: The platforms drawn on the page, keys of `G_SOCIAL_PLATFORMS`, None for every platform.
+    :return: The `<svg>` element holding one `<symbol id="icon-<platform>">` per platform.
+    :rtype: str
+    """
+    if _SYMBOLS is None:
+        _build()
+    if platforms is None:
+        used = tuple(_SYMBOLS)
+    else:
+        platforms = set(platforms)
+        used = tuple(platform for platform in _SYMBOLS if platform in platforms)
+    sprite = _SPRITES.get(used)
+    if sprite is None:
+        # Hidden without `display: none`, which keeps some renderers from drawing the symbols
+        sprite = (f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+                  f'class="icon-sprite" aria-hidden="true" style="position: absolute; width: 0; height: 0; '
+                  f'overflow: hidden">{"".join(_SYMBOLS[platform] for platform in used)}</svg>')
+        with _LOCK:
+            sprite = _SPRITES.setdefault(used, sprite)
+    return sprite
+
+
+def detect_platform(url):
+    """
+    Returns the platform of a social link, from the host name or the scheme of its URL.
+
+    :param url: The URL of the link. URLs without a scheme, such as 'github.com/your-name', are recognized as well.
+    :return: The platform, a key of `G_SOCIAL_PLATFORMS`, 'website' if no platform matches.
+    :rtype: str
+    """
+    if _SYMBOLS is None:
+        _build()
+    try:
+        parts = urlsplit(str(url).strip())
+    except ValueError:
+        return _DEFAULT_PLATFORM
+    scheme = parts.scheme.lower()
+    if scheme in _SCHEMES:
+        return _SCHEMES[scheme]
+    host = parts.hostname if parts.netloc else (parts.path.split('/', 1)[0] if not scheme else '')
+    host = (host or '').lower().rstrip('.')
+    # The host name, then its parent domains, so that subdomains match their platform
+    while host:
+        platform = _HOSTS.get(host)
+        if platform is not None:
+            return platform
+        host = host.partition('.')[2]
+    return _DEFAULT_PLATFORM
+
+
+def platform_label(platform):
+    """
+    Returns the display name of a platform.
+
+    :param platform: A key of `G_SOCIAL_PLATFORMS`.
+    :return: The display name, such as 'LinkedIn'.
+    :rtype: str
+    """
+    return G_SOCIAL_PLATFORMS[platform]['label']
+
+
+def link_url(url):
+    """
+    Returns the target of a social link.
+
+    :param url: The URL of the link.
+    :return: The URL with the 'https:' scheme added if it starts with a host name, such as 'github.com/your-name' or '//github.com/your-name', or with the 'mailto:' scheme if it is an email address. Other URLs, with a scheme or relative, are returned without surrounding whitespace.
+    :rtype: str
+    """
+    url = str(url).strip()
+    if url.startswith('//'):
+        return f"https:{url}"
+    if _HOST_URL.match(url):
+        return f"https://{url}"
+    if _EMAIL.fullmatch(url):
+        return f"mailto:{url}"
+    return url
+
+
+def link_text(url):
+    """
+    Returns the text shown for a social link, readable on a printed page.
+
+    :param url: The URL of the link.
+    :return: The URL without its scheme, leading 'www.' and trailing slash, e.g. 'github.com/your-name', or the address of a 'mailto:' link.
+    :rtype: str
+    """
+    text = str(url).strip()
+    scheme, separator, rest = text.partition(':')
+    if separator and scheme.lower() in ('http', 'https', 'mailto'):
+        text = rest.lstrip('/') if scheme.lower() != 'mailto' else rest
+    if text.lower().startswith('www.'):
+        text = text[4:]
+    return text.rstrip('/') or str(url)
@@ -0,0 +1,546 @@
+"""
+CV Layout Script
+=================
+
+Author: Hugo REIF FAUDEMER
+Creation Date: 07/05/2023
+Purpose: This script estimates how the main column of a CV flows over the pages of the output format (`G_CONFIG_HTML['page_size']`), and inserts page breaks between the entries so that the PDF converter never splits an entry across two pages.
+
+Description
+-----------
+
+The layout is estimated without rendering: the height of each entry of the experience, education, projects and social links sections is computed from the length of its texts and from the metrics of the style (`G_LAYOUT_METRICS`): width of the main column, font size, average glyph width, line heights and the fixed heights of the headings, project boxes, link icons and margins. Paragraphs are word-wrapped on an estimated number of characters per line, wide (e.g. CJK) characters counting twice.
+
+The entries are then laid out greedily in page order: an entry that does not fit on the rest of a page starts the next one. The first entry of a section carries its section heading, so that a heading is never left alone at the bottom of a page, and the margin below the last entry of a section may fall past the bottom of a page, as the converter drops it there. An entry taller than a whole page has to be split by the converter anyway: it is not moved, flows on over the next pages, and is reported in `LayoutPlan.overflow`.
+
+Page breaks are recorded in the CV data itself, as a `page_break: true` flag on the entries starting a page, which `cvBuilder` renders as a `page_break` block of `sections/layout.html` (before the section heading for the first entry of a section). The same flag can be set by hand in the YAML file, and is then always honoured. As the flag is part of the data, the render cache tells paginated and plain pages apart.
+
+With a page budget (`max_pages`), the CV is first fitted to the budget:
+    - condense: the descriptions of the last entries are cut to `G_LAYOUT_CONFIG['condensed_words']` words, as few entries as needed. The last entry of each section goes first, the sections taking turns, so that each section keeps its first (most recent) entries as they are.
+    - trim: if condensing every entry is not enough, entries are dropped in the same order, as few as needed. The first entry of each section is never dropped, so that no section is left with a heading alone: if the CV still does not fit, it is laid out over more pages than the budget, and the sections of the kept entries are reported in `LayoutPlan.kept`.
+The number of entries to change is found by bisection, so fitting a CV of n entries estimates O(log n) layouts. The social links are laid out, but never condensed nor dropped. Only the main column is laid out: the sidebar is assumed to fit on the first page.
+
+Modules and Functions
+---------------------
+
+- `LayoutBlock`: The estimated height of one entry of the main column.
+- `LayoutPlan`: The estimated pagination of a CV.
+- `estimate_lines(text, chars_per_line)`: Estimates the number of lines of a word-wrapped paragraph.
+- `layout_metrics(css_file)`: Returns the layout metrics of a style, in pixels.
+- `measure_blocks(data, metrics, heights)`: Estimates the height of each entry of the main column of a CV document.
+- `paginate(blocks, metrics, page_size)`: Lays the blocks out over pages.
+- `fit_pages(data, metrics, max_pages, page_size)`: Condenses, then trims, a CV document to fit a page budget.
+- `paginate_cv(cv, css_file, max_pages, page_size)`: Fits a CV to a page budget, if any, and inserts its page breaks.
+- `format_layout(plan, limit)`: Formats a layout plan as a one-line summary.
+
+Global Variables
+----------------
+
+- `G_LAYOUT_CONFIG`: A dictionary holding the layout settings.
+- `G_LAYOUT_METRICS`: The layout metrics of each style.
+
+Usage
+-----
+
+Example:
+    cv, plan = paginate_cv(CVData('my_cv.yml'), '../styles/style01.css', max_pages=2)
+    print(format_layout(plan))
+    generate_html(cv, '../styles/style01.css', '../output')
+
+or, from the command line:
+    python cvMain.py my_cv.yml --paginate --pdf
+    python cvMain.py my_cv.yml --max-pages 2 --pdf
+
+"""
+import itertools
+import re
+from typing import NamedTuple, Tuple
+
+from cvBuilder import style_name, G_CONFIG_HTML
+from cvDataClass import CVData
+from cvIcons import link_text
+
+
+# =================== VARIABLES ===================
+"""
+G_LAYOUT_CONFIG: dict
+
+A dictionary holding the layout settings.
+
+Attributes:
+    page_sizes (dict): Width and height in millimetres of each supported page size.
+    dpi (int): Pixels per inch of the CSS pixel, used to convert the page size to pixels.
+    condensed_words (int): Number of words kept in the descriptions of a condensed entry.
+"""
+G_LAYOUT_CONFIG = {
+    'page_sizes': {
+        'A4': (210, 297),
+        'A5': (148, 210),
+        'Letter': (215.9, 279.4),
+    },
+    'dpi': 96,
+    'condensed_words': 30,
+}
+
+"""
+G_LAYOUT_METRICS: dict
+
+The layout metrics of each style, in CSS pixels unless stated otherwise. The 'default' entry
+matches `styles/style01.css`, the entry of another style only overrides the metrics that differ.
+
+The metrics follow the rules of the stylesheet: for instance, a project box takes its top margin
+(10px), its padding (2 x 10px), the bottom margin of its name collapsed with the top margin of its
+first paragraph (5px) and the top margin of its second paragraph (5px), 40px in all. The print
+styles set no page margin, only the `page_break` block leaves a margin at the top of a new page.
+
+Attributes:
+    header_height (float): Height of the header with the photo, name and contact details.
+    page_padding (float): Space above the main column on each page, the padding of the container on the first page and the `page_break` block on the next ones.
+    column_padding (float): Padding at the top of the main column, on the first page only.
+    page_margin (float): Space kept free at the bottom of each page, so that the text stays off the edge of the sheet.
+    column_width (float): Width of the text of the main column.
+    font_size (float): Font size of the body text.
+    char_width (float): Average glyph width, in em.
+    line_height (float): Line height of the body text, in em.
+    heading_height (float): Height of a section heading, with its border and margin.
+    section_gap (float): Margin below each section.
+    title_size (float): Font size of the entry titles (h3), in em.
+    subtitle_size (float): Font size of the project names (h4), in em.
+    project_spacing (float): Vertical margins and padding of a project box and of its paragraphs.
+    project_inset (float): Horizontal padding and border of a project box.
+    project_line_height (float): Line height of the project text, in em.
+    link_spacing (float): Margin below each social link.
+    link_inset (float): Width of the icon of a social link, with its margin.
+"""
+G_LAYOUT_METRICS = {
+    'default': {
+        'header_height': 272,
+        'page_padding': 75.6,
+        'column_padding': 20,
+        'page_margin': 10,
+        'column_width': 442,
+        'font_size': 16,
+        'char_width': 0.5,
+        'line_height': 1.15,
+        'heading_height': 44.6,
+        'section_gap': 20,
+        'title_size': 1.17,
+        'subtitle_size': 1.2,
+        'project_spacing': 40,
+        'project_inset': 25,
+        'project_line_height': 1.5,
+        'link_spacing': 5,
+        'link_inset': 27.2,
+    },
+    'style02': {
+        'header_height': 170,
+        'column_width': 410,
+    },
+}
+
+# Name of each section of the main column in `cvBuilder.G_SECTION_BUILDERS`, and its key in the CV document
+_SECTIONS = (
+    ('experience', 'work_experience'),
+    ('education', 'education'),
+    ('projects', 'personal_projects'),
+    ('social_links', 'social_links'),
+)
+# Sections whose entries can be condensed or dropped to fit a page budget, the social links are always kept
+_FITTED_SECTIONS = ('experience', 'education', 'projects')
+# Characters counted twice when estimating the width of a text, such as CJK characters and emoji
+_WIDE_CHARS = re.compile('[\u1100-\U0010ffff]')
+# Description fields shortened when an entry is condensed
+_DESCRIPTIONS = ('job_description', 'study_description', 'project_description')
+
+
+# =================== CLASSES ===================
+class LayoutBlock(NamedTuple):
+    """
+    The estimated height of one entry of the main column.
+
+    Attributes:
+        section (str): Name of the section, such as 'experience'.
+        index (int): Index of the entry in its section, -1 for the heading of an empty section.
+        height (float): Estimated height in pixels, with the section heading for the first entry of a section.
+        forced (bool): True if the entry is flagged with `page_break` in the CV data.
+        margin (float): Part of the height below the entry, the margin below the last entry of a section, which may fall past the bottom of a page.
+    """
+    section: str
+    index: int
+    height: float
+    forced: bool = False
+    margin: float = 0.0
+
+
+class LayoutPlan(NamedTuple):
+    """
+    The estimated pagination of a CV.
+
+    Attributes:
+        pages (int): Estimated number of pages.
+        breaks (Tuple[Tuple[str, int], ...]): (section, index) of each entry starting a page after the first one.
+        overflow (Tuple[Tuple[str, int], ...]): (section, index) of each entry taller than a page.
+        condensed (int): Number of entries whose descriptions were shortened to fit the page budget.
+        trimmed (int): Number of entries dropped to fit the page budget.
+        kept (Tuple[str, ...]): Sections whose first entry was kept although the CV does not fit the page budget.
+    """
+    pages: int
+    breaks: Tuple[Tuple[str, int], ...]
+    overflow: Tuple[Tuple[str, int], ...] = ()
+    condensed: int = 0
+    trimmed: int = 0
+    kept: Tuple[str, ...] = ()
+
+
+# =================== FUNCTIONS ===================
+
+def estimate_lines(text, chars_per_line):
+    """
+    Estimates the number of lines of a word-wrapped paragraph.
+
+    :param text: The text of the paragraph.
+    :param chars_per_line: Number of average characters fitting on a line.
+    :return: The number of lines, 0 for an empty text.
+    """
+    if text.isascii():
+        if len(text) <= chars_per_line:
+            return 1 if text.strip() else 0
+        widths = map(len, text.split())
+    elif not _WIDE_CHARS.search(text):
+        widths = map(len, text.split())
+    else:
+        widths = [len(word) if word.isascii() else len(word) + len(_WIDE_CHARS.findall(word)) for word in text.split()]
+    lines = used = 0
+    for width in widths:
+        if used and used + 1 + width <= chars_per_line:
+            used += 1 + width
+            continue
+        # The word starts a new line, a word longer than a line is broken over several
+        extra, used = divmod(width - 1, chars_per_line)
+        lines += 1 + extra
+        used += 1
+    return lines
+
+
+def layout_metrics(css_file=None):
+    """
+    Returns the layout metrics of a style, in pixels.
+
+    :param css_file: Path to the CSS file of the page, the 'default' metrics are used for an unknown style.
+    :return: A dictionary with the metrics of `G_LAYOUT_METRICS`, the line heights in pixels, and the number of characters per line of the body text ('chars'), of the titles ('title_chars'), of the project text ('project_chars') and of the social links ('link_chars').
+    """
+    metrics = dict(G_LAYOUT_METRICS['default'])
+    if css_file:
+        metrics.update(G_LAYOUT_METRICS.get(style_name(css_file), {}))
+    font_size = metrics['font_size']
+    glyph = font_size * metrics['char_width']
+    metrics.update(
+        line=font_size * metrics['line_height'],
+        title_line=font_size * metrics['title_size'] * metrics['line_height'],
+        subtitle_line=font_size * metrics['subtitle_size'] * metrics['line_height'],
+        project_line=font_size * metrics['project_line_height'],
+        chars=max(1, int(metrics['column_width'] / glyph)),
+        # Titles are bold, about 10% wider than the body text
+        title_chars=max(1, int(metrics['column_width'] / (glyph * metrics['title_size'] * 1.1))),
+        project_chars=max(1, int((metrics['column_width'] - metrics['project_inset']) / glyph)),
+        link_chars=max(1, int((metrics['column_width'] - metrics['link_inset']) / glyph)),
+    )
+    return metrics
+
+
+def _page_height(metrics, page_size=None):
+    """Returns the height in pixels of a page size, defaulting to `G_CONFIG_HTML['page_size']`."""
+    page_size = page_size or G_CONFIG_HTML['page_size']
+    try:
+        _, height = G_LAYOUT_CONFIG['page_sizes'][page_size]
+    except KeyError:
+        raise ValueError(f"Unknown page size: {page_size!r}, expected one of {sorted(G_LAYOUT_CONFIG['page_sizes'])}") from None
+    return height / 25.4 * G_LAYOUT_CONFIG['dpi']
+
+
+def _lines(entry, field, chars_per_line):
+    """Estimates the lines of a field of an entry, a missing field being rendered as a one-line placeholder."""
+    value = entry.get(field)
+    return 1 if value is None else estimate_lines(value, chars_per_line)
+
+
+def _job_height(job, m):
+    title = f"{job['job_title']} - {job['company_name']}"
+    height = estimate_lines(title, m['title_chars']) * m['title_line']
+    height += (1 + _lines(job, 'job_description', m['chars'])) * m['line']
+    for project in job.get('projects') or ():
+        height += (m['project_spacing']
+                   + estimate_lines(project['project_name'], m['title_chars']) * m['subtitle_line']
+                   + (estimate_lines(f"Client: {project.get('client', 'Client')}", m['project_chars'])
+                      + _lines(project, 'project_description', m['project_chars'])) * m['project_line'])
+    return height
+
+
+def _education_height(entry, m):
+    details = ' - '.join(str(entry.get(field, '')) for field in
+                         ('university_name', 'attendance_dates_start', 'attendance_dates_end'))
+    return (estimate_lines(entry['degree'], m['title_chars']) * m['title_line']
+            + (estimate_lines(details, m['chars']) + _lines(entry, 'study_description', m['chars'])) * m['line'])
+
+
+def _project_height(entry, m):
+    lines = _lines(entry, 'project_description', m['chars']) + (1 if entry.get('project_link') else 0)
+    return estimate_lines(entry['project_title'], m['title_chars']) * m['title_line'] + lines * m['line']
+
+
+def _social_link_height(entry, m):
+    return estimate_lines(link_text(entry['url']), m['link_chars']) * m['line'] + m['link_spacing']
+
+
+_ENTRY_HEIGHTS = {
+    'experience': _job_height,
+    'education': _education_height,
+    'projects': _project_height,
+    'social_links': _social_link_height,
+}
+
+
+def measure_blocks(data, metrics, heights=None):
+    """
+    Estimates the height of each entry of the main column of a CV document.
+
+    :param data: The CV document, as normalized by `CVData` (`CVData.data`).
+    :param metrics: The layout metrics, see `layout_metrics`.
+    :param heights: Optional dictionary memoizing the height of each entry object across calls, for documents sharing most of their entries. It keeps the entries alive, so that their ids are not reused.
+    :return: The list of `LayoutBlock`, in page order.
+    """
+    cv = data['cv']
+    blocks = []
+    for section, key in _SECTIONS:
+        entries = cv.get(key) or ()
+        if not entries:
+            # The builder renders the heading of an empty section, but leaves out the social links section
+            if section != 'social_links':
+                blocks.append(LayoutBlock(section, -1, metrics['heading_height'] + metrics['section_gap']))
+            continue
+        height_of = _ENTRY_HEIGHTS[section]
+        last = len(entries) - 1
+        for i, entry in enumerate(entries):
+            if heights is None:
+                height = height_of(entry, metrics)
+            else:
+                memo = heights.get(id(entry))
+                if memo is None or memo[0] is not entry:
+                    memo = heights[id(entry)] = (entry, height_of(entry, metrics))
+                height = memo[1]
+            if i == 0:
+                height += metrics['heading_height']
+            margin = metrics['section_gap'] if i == last else 0.0
+            blocks.append(LayoutBlock(section, i, height + margin, bool(entry.get('page_break')), margin))
+    return blocks
+
+
+def paginate(blocks, metrics, page_size=None):
+    """
+    Lays the blocks out over pages, an entry that does not fit on the rest of a page starting the next one.
+
+    :param blocks: The blocks of the main column, see `measure_blocks`.
+    :param metrics: The layout metrics, see `layout_metrics`.
+    :param page_size: Name of the page size, defaults to `G_CONFIG_HTML['page_size']`.
+    :return: A (number of pages, blocks starting a page, blocks taller than a page) tuple. Blocks taller than a page are not moved to a new page, unless they are flagged.
+    :raises ValueError: If the page size is unknown.
+    """
+    page_top = metrics['page_padding']
+    page_bottom = _page_height(metrics, page_size) - metrics['page_margin']
+    capacity = page_bottom - page_top
+    used = metrics['header_height'] + page_top + metrics['column_padding']
+    pages = 1
+    breaks = []
+    overflow = []
+    for block in blocks:
+        # The margin below the block is dropped at the bottom of a page
+        tall = block.height - block.margin > capacity
+        # The heading of an empty section has no entry to carry a page break
+        if block.index >= 0 and used > page_top and (block.forced or (not tall and used + block.height - block.margin > page_bottom)):
+            pages += 1
+            breaks.append(block)
+            used = page_top
+        used += block.height
+        if tall:
+            overflow.append(block)
+            # The entry is split by the converter and continues on the next pages
+            while used > page_bottom:
+                pages += 1
+                used -= capacity
+    return pages, breaks, overflow
+
+
+def _fit_order(data):
+    """Returns the (document key, index) of each entry that can be condensed or dropped, the last entry of each section first, in turn."""
+    cv = data['cv']
+    sections = [[(key, i) for i in reversed(range(len(cv.get(key) or ())))]
+                for section, key in _SECTIONS if section in _FITTED_SECTIONS]
+    return [entry for entries in itertools.zip_longest(*sections) for entry in entries if entry is not None]
+
+
+def _condense_text(text, words):
+    """Cuts a text to its first words, with an ellipsis if anything was cut."""
+    parts = text.split(maxsplit=words)
+    return text if len(parts) <= words else ' '.join(parts[:words]) + '…'
+
+
+def _condense_entry(entry, words):
+    entry = dict(entry)
+    for field in _DESCRIPTIONS:
+        if isinstance(entry.get(field), str):
+            entry[field] = _condense_text(entry[field], words)
+    if entry.get('projects'):
+        entry['projects'] = [_condense_entry(project, words) for project in entry['projects']]
+    return entry
+
+
+def _update_entries(data, updates):
+    """
+    Returns a copy of a CV document in which some entries are replaced or dropped.
+
+    Only the lists holding an updated entry are copied, the rest of the document is shared.
+
+    :param data: The CV document.
+    :param updates: A dictionary mapping the (document key, index) of each updated entry to its new entry, or to None to drop it.
+    :return: The new document.
+    """
+    keys = {key for key, _ in updates}
+    cv = dict(data['cv'])
+    for key in keys:
+        entries = []
+        for i, entry in enumerate(cv[key]):
+            entry = updates.get((key, i), entry)
+            if entry is not None:
+                entries.append(entry)
+        cv[key] = entries
+    return {**data, 'cv': cv}
+
+
+def _bisect(count, fits):
+    """Returns the smallest k in 1..count such that `fits(k)`, assuming it stays true above, or None."""
+    if not count or not fits(count):
+        return None
+    low, high = 1, count
+    while low < high:
+        middle = (low + high) // 2
+        if fits(middle):
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+def fit_pages(data, metrics, max_pages, page_size=None):
+    """
+    Condenses, then trims, a CV document to fit a page budget.
+
+    The last entry of each section is changed first, the sections taking turns, and as few
+    entries as needed are changed: their descriptions are shortened, and if shortening every
+    entry is not enough, entries are dropped in the same order. The first entry of each section
+    is never dropped, the document may then still be over the budget.
+
+    :param data: The CV document, as normalized by `CVData`.
+    :param metrics: The layout metrics, see `layout_metrics`.
+    :param max_pages: The page budget.
+    :param page_size: Name of the page size, defaults to `G_CONFIG_HTML['page_size']`.
+    :return: A (document, number of condensed entries, number of dropped entries) tuple, the document is `data` itself if it already fits, and keeps the first entry of each section even if it does not fit.
+    """
+    # The probed documents share the entries they do not change, which are measured once
+    heights = {}
+
+    def _pages(document):
+        return paginate(measure_blocks(document, metrics, heights), metrics, page_size)[0]
+
+    if _pages(data) <= max_pages:
+        return data, 0, 0
+    words = G_LAYOUT_CONFIG['condensed_words']
+    cv = data['cv']
+    entries = _fit_order(data)
+    # Condensed once, so that the probes share the condensed entries and measure them once.
+    # Only the entries with a description longer than the condensed one can be condensed.
+    shortened = {}
+    for key, i in entries:
+        entry = _condense_entry(cv[key][i], words)
+        if entry != cv[key][i]:
+            shortened[key, i] = entry
+    condensable = [target for target in entries if target in shortened]
+
+    def _condensed(k):
+        return _update_entries(data, {target: shortened[target] for target in condensable[:k]})
+
+    condensed = _bisect(len(condensable), lambda k: _pages(_condensed(k)) <= max_pages)
+    if condensed is not None:
+        return _condensed(condensed), condensed, 0
+
+    data = _condensed(len(condensable))
+    # A section left without entries would still be rendered with its heading
+    droppable = [target for target in entries if target[1]]
+
+    def _trimmed(k):
+        return _update_entries(data, dict.fromkeys(droppable[:k]))
+
+    trimmed = _bisect(len(droppable), lambda k: _pages(_trimmed(k)) <= max_pages) or len(droppable)
+    return _trimmed(trimmed), len(condensable), trimmed
+
+
+def paginate_cv(cv, css_file=None, max_pages=None, page_size=None):
+    """
+    Fits a CV to a page budget, if any, and inserts its page breaks.
+
+    :param cv: The `CVData` to lay out.
+    :param css_file: Path to the CSS file of the page, which selects the layout metrics.
+    :param max_pages: Optional page budget, see `fit_pages`.
+    :param page_size: Name of the page size, defaults to `G_CONFIG_HTML['page_size']`.
+    :return: A (CVData, LayoutPlan) tuple. The CVData is `cv` itself when no page break is needed and nothing was fitted, a new one whose entries starting a page are flagged with `page_break` otherwise. The plan lists the sections whose first entry was kept over the budget in `kept`.
+    :raises ValueError: If the page size is unknown.
+    """
+    metrics = layout_metrics(css_file)
+    data = cv.data
+    condensed = trimmed = 0
+    if max_pages:
+        data, condensed, trimmed = fit_pages(data, metrics, max_pages, page_size)
+    blocks = measure_blocks(data, metrics)
+    pages, breaks, overflow = paginate(blocks, metrics, page_size)
+
+    keys = dict(_SECTIONS)
+    unflagged = [(keys[block.section], block.index) for block in breaks if not block.forced]
+    if unflagged:
+        data = _update_entries(data, {(key, i): {**data['cv'][key][i], 'page_break': True} for key, i in unflagged})
+    kept = ()
+    if max_pages and pages > max_pages:
+        kept = tuple(section for section, key in _SECTIONS if section in _FITTED_SECTIONS and data['cv'].get(key))
+    plan = LayoutPlan(
+        pages,
+        tuple((block.section, block.index) for block in breaks),
+        tuple((block.section, block.index) for block in overflow),
+        condensed,
+        trimmed,
+        kept,
+    )
+    if data is cv.data:
+        return cv, plan
+    return CVData.from_data(data, '<layout>'), plan
+
+
+def format_layout(plan, limit=5):
+    """
+    Formats a layout plan as a one-line summary.
+
+    :param plan: A `LayoutPlan`.
+    :param limit: Maximum number of entries listed for the page breaks and the overflowing entries.
+    :return: The summary, such as 'Layout: 2 page(s), 1 page break(s) before experience[3]'.
+    """
+    def _names(entries):
+        names = [f"{section}[{index}]" for section, index in entries[:limit]]
+        return ', '.join(names + ['...'] if len(entries) > limit else names)
+
+    parts = [f"Layout: {plan.pages} page(s)"]
+    if plan.breaks:
+        parts.append(f"{len(plan.breaks)} page break(s) before {_names(plan.breaks)}")
+    if plan.condensed or plan.trimmed:
+        parts.append(f"{plan.condensed} entry(ies) condensed, {plan.trimmed} dropped to fit")
+    if plan.kept:
+        parts.append(f"over the page budget, the first entry of {', '.join(plan.kept)} kept")
+    if plan.overflow:
+        parts.append(f"taller than a page: {_names(plan.overflow)}")
+    return ', '.join(parts)
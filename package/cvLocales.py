@@ -0,0 +1,228 @@
+"""
+CV Locales Script
+==================
+
+Author: Hugo REIF FAUDEMER
+Creation Date: 07/05/2023
+Purpose: This script loads the translation tables of the page texts, and localizes the entries of a CV for the language of the page.
+
+Description
+-----------
+
+The fixed texts of the page, such as the section headings, are written in the templates of `sections/` as `{% key %}` markers. Each locale has a translation table in the `locales/` directory, at the root of the project, named after its code (e.g. `locales/fr.yml`), mapping each key to its text. The markers are replaced by the texts of the locale when the templates are compiled (see `cvTemplates.load_template_file`), so every locale has its own compiled blocks and the headings cost nothing at render time. `{% lang %}` is the code of the locale, used in the `lang` attribute of the page.
+
+Tables are loaded once per process. The keys missing from a table fall back to the default locale, so a new locale can be added one text at a time. The texts are inserted in the markup as they are, like the rest of the template.
+
+The entries of the CV are written in one language, but each entry may declare another one, and carry translations of its fields:
+
+    work_experience:
+      - job_title: Softwareentwickler
+        lang: de
+        translations:
+          en:
+            job_title: Software Developer
+
+When the page is rendered in a locale, the fields translated in that locale replace those of the entry (see `localize`). An entry whose `lang` still differs from the locale of the page is wrapped in an element with its own `lang` attribute, so that browsers and screen readers pronounce and hyphenate it correctly. Personal information and the projects of a job can be translated the same way.
+
+Modules and Functions
+---------------------
+
+- `LocaleError`: Raised when a locale has no translation table, or its table is malformed.
+- `Locale`: The code and translation table of a locale.
+- `available_locales()`: Lists the codes of the locales with a translation table.
+- `configured_locales()`: Returns the locales rendered by `cvMain.py --all-locales`.
+- `load_locale(code)`: Loads the translation table of a locale, with caching.
+- `reload_locales()`: Forgets the loaded locales, so that modified tables are read again.
+- `localize(entry, code)`: Returns a CV entry with its translations in a locale applied.
+- `localize_entries(entries, code)`: Localizes a sequence of CV entries.
+
+Global Variables
+----------------
+
+- `G_LOCALES_CONFIG`: A dictionary holding the locale settings.
+
+Usage
+-----
+
+Example:
+    locale = load_locale('fr')
+    print(locale.texts['experience'])
+    job = localize(cv.get_work_experience()[0], 'fr')
+
+or, to render a CV in every configured locale:
+    python cvMain.py my_cv.yml --all-locales
+
+"""
+import os
+import sys
+import threading
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
+
+
+# =================== VARIABLES ===================
+# `locales/` of a source checkout, the copy installed under `sys.prefix` by `pip install .` is used otherwise
+_SOURCE_LOCALES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'locales')
+
+"""
+G_LOCALES_CONFIG: dict
+
+A dictionary holding the locale settings.
+
+Attributes:
+    locales_dir (str): Directory of the translation tables, `locales/` at the root of the project, or `share/smartcvbuilder/locales` of the Python prefix when the package is installed.
+    default (str): Code of the locale used when none is given, and of the texts used for the keys missing from the other tables.
+    locales (List[str]): Codes of the locales rendered by `--all-locales`, None for every table of `locales_dir`.
+    extension (str): Extension of the translation tables.
+"""
+G_LOCALES_CONFIG = {
+    'locales_dir': (_SOURCE_LOCALES_DIR if os.path.isdir(_SOURCE_LOCALES_DIR)
+                    else os.path.join(sys.prefix, 'share', 'smartcvbuilder', 'locales')),
+    'default': 'en',
+    'locales': None,
+    'extension': '.yml',
+}
+
+# Loaded locales, keyed on their code
+_LOCALES = {}
+_LOCK = threading.Lock()
+
+
+# =================== CLASSES ===================
+class LocaleError(ValueError):
+    """Raised when a locale has no translation table, or its table is malformed."""
+
+
+class Locale(NamedTuple):
+    """The code and translation table of a locale, including the texts inherited from the default locale."""
+    code: str
+    texts: Mapping[str, str]
+
+
+# =================== FUNCTIONS ===================
+
+def available_locales():
+    """
+    Lists the codes of the locales with a translation table.
+
+    :return: The sorted list of locale codes.
+    """
+    extension = G_LOCALES_CONFIG['extension']
+    try:
+        names = os.listdir(G_LOCALES_CONFIG['locales_dir'])
+    except FileNotFoundError:
+        return []
+    return sorted(name[:-len(extension)] for name in names if name.endswith(extension))
+
+
+def configured_locales():
+    """
+    Returns the locales rendered by `cvMain.py --all-locales`.
+
+    :return: The codes of `G_LOCALES_CONFIG['locales']`, or of every available locale if it is None.
+    """
+    return list(G_LOCALES_CONFIG['locales'] or available_locales())
+
+
+def _read_table(code):
+    """
+    Reads and checks the translation table of a locale.
+
+    :param code: The locale code.
+    :return: A dictionary mapping each key to its text.
+    :raises LocaleError: If the table does not exist or is not a mapping of texts.
+    """
+    # YAML is only imported when a table is read, see cvDataClass.parse_yaml
+    from cvDataClass import parse_yaml
+
+    path = os.path.join(G_LOCALES_CONFIG['locales_dir'], code + G_LOCALES_CONFIG['extension'])
+    try:
+        with open(path, 'rb') as f:
+            table = parse_yaml(f)
+    except FileNotFoundError:
+        raise LocaleError(f"No translation table for locale '{code}', available locales: "
+                          f"{', '.join(available_locales()) or 'none'}") from None
+    table = {} if table is None else table
+    if not isinstance(table, dict):
+        raise LocaleError(f"{path}: must be a mapping of texts")
+    for key, text in table.items():
+        if not isinstance(text, str):
+            raise LocaleError(f"{path}: the text of '{key}' must be a string")
+    return table
+
+
+def load_locale(code=None):
+    """
+    Loads the translation table of a locale.
+
+    Tables are read once per process. The keys missing from the table are taken from the
+    default locale, and `lang` is set to the code of the locale.
+
+    :param code: The locale code, such as 'fr', defaults to `G_LOCALES_CONFIG['default']`.
+    :return: The `Locale`.
+    :raises LocaleError: If the locale, or the default locale, has no valid translation table.
+    """
+    code = code or G_LOCALES_CONFIG['default']
+    locale = _LOCALES.get(code)
+    if locale is not None:
+        return locale
+
+    default = G_LOCALES_CONFIG['default']
+    texts = dict(load_locale(default).texts) if code != default else {}
+    texts.update(_read_table(code))
+    texts['lang'] = code
+    with _LOCK:
+        return _LOCALES.setdefault(code, Locale(code, MappingProxyType(texts)))
+
+
+def reload_locales():
+    """
+    Forgets the loaded locales, so that modified translation tables are read again on next use.
+
+    The templates compiled with the previous tables are compiled again by `cvTemplates.load_template_file`.
+    """
+    with _LOCK:
+        _LOCALES.clear()
+
+
+def localize(entry, code):
+    """
+    Returns a CV entry as rendered in a locale.
+
+    The fields of `translations[code]` replace those of the entry, and its `lang` is removed
+    since the entry is then in the language of the page. The projects of a job are localized
+    as well.
+
+    :param entry: A read-only entry of the CV, such as a work experience entry.
+    :param code: The locale code of the page.
+    :return: The localized read-only entry, or the entry itself if it has nothing to change.
+    """
+    translations = entry.get('translations')
+    texts = translations.get(code) if translations else None
+    localized = None
+    if texts:
+        localized = dict(entry)
+        localized.update(texts)
+        localized.pop('lang', None)
+
+    projects = entry.get('projects')
+    if projects:
+        localized_projects = localize_entries(projects, code)
+        if localized_projects is not projects:
+            localized = localized or dict(entry)
+            localized['projects'] = localized_projects
+    return entry if localized is None else MappingProxyType(localized)
+
+
+def localize_entries(entries, code):
+    """
+    Localizes a sequence of CV entries, see `localize`.
+
+    :param entries: The read-only entries of a section.
+    :param code: The locale code of the page.
+    :return: A tuple of the localized entries, or `entries` itself if none of them changed.
+    """
+    localized = tuple(localize(entry, code) for entry in entries)
+    if all(entry is original for entry, original in zip(localized, entries)):
+        return entries
+    return localized
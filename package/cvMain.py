@@ -9,29 +9,29 @@ Purpose: This script serves as the main entry point for generating a CV in HTML
 Description
 -----------
 
-The script reads the CV data from a specified YAML file and applies a CSS file for styling. It then generates the HTML content of the CV and writes it to a file. The script also includes configurations for PDF generation, though this is not currently implemented.
+The script reads the CV data from a specified YAML file and applies a CSS file for styling. It then generates the HTML content of the CV and writes it to a file, and optionally converts it to PDF.
 
 Modules and Functions
 ---------------------
 
-- `generate_html(cv, css_file)`: Function from `cvBuilder` that generates the HTML CV.
+- `create_renderer(name)`: Function from `cvRenderers` that creates the backend of an output format (HTML, Markdown, plain text or JSON Resume).
+- `render_formats(cv, renderers, output_path)`: Function from `cvRenderers` that writes several output formats of a CV concurrently, from one load of the data.
+- `write_html(cv, css_file, stream)`: Function from `cvBuilder` that streams the HTML CV, section by section.
 - `CVData(file_path: str)`: Class from `cvBuilder` that handles loading and accessing CV data from a YAML file.
+- `RenderCache(cache_dir)`: Class from `cvCache` that reuses the previous output of an unchanged CV.
+- `watch(yaml_file, css_file, output_dir)`: Function from `cvWatch` that regenerates the CV each time its YAML or CSS file changes.
+- `convert_to_pdf(html_files)`: Function from `cvPdf` that converts HTML files to PDF.
+- `configured_locales()`: Function from `cvLocales` that returns the locales rendered by `--all-locales`.
+- `paginate_cv(cv, css_file, max_pages)`: Function from `cvLayout` that inserts page breaks in a CV, and fits it to a page budget.
+- `AssetCache(cache_dir)`: Class from `cvAssets` that embeds the stylesheet and photo in the page.
+- `Tracer()`: Class from `cvProfile` that records the time, output size and allocations of each generation step.
+- `generate(args, output_dir, assets)`: Generates the CV page, and its PDF if requested.
+- `main(argv)`: Parses the command line and generates the CV.
 
 Global Variables
 ----------------
 
-- `G_CONFIG_PDF`: A dictionary configuring PDF generation settings.
-
-Attributes:
-    pdf_options (dict): A nested dictionary containing specific PDF generation options.
-        Attributes:
-            page-size (str): Specifies the page size within the PDF options, mirroring the outer page_size setting.
-            margin-top (str): The top margin of the PDF pages, set to '0mm'.
-            margin-right (str): The right margin of the PDF pages, set to '0mm'.
-            margin-bottom (str): The bottom margin of the PDF pages, set to '0mm'.
-            margin-left (str): The left margin of the PDF pages, set to '0mm'.
-            encoding (str): Specifies the character encoding for the PDF, consistent with the outer encoding setting.
-            enable-local-file-access (str): Intended to specify whether local file access is enabled for PDF generation, but currently has an empty string which should ideally be either 'True' or 'False'.
+- `G_CONFIG_PDF`: A dictionary configuring PDF generation settings, defined in `cvPdf` (imported with `--pdf` only).
 
 Usage
 -----
@@ -41,55 +41,228 @@ To use this script, run it from the command line with the YAML file and CSS file
 Example:
     python cvMain.py my_cv.yml my_style.css
 
+Several CSS files can be given to publish the CV in several styles. The YAML file is then loaded once and the body of the page rendered once, and one page per style is written, named after the style (e.g. 'CV_Your_Name_style01.html' and 'CV_Your_Name_style02.html').
+
+Example:
+    python cvMain.py my_cv.yml ../styles/style01.css ../styles/style02.css
+
+Generated pages are kept in a render cache (see `cvCache.py`), so regenerating an unchanged CV reuses the previous output. The parsed YAML is cached as well, in the `parsed` sub-directory of the cache. Use `--no-cache` to always rebuild, and `--cache-dir` to choose where the cache is stored.
+
+With `--pdf`, the HTML page is also converted to PDF with `wkhtmltopdf` (or the converter given by `--wkhtmltopdf`), and the time spent in the HTML and PDF stages is reported separately.
+
+With `--inline`, the stylesheet and the photo are embedded in the page (the photo as a downscaled base64 data URI), so that the page can be moved or converted to PDF without access to the original files. Processed photos are cached in the `assets` sub-directory of the cache.
+
+With `--minify`, the page is rendered without the indentation and line breaks of the section templates, which makes it smaller and faster to convert to PDF. The values of the CV are escaped in both cases.
+
+With `--paginate`, the height of each entry of the main column is estimated from its text and the metrics of the style, and a page break is inserted before each entry that would be split across two pages (see `cvLayout.py`), so that the PDF needs no manual adjustment. With `--max-pages N`, the descriptions of the last entries of each section are condensed, then those entries dropped if needed, to fit N pages, keeping the first entry of each section: a warning is printed if the CV still does not fit. The layout follows the first CSS file when several are given.
+
+Example:
+    python cvMain.py my_cv.yml --max-pages 2 --pdf
+
+With `--locale CODE`, the headings and labels of the page are taken from the translation table `locales/CODE.yml`, and the entries of the CV carrying translations in that locale are rendered translated (see `cvLocales.py`). With several codes, or with `--all-locales` for every configured locale, the CV is loaded once and rendered into each locale in a single pass, reusing the fragments that do not depend on the locale, and one page per locale is written, named after its code (e.g. 'CV_Your_Name_fr.html'). Only the HTML page is localized.
+
+Example:
+    python cvMain.py my_cv.yml --locale en fr de
+
+With `--profile PATH`, the generation is profiled and the page is generated unchanged. A path ending in `.json` receives the wall time, HTML byte count and allocations of each step (YAML parsing, each section function, the file write), which are also printed as a table. Any other path receives a cProfile dump, to be read with `pstats` or a viewer such as snakeviz.
+
+With `--format`, the CV is also (or only) written as Markdown, plain text or JSON Resume, e.g. for applicant tracking systems. The YAML file is loaded once and the formats are rendered concurrently:
+
+Example:
+    python cvMain.py my_cv.yml --format html markdown text json
+
+With `--stdout`, the page is streamed to the standard output section by section instead of being written to a file, e.g. to pipe it into another program.
+
+With `--watch`, the script keeps running and regenerates the CV each time the YAML or CSS file changes, re-rendering only the sections whose data changed.
+
 """
+import argparse
 import sys
 import os
-from cvBuilder import generate_html, CVData  
+import time
+from contextlib import ExitStack
+from cvBuilder import write_html, style_name, CVData, G_CONFIG_HTML
+from cvCache import RenderCache, G_CACHE_CONFIG
+from cvLocales import available_locales, configured_locales
+from cvProfile import Tracer, trace
+from cvRenderers import create_renderer, render_formats, G_RENDERERS
+from cvTemplates import data_path
+# cvWatch, cvPdf, cvAssets, cvLayout and cProfile are only imported by the options using them, so that
+# a plain generation does not pay for their imports at startup
 
-# =================== VARIABLES ===================
-"""
-G_CONFIG_PDF: dict
-
-A dictionary configuring PDF generation settings.
-
-Attributes:
-    pdf_options (dict): A nested dictionary containing specific PDF generation options.
-        Attributes:
-            page-size (str): Specifies the page size within the PDF options, mirroring the outer page_size setting.
-            margin-top (str): The top margin of the PDF pages, set to '0mm'.
-            margin-right (str): The right margin of the PDF pages, set to '0mm'.
-            margin-bottom (str): The bottom margin of the PDF pages, set to '0mm'.
-            margin-left (str): The left margin of the PDF pages, set to '0mm'.
-            encoding (str): Specifies the character encoding for the PDF, consistent with the outer encoding setting.
-            enable-local-file-access (str): Intended to specify whether local file access is enabled for PDF generation, but currently has an empty string which should ideally be either 'True' or 'False'.
-"""
-G_CONFIG_PDF = {
-    'page_size': 'A4',
-    'margin': '0mm',
-    'encoding': 'UTF-8',
-    'enable_local_file_access': True,
-    'pdf_options': {
-        'page-size': 'A4',
-        'margin-top': '0mm',
-        'margin-right': '0mm',
-        'margin-bottom': '0mm',
-        'margin-left': '0mm',
-        'encoding': 'UTF-8',
-        'enable-local-file-access': ""
-    }
-}
+# =================== FUNCTIONS ===================
+def _warn_kept(plan, max_pages):
+    """Warns on stderr when a CV is laid out over more pages than the budget, rather than losing whole sections."""
+    if plan.kept:
+        print(f"Warning: the CV does not fit {max_pages} page(s) without dropping the only entry of {', '.join(plan.kept)}, "
+              f"it is laid out over {plan.pages} page(s)", file=sys.stderr)
+
+
+def generate(args, output_dir, assets=None):
+    """Generates the CV in the requested formats, and the PDF of its HTML page if requested.
+
+    :param args: The parsed command line.
+    :param output_dir: Directory where the outputs are written.
+    :param assets: Optional `AssetCache` embedding the stylesheet and photo in the page.
+    :return: The exit code.
+    """
+    start = time.perf_counter()
+    parse_cache_dir = None if args.no_cache else os.path.join(args.cache_dir, 'parsed')
+    cv = CVData(args.yaml_file, parse_cache_dir)
+    if args.paginate:
+        from cvLayout import paginate_cv, format_layout
+        with trace('paginate'):
+            cv, plan = paginate_cv(cv, args.css_file, args.max_pages)
+        print(format_layout(plan))
+        _warn_kept(plan, args.max_pages)
+    cache = None if args.no_cache else RenderCache(args.cache_dir)
+    renderers = [create_renderer(name, args.css_files, assets, cache, args.minify, args.locales) for name in args.formats]
+    written = render_formats(cv, renderers, output_dir)
+    html_paths = written.get('html', [])
+    if cache is not None:
+        cache.evict()
+        print(cache.stats)
+        if assets is not None:
+            print(assets.stats)
+
+    if args.pdf:
+        from cvPdf import convert_to_pdf, PdfError
+        html_time = time.perf_counter() - start
+        start = time.perf_counter()
+        try:
+            with trace('convert_to_pdf'):
+                results = convert_to_pdf(html_paths, executable=args.wkhtmltopdf)
+        except PdfError as error:
+            print(error, file=sys.stderr)
+            return 1
+        pdf_time = time.perf_counter() - start
+        print(f"HTML stage: {html_time * 1000:.2f} ms | PDF stage: {pdf_time * 1000:.2f} ms")
+        failed = [result for result in results if not result.ok]
+        for result in failed:
+            print(f"PDF conversion of {result.html_file} failed: {result.error}", file=sys.stderr)
+        if failed:
+            return 1
+    return 0
 
 
 # =================== MAIN ===================
-if __name__ == "__main__":
-    yaml_file = sys.argv[1] if len(sys.argv) > 1 else '../templates/template.yml'
-    css_file = sys.argv[2] if len(sys.argv) > 2 else '../styles/style01.css'
+def main(argv=None):
+    """Parses the command line and generates the CV.
+
+    :param argv: Command line arguments, defaults to `sys.argv[1:]`.
+    :return: The exit code.
+    """
+    parser = argparse.ArgumentParser(description="Generate a CV in HTML format from a YAML file.")
+    parser.add_argument('yaml_file', nargs='?', default=data_path('templates', 'template.yml'), help="YAML (or JSON) file containing the CV data (default: the example CV, templates/template.yml).")
+    parser.add_argument('css_files', nargs='*', metavar='css_file', help="CSS file(s) used for styling, one page is generated per file (default: styles/style01.css).")
+    parser.add_argument('--output', default=G_CONFIG_HTML['output_dir'], help="Output directory (default: output/ of the project, ~/smartcvbuilder when installed).")
+    parser.add_argument('--no-cache', action='store_true', help="Always rebuild the CV, without using the render cache.")
+    parser.add_argument('--cache-dir', default=G_CACHE_CONFIG['cache_dir'], help="Directory of the render cache.")
+    parser.add_argument('--watch', action='store_true', help="Regenerate the CV each time the YAML or CSS file changes, without the render cache.")
+    parser.add_argument('--stdout', action='store_true', help="Stream the HTML page to the standard output, section by section, instead of writing a file.")
+    parser.add_argument('--format', dest='formats', nargs='+', choices=list(G_RENDERERS), default=['html'], help="Output format(s), rendered concurrently from one load of the CV.")
+    parser.add_argument('--inline', action='store_true', help="Embed the stylesheet and the photo in the HTML page.")
+    parser.add_argument('--minify', action='store_true', help="Strip the indentation and line breaks of the HTML page.")
+    parser.add_argument('--locale', dest='locales', nargs='+', metavar='CODE', help="Locale(s) of the HTML page, one page is generated per locale when several are given (default: the default locale of cvLocales).")
+    parser.add_argument('--all-locales', action='store_true', help="Generate one HTML page per configured locale, in a single pass over the CV.")
+    parser.add_argument('--profile', metavar='PATH', help="Profile the generation: per-step timings as JSON if PATH ends in .json, a cProfile dump otherwise.")
+    parser.add_argument('--paginate', action='store_true', help="Estimate the page layout and insert page breaks between the entries.")
+    parser.add_argument('--max-pages', type=int, metavar='N', help="Condense, then drop, the last entries of each section to fit N pages (implies --paginate).")
+    parser.add_argument('--pdf', action='store_true', help="Also convert the HTML page to PDF.")
+    parser.add_argument('--wkhtmltopdf', help="PDF converter executable (default: G_CONFIG_PDF['wkhtmltopdf'] of cvPdf).")
+    args = parser.parse_args(argv)
+    args.css_files = args.css_files or [data_path('styles', 'style01.css')]
+    args.css_file = args.css_files[0]
+    args.paginate = args.paginate or args.max_pages is not None
+    if args.max_pages is not None and args.max_pages < 1:
+        parser.error("--max-pages must be at least 1")
+    if len(args.css_files) > 1 and (args.stdout or args.watch):
+        parser.error("--stdout and --watch take a single CSS file")
+    if args.paginate and args.watch:
+        parser.error("--paginate and --max-pages cannot be used with --watch")
+    if args.pdf and 'html' not in args.formats:
+        parser.error("--pdf needs the html format")
+    # --stdout and --watch only render the HTML page, with none of the later stages
+    for flag, used in (('--stdout', args.stdout), ('--watch', args.watch)):
+        if not used:
+            continue
+        if args.formats != ['html']:
+            parser.error(f"{flag} only renders the html format")
+        if args.pdf:
+            parser.error(f"--pdf cannot be used with {flag}")
+        if args.profile:
+            parser.error(f"--profile cannot be used with {flag}")
+    if args.stdout and args.watch:
+        parser.error("--stdout and --watch cannot be used together")
+    if args.inline and args.watch:
+        parser.error("--inline cannot be used with --watch, the watched page links its assets")
+    if args.all_locales:
+        if args.locales:
+            parser.error("--locale and --all-locales cannot be used together")
+        args.locales = configured_locales()
+    args.locales = args.locales or []
+    unknown = [locale for locale in args.locales if locale not in available_locales()]
+    if unknown:
+        parser.error(f"no translation table for locale(s) {', '.join(unknown)}, available: {', '.join(available_locales())}")
+    if len(set(args.locales)) != len(args.locales):
+        parser.error("each locale can only be given once, the pages are named after them")
+    if len(args.locales) > 1 and (len(args.css_files) > 1 or args.stdout):
+        parser.error("several locales take a single CSS file, and cannot be used with --stdout")
+    if len(args.locales) > 1 and args.watch:
+        parser.error("--watch renders a single locale")
+    style_names = [style_name(css_file) for css_file in args.css_files]
+    if len(set(style_names)) != len(style_names):
+        parser.error("the CSS files must have distinct names, the pages are named after them")
 
+    assets = None
+    if args.inline:
+        from cvAssets import AssetCache
+        assets = AssetCache(None if args.no_cache else os.path.join(args.cache_dir, 'assets'))
+
+    if args.stdout:
+        cv = CVData(args.yaml_file)
+        if args.paginate:
+            from cvLayout import paginate_cv
+            cv, plan = paginate_cv(cv, args.css_file, args.max_pages)
+            _warn_kept(plan, args.max_pages)
+        write_html(cv, args.css_file, sys.stdout, flush=True, assets=assets, minify=args.minify,
+                   locale=args.locales[0] if args.locales else None)
+        return 0
 
     # Check and create output directory if it doesn't exist
-    output_dir = '../output'
+    output_dir = args.output
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    cv = CVData(yaml_file)
-    generate_html(cv, css_file, output_path=output_dir)
+    if args.watch:
+        from cvWatch import watch
+        try:
+            watch(args.yaml_file, args.css_file, output_dir, minify=args.minify,
+                  locale=args.locales[0] if args.locales else None)
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    tracer = profiler = None
+    if args.profile:
+        if args.profile.endswith('.json'):
+            tracer = Tracer()
+        else:
+            import cProfile
+            profiler = cProfile.Profile()
+    with ExitStack() as stack:
+        for profiling in (tracer, profiler):
+            if profiling is not None:
+                stack.enter_context(profiling)
+        status = generate(args, output_dir, assets)
+
+    if tracer is not None:
+        tracer.dump(args.profile)
+        print(tracer.format_table())
+    if profiler is not None:
+        profiler.dump_stats(args.profile)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+"""
+CV PDF Export Script
+=====================
+
+Author: Hugo REIF FAUDEMER
+Creation Date: 07/05/2023
+Purpose: This script converts generated HTML CVs to PDF with `wkhtmltopdf`, as a pipeline stage that follows the HTML generation.
+
+Description
+-----------
+
+Starting one `wkhtmltopdf` process per CV is the slowest part of a generation, since each process boots its own rendering engine. The converter is therefore started with `--read-args-from-stdin`: one process stays alive for a whole batch of documents and converts one (input, output) pair per line read on its standard input.
+
+`PdfPipeline` groups the HTML files it receives into batches and converts the batches concurrently, with at most `workers` converter processes running at once. HTML files can be submitted while they are being generated, so the PDF conversion overlaps the HTML stage. The converter options come from `G_CONFIG_PDF['pdf_options']`.
+
+The converter executable is configurable (`G_CONFIG_PDF['wkhtmltopdf']`, or the `WKHTMLTOPDF` environment variable). Any executable following the same command line convention can stand in for `wkhtmltopdf`, e.g. to run the pipeline offline.
+
+Modules and Functions
+---------------------
+
+- `PdfError`: Raised when the converter cannot be found or started.
+- `PdfResult`: The outcome of the conversion of one HTML file.
+- `pdf_options_to_args(options)`: Converts the `pdf_options` dictionary to converter command line arguments.
+- `find_converter(executable)`: Resolves the path of the converter executable.
+- `convert_batch(html_files, executable, options, timeout)`: Converts several HTML files with a single converter process.
+- `PdfPipeline`: Converts HTML files in batches over a bounded pool of converter processes.
+- `convert_to_pdf(html_files, ...)`: Converts a list of HTML files and returns the results.
+
+Global Variables
+----------------
+
+- `G_CONFIG_PDF`: A dictionary configuring PDF generation settings.
+
+Usage
+-----
+
+Example:
+    with PdfPipeline() as pipeline:
+        for html_file in html_files:
+            pipeline.submit(html_file)
+    print(pipeline.results)
+
+"""
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+
+# =================== VARIABLES ===================
+"""
+G_CONFIG_PDF: dict
+
+A dictionary configuring PDF generation settings.
+
+Attributes:
+    wkhtmltopdf (str): Name or path of the converter executable, overridden by the `WKHTMLTOPDF` environment variable.
+    workers (int): Maximum number of converter processes running at once.
+    batch_size (int): Number of documents converted by a single converter process.
+    timeout (float): Maximum time in seconds a converter process may take for one document of its batch.
+    pdf_options (dict): A nested dictionary containing specific PDF generation options.
+        Attributes:
+            page-size (str): Specifies the page size within the PDF options, mirroring the outer page_size setting.
+            margin-top (str): The top margin of the PDF pages, set to '0mm'.
+            margin-right (str): The right margin of the PDF pages, set to '0mm'.
+            margin-bottom (str): The bottom margin of the PDF pages, set to '0mm'.
+            margin-left (str): The left margin of the PDF pages, set to '0mm'.
+            encoding (str): Specifies the character encoding for the PDF, consistent with the outer encoding setting.
+            enable-local-file-access (str): Allows the converter to load the local stylesheet and photo. An empty string passes the option as a flag without value.
+            print-media-type (str): Applies the `@media print` rules of the stylesheet, which let a paginated CV flow over several pages (see `cvLayout.py`).
+"""
+G_CONFIG_PDF = {
+    'page_size': 'A4',
+    'margin': '0mm',
+    'encoding': 'UTF-8',
+    'enable_local_file_access': True,
+    'wkhtmltopdf': os.environ.get('WKHTMLTOPDF', 'wkhtmltopdf'),
+    'workers': min(4, os.cpu_count() or 1),
+    'batch_size': 16,
+    'timeout': 60.0,
+    'pdf_options': {
+        'page-size': 'A4',
+        'margin-top': '0mm',
+        'margin-right': '0mm',
+        'margin-bottom': '0mm',
+        'margin-left': '0mm',
+        'encoding': 'UTF-8',
+        'enable-local-file-access': "",
+        'print-media-type': "",
+    }
+}
+
+
+# =================== CLASSES ===================
+class PdfError(RuntimeError):
+    """Raised when the PDF converter cannot be found or started."""
+
+
+class PdfResult(NamedTuple):
+    """The outcome of the conversion of one HTML file.
+
+    Attributes:
+        html_file (str): The converted HTML file.
+        pdf_file (str): The PDF file written next to it.
+        ok (bool): True if the PDF file was written.
+        error (str): The converter error output on failure, empty on success.
+    """
+    html_file: str
+    pdf_file: str
+    ok: bool
+    error: str = ''
+
+
+# =================== FUNCTIONS ===================
+
+def pdf_options_to_args(options):
+    """
+    Converts the `pdf_options` dictionary to converter command line arguments.
+
+    Options with an empty value are passed as flags, the others as `--name value`.
+
+    :param options: A dictionary such as `G_CONFIG_PDF['pdf_options']`.
+    :return: The list of command line arguments.
+    """
+    args = []
+    for name, value in options.items():
+        args.append(f"--{name}")
+        if value not in ('', None):
+            args.append(str(value))
+    return args
+
+
+def find_converter(executable=None):
+    """
+    Resolves the path of the converter executable.
+
+    :param executable: Name or path of the converter, defaults to `G_CONFIG_PDF['wkhtmltopdf']`.
+    :return: The path of the executable.
+    :raises PdfError: If the executable cannot be found.
+    """
+    executable = executable or G_CONFIG_PDF['wkhtmltopdf']
+    path = shutil.which(executable)
+    if path is None:
+        raise PdfError(f"PDF converter '{executable}' not found, install wkhtmltopdf or set WKHTMLTOPDF")
+    return path
+
+
+def _quote(arg):
+    """Quotes an argument for a line read by `--read-args-from-stdin`."""
+    return '"' + arg.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def convert_batch(html_files, executable=None, options=None, timeout=None):
+    """
+    Converts several HTML files with a single converter process.
+
+    Each PDF file is written next to its HTML file, with a '.pdf' extension.
+
+    :param html_files: List of HTML file paths.
+    :param executable: Path of the converter, resolved with `find_converter` if not given.
+    :param options: Converter options, defaults to `G_CONFIG_PDF['pdf_options']`.
+    :param timeout: Maximum time in seconds per document, defaults to `G_CONFIG_PDF['timeout']`.
+    :return: The list of `PdfResult`, in the order of `html_files`.
+    :raises PdfError: If the converter cannot be started.
+    """
+    executable = executable or find_converter()
+    options = G_CONFIG_PDF['pdf_options'] if options is None else options
+    timeout = (timeout or G_CONFIG_PDF['timeout']) * len(html_files)
+
+    pairs = [(html_file, os.path.splitext(html_file)[0] + '.pdf') for html_file in html_files]
+    for _, pdf_file in pairs:
+        if os.path.exists(pdf_file):
+            os.remove(pdf_file)
+    commands = ''.join(f"{_quote(html_file)} {_quote(pdf_file)}\n" for html_file, pdf_file in pairs)
+
+    try:
+        process = subprocess.run(
+            [executable, '--quiet', *pdf_options_to_args(options), '--read-args-from-stdin'],
+            input=commands, capture_output=True, text=True, timeout=timeout,
+        )
+        error = process.stderr.strip() or f"converter exited with status {process.returncode}"
+    except subprocess.TimeoutExpired:
+        error = f"converter timed out after {timeout:g}s"
+    except OSError as exc:
+        raise PdfError(f"Cannot start PDF converter '{executable}': {exc}") from exc
+
+    results = []
+    for html_file, pdf_file in pairs:
+        ok = os.path.isfile(pdf_file) and os.path.getsize(pdf_file) > 0
+        results.append(PdfResult(html_file, pdf_file, ok, '' if ok else error))
+    return results
+
+
+class PdfPipeline:
+    """
+    Converts HTML files in batches over a bounded pool of converter processes.
+
+    Submitted files are buffered until a batch is full, then the batch is converted in the
+    background. `close` converts the last partial batch and waits for every conversion.
+
+    Attributes:
+        results (List[PdfResult]): The results of the finished conversions.
+        documents (int): Number of documents submitted.
+        batches (int): Number of converter processes started.
+        busy_time (float): Cumulated wall time of the converter processes, in seconds.
+        elapsed (float): Wall time from the first submitted document to the end of the last conversion, in seconds.
+    """
+
+    def __init__(self, executable=None, options=None, workers=None, batch_size=None, timeout=None,
+                 on_result=None):
+        """
+        :param executable: Name or path of the converter, defaults to `G_CONFIG_PDF['wkhtmltopdf']`.
+        :param options: Converter options, defaults to `G_CONFIG_PDF['pdf_options']`.
+        :param workers: Maximum number of converter processes running at once.
+        :param batch_size: Number of documents converted by one converter process.
+        :param timeout: Maximum time in seconds per document.
+        :param on_result: Optional callback called with each `PdfResult` as soon as its batch is done.
+        :raises PdfError: If the converter executable cannot be found.
+        """
+        self.executable = find_converter(executable)
+        self.options = options
+        self.timeout = timeout
+        self.batch_size = batch_size or G_CONFIG_PDF['batch_size']
+        self.on_result = on_result
+        self.results = []
+        self.documents = 0
+        self.batches = 0
+        self.busy_time = 0.0
+        self.elapsed = 0.0
+        self._pending = []
+        self._futures = []
+        self._started: Optional[float] = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers or G_CONFIG_PDF['workers'], thread_name_prefix='cv-pdf')
+
+    def _convert(self, html_files):
+        """Converts a batch on a worker thread and records its results."""
+        start = time.perf_counter()
+        results = convert_batch(html_files, self.executable, self.options, self.timeout)
+        with self._lock:
+            self.busy_time += time.perf_counter() - start
+            self.results.extend(results)
+        if self.on_result:
+            for result in results:
+                self.on_result(result)
+
+    def _flush(self):
+        """Sends the buffered files to the converter pool."""
+        if self._pending:
+            self._futures.append(self._executor.submit(self._convert, self._pending))
+            self._pending = []
+            self.batches += 1
+
+    def submit(self, html_file):
+        """
+        Queues an HTML file for conversion.
+
+        :param html_file: Path of the HTML file to convert.
+        """
+        if self._started is None:
+            self._started = time.perf_counter()
+        self.documents += 1
+        self._pending.append(html_file)
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+
+    def close(self):
+        """
+        Converts the remaining files and waits for every conversion.
+
+        :return: The list of `PdfResult`.
+        :raises PdfError: If a converter process could not be started.
+        """
+        self._flush()
+        try:
+            for future in self._futures:
+                future.result()
+        finally:
+            self._executor.shutdown()
+        if self._started is not None:
+            self.elapsed = time.perf_counter() - self._started
+        return self.results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+
+def convert_to_pdf(html_files, executable=None, options=None, workers=None, batch_size=None, timeout=None):
+    """
+    Converts a list of HTML files to PDF.
+
+    The batch size is reduced when there are few files, so that every worker gets a batch.
+
+    :param html_files: List of HTML file paths.
+    :param executable: Name or path of the converter.
+    :param options: Converter options, defaults to `G_CONFIG_PDF['pdf_options']`.
+    :param workers: Maximum number of converter processes running at once.
+    :param batch_size: Maximum number of documents converted by one converter process.
+    :param timeout: Maximum time in seconds per document.
+    :return: The list of `PdfResult`.
+    """
+    workers = workers or G_CONFIG_PDF['workers']
+    batch_size = batch_size or G_CONFIG_PDF['batch_size']
+    batch_size = max(1, min(batch_size, -(-len(html_files) // workers)))
+    with PdfPipeline(executable, options, workers, batch_size, timeout) as pipeline:
+        for html_file in html_files:
+            pipeline.submit(html_file)
+    return pipeline.results
@@ -0,0 +1,233 @@
+"""
+CV Profile Script
+==================
+
+Author: Hugo REIF FAUDEMER
+Creation Date: 07/05/2023
+Purpose: This script records where the time of a CV generation goes: YAML parsing, each section function of the builder and the file write.
+
+Description
+-----------
+
+A `Tracer` is activated with a `with` block. While it is active, the instrumented steps of `CVData` and `cvBuilder` report to it, through the `trace` context manager, their wall time, the number of bytes of HTML they produced or wrote, and the memory they allocated (measured with `tracemalloc`). Steps running several times, such as the writes of the page fragments, are accumulated under the same name.
+
+The active tracer is held in a context variable, so that it only sees the steps run by the code that activated it, even when other threads render at the same time. When no tracer is active, `trace` does nothing and the generated HTML is the same as without profiling.
+
+Modules and Functions
+---------------------
+
+- `StageStats`: The accumulated measures of one traced step.
+- `Tracer`: Records the traced steps run while it is active.
+- `trace(name)`: Context manager measuring a step for the active tracer, if any.
+- `current_tracer()`: Returns the active tracer, or None.
+
+Usage
+-----
+
+Example:
+    with Tracer() as tracer:
+        generate_html(CVData('my_cv.yml'), 'my_style.css', '../output')
+    print(tracer.format_table())
+
+or, from the command line:
+    python cvMain.py my_cv.yml --profile profile.json
+    python cvMain.py my_cv.yml --profile profile.pstats
+
+"""
+import contextvars
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+
+
+# =================== VARIABLES ===================
+# The tracer of the current context, set by `Tracer.__enter__`
+_CURRENT_TRACER = contextvars.ContextVar('cv_tracer', default=None)
+# The innermost running span of the current context, set by `Tracer.span`
+_CURRENT_SPAN = contextvars.ContextVar('cv_span', default=None)
+
+
+# =================== CLASSES ===================
+@dataclass
+class StageStats:
+    """
+    The accumulated measures of one traced step.
+
+    Attributes:
+        name (str): Name of the step, such as 'adding_work_experience'.
+        calls (int): Number of times the step ran.
+        seconds (float): Total wall time of the step.
+        bytes (int): Total size of the HTML produced or written by the step, UTF-8 encoded.
+        allocated (int): Largest amount of memory allocated during one run of the step, in bytes, 0 if allocations are not traced.
+    """
+    name: str
+    calls: int = 0
+    seconds: float = 0.0
+    bytes: int = 0
+    allocated: int = 0
+
+
+class _Span:
+    """A running step, whose `bytes` attribute can be set by the traced code."""
+    __slots__ = ('bytes', 'peak')
+
+    def __init__(self):
+        self.bytes = 0
+        # Highest traced memory reached before a nested span reset the tracemalloc peak
+        self.peak = 0
+
+
+class Tracer:
+    """
+    Records the traced steps run while it is active.
+
+    Traced steps can be nested, such as each section inside the write of the page: a step resets
+    the `tracemalloc` peak to measure its own allocations, and the peak reached so far by the
+    enclosing step is kept aside first, so that the enclosing step still includes it. The allocations of steps running at the same time in several threads, such as the output
+    formats of `cvRenderers.render_formats`, are counted in each of them.
+
+    Attributes:
+        allocations (bool): True if allocations are measured with `tracemalloc`.
+        stages (Dict[str, StageStats]): The measures of each step, in the order the steps first ran.
+        elapsed (float): Wall time during which the tracer was active, in seconds.
+    """
+
+    def __init__(self, allocations=True):
+        """
+        :param allocations: If True, allocations are measured. Tracing allocations slows the traced code down, so the wall times are lower without it.
+        """
+        self.allocations = allocations
+        self.stages = {}
+        self.elapsed = 0.0
+        self._token = None
+        self._started = None
+        self._stop_tracemalloc = False
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        if self.allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._stop_tracemalloc = True
+        self._token = _CURRENT_TRACER.set(self)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.elapsed += time.perf_counter() - self._started
+        _CURRENT_TRACER.reset(self._token)
+        if self._stop_tracemalloc:
+            tracemalloc.stop()
+            self._stop_tracemalloc = False
+
+    def record(self, name, seconds, nbytes=0, allocated=0):
+        """
+        Adds one run of a step to its measures.
+
+        :param name: Name of the step.
+        :param seconds: Wall time of the run.
+        :param nbytes: Size in bytes of the HTML produced or written by the run.
+        :param allocated: Memory allocated during the run, in bytes.
+        """
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats(name)
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.bytes += nbytes
+            stats.allocated = max(stats.allocated, allocated)
+
+    @contextmanager
+    def span(self, name):
+        """
+        Measures the step run in the `with` block.
+
+        :param name: Name of the step.
+        :return: A context manager giving the span, whose `bytes` attribute can be set to the size of the produced HTML.
+        """
+        span = _Span()
+        outer = _CURRENT_SPAN.get()
+        tracing = self.allocations and tracemalloc.is_tracing()
+        if tracing:
+            start_memory, peak = tracemalloc.get_traced_memory()
+            if outer is not None:
+                outer.peak = max(outer.peak, peak)
+            tracemalloc.reset_peak()
+        token = _CURRENT_SPAN.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            seconds = time.perf_counter() - start
+            _CURRENT_SPAN.reset(token)
+            allocated = 0
+            if tracing:
+                peak = max(span.peak, tracemalloc.get_traced_memory()[1])
+                if outer is not None:
+                    outer.peak = max(outer.peak, peak)
+                allocated = peak - start_memory
+            self.record(name, seconds, span.bytes, allocated)
+
+    def to_dict(self):
+        """
+        Returns the measures as a dictionary that can be serialized to JSON.
+
+        :return: A dictionary with the total elapsed time and the list of steps.
+        """
+        return {
+            'elapsed': self.elapsed,
+            'allocations': self.allocations,
+            'stages': [asdict(stats) for stats in self.stages.values()],
+        }
+
+    def dump(self, path):
+        """
+        Writes the measures to a JSON file.
+
+        :param path: Path of the JSON file.
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def format_table(self):
+        """
+        Formats the measures as a text table, with the share of each step in the elapsed time.
+
+        :return: The table as a string.
+        """
+        lines = [f"{'step':<28} {'calls':>6} {'time (ms)':>11} {'share':>7} {'bytes':>10} {'alloc (KiB)':>12}"]
+        for stats in self.stages.values():
+            share = stats.seconds / self.elapsed * 100 if self.elapsed else 0.0
+            lines.append(f"{stats.name:<28} {stats.calls:>6} {stats.seconds * 1000:>11.3f} {share:>6.1f}% "
+                         f"{stats.bytes:>10} {stats.allocated / 1024:>12.1f}")
+        return '\n'.join(lines)
+
+
+# =================== FUNCTIONS ===================
+
+def current_tracer():
+    """
+    Returns the tracer active in the current context.
+
+    :return: The active `Tracer`, or None.
+    """
+    return _CURRENT_TRACER.get()
+
+
+@contextmanager
+def trace(name):
+    """
+    Measures the step run in the `with` block for the active tracer, if any.
+
+    :param name: Name of the step.
+    :return: A context manager giving the span of the step, or None when no tracer is active.
+    """
+    tracer = _CURRENT_TRACER.get()
+    if tracer is None:
+        yield None
+        return
+    with tracer.span(name) as span:
+        yield span
@@ -0,0 +1,432 @@
+"""
+CV Renderers Script
+====================
+
+Author: Hugo REIF FAUDEMER
+Creation Date: 07/05/2023
+Purpose: This script renders a CV to several output formats from a single load of its data: HTML for people, and Markdown, plain text and JSON Resume for applicant tracking systems and other tools.
+
+Description
+-----------
+
+Every output format is a `Renderer` backend with the same interface: `render(cv)` returns the document as a string and `write(cv, output_path)` writes it next to the other outputs, named like the HTML page with the extension of the format. The HTML backend wraps the section functions of `cvBuilder` (and the render cache, stylesheet and locale fan-out and asset inlining when configured), the other backends read the typed records of `CVData` directly.
+
+`render_formats` writes any subset of the formats from one `CVData` instance, the YAML file being parsed once. The backends run concurrently on a thread pool; they only read the `CVData`, which is immutable once loaded.
+
+The available formats are:
+    - `html`: the styled HTML page of `cvBuilder`.
+    - `markdown`: a Markdown document ('.md').
+    - `text`: a plain text document wrapped at 80 columns ('.txt').
+    - `json`: a JSON Resume document (https://jsonresume.org/schema/, '.json'). Projects carried out in a job become highlights of the job, the personal projects go to `projects` and the hobbies to `interests`.
+
+Modules and Functions
+---------------------
+
+- `Renderer`: Abstract base class of the output format backends.
+- `HtmlRenderer`: The HTML page, rendered by `cvBuilder`.
+- `MarkdownRenderer`: A Markdown document.
+- `TextRenderer`: A plain text document.
+- `JsonResumeRenderer`: A JSON Resume document.
+- `create_renderer(name, **options)`: Creates the backend of an output format.
+- `render_formats(cv, renderers, output_path, workers)`: Writes several output formats of a CV concurrently.
+
+Global Variables
+----------------
+
+- `G_RENDERERS`: Maps the name of each output format to its backend class.
+- `G_RENDERERS_CONFIG`: A dictionary holding the settings of the backends.
+
+Usage
+-----
+
+Example:
+    python cvMain.py my_cv.yml --format html markdown text json
+
+"""
+import contextvars
+import json
+import os
+import textwrap
+from abc import ABC, abstractmethod
+
+from cvBuilder import (generate_html, generate_html_styles, generate_html_locales, render_html, html_output_filename,
+                       atomic_open)
+from cvIcons import detect_platform, link_url, platform_label
+from cvProfile import trace
+from cvTemplates import check_url
+
+
+# =================== VARIABLES ===================
+"""
+G_RENDERERS_CONFIG: dict
+
+A dictionary holding the settings of the backends.
+
+Attributes:
+    text_width (int): Width at which the plain text output is wrapped.
+    workers (int): Maximum number of formats rendered at once by `render_formats`.
+"""
+G_RENDERERS_CONFIG = {
+    'text_width': 80,
+    'workers': 4,
+}
+
+# Characters with a meaning in Markdown inline text
+_MARKDOWN_SPECIAL = str.maketrans({char: '\\' + char for char in '\\`*_[]<>#|'})
+# Characters ending a Markdown link destination or autolink, percent-encoded in the URLs
+_MARKDOWN_URL = str.maketrans({char: f'%{ord(char):02X}' for char in ' \t\r\n()<>\\'})
+
+
+# =================== CLASSES ===================
+class Renderer(ABC):
+    """
+    Abstract base class of the output format backends, which implement `render`.
+
+    Attributes:
+        name (str): Name of the format, as given on the command line.
+        extension (str): Extension of the written files.
+    """
+    name = ''
+    extension = ''
+
+    @abstractmethod
+    def render(self, cv):
+        """
+        Renders a CV to a document of the format.
+
+        :param cv: The `CVData` to render.
+        :return: The document.
+        :rtype: str
+        """
+
+    def output_filename(self, cv):
+        """
+        Returns the name of the file written for a CV, the name of the HTML page with the extension of the format.
+
+        :param cv: The `CVData` to render.
+        :return: The file name, such as 'CV_Your_Name.md'.
+        """
+        return os.path.splitext(html_output_filename(cv.get_personal_info()))[0] + self.extension
+
+    def write(self, cv, output_path):
+        """
+        Renders a CV and writes it atomically to the output directory.
+
+        :param cv: The `CVData` to render.
+        :param output_path: Directory where the file is written.
+        :return: The list of written paths.
+        """
+        path = os.path.join(output_path, self.output_filename(cv))
+        with trace(f"render:{self.name}"):
+            content = self.render(cv)
+        with atomic_open(path) as f:
+            f.write(content)
+        return [path]
+
+
+class HtmlRenderer(Renderer):
+    """
+    The HTML page, rendered by the section functions of `cvBuilder`.
+
+    Attributes:
+        css_files (List[str]): The stylesheets, one page is written per stylesheet.
+        assets (AssetCache): Optional `cvAssets.AssetCache` embedding the stylesheet and photo in the page.
+        cache (RenderCache): Optional `cvCache.RenderCache` reusing the pages of unchanged CVs.
+        minify (bool): True if the page is rendered with minified templates.
+        locales (List[str]): The locale codes, one page is written per locale when there are several, with the first stylesheet. Empty for the default locale.
+    """
+    name = 'html'
+    extension = '.html'
+
+    def __init__(self, css_files, assets=None, cache=None, minify=False, locales=None):
+        self.css_files = [css_files] if isinstance(css_files, str) else list(css_files)
+        self.assets = assets
+        self.cache = cache
+        self.minify = minify
+        self.locales = [locales] if isinstance(locales, str) else list(locales or ())
+
+    def render(self, cv, output_path='.'):
+        """
+        Renders the page of a CV with the first stylesheet, in the first locale.
+
+        :param cv: The `CVData` to render.
+        :param output_path: Directory the page is meant for, from which the photo path is resolved when the assets are embedded, as in `write`.
+        :return: The HTML document.
+        :rtype: str
+        """
+        css_file = self.css_files[0]
+        css_content = self.assets.stylesheet(css_file) if self.assets is not None else None
+        locale = self.locales[0] if self.locales else None
+        html_content = render_html(cv, css_file, css_content, self.minify, locale)
+        return self.assets.inline(html_content, output_path) if self.assets is not None else html_content
+
+    def write(self, cv, output_path):
+        if len(self.locales) > 1:
+            generate = self.cache.generate_html_locales if self.cache is not None else generate_html_locales
+            return generate(cv, self.css_files[0], output_path, self.locales, assets=self.assets, minify=self.minify)
+        locale = self.locales[0] if self.locales else None
+        if len(self.css_files) > 1:
+            generate = self.cache.generate_html_styles if self.cache is not None else generate_html_styles
+            return generate(cv, self.css_files, output_path, assets=self.assets, minify=self.minify, locale=locale)
+        generate = self.cache.generate_html if self.cache is not None else generate_html
+        return [generate(cv, self.css_files[0], output_path, assets=self.assets, minify=self.minify, locale=locale)]
+
+
+class MarkdownRenderer(Renderer):
+    """A Markdown document, with one heading per section."""
+    name = 'markdown'
+    extension = '.md'
+
+    @staticmethod
+    def _escape(value):
+        return str(value).translate(_MARKDOWN_SPECIAL)
+
+    def render(self, cv):
+        e = self._escape
+        info = cv.personal_info
+        lines = [f"# {e(info.name or '')}", '']
+        contact = [f"**{e(info.job)}**" if info.job else '']
+        contact += [e(value) for value in (info.email, info.phone_number) if value]
+        if any(contact):
+            lines += [' · '.join(part for part in contact if part), '']
+
+        if cv.work_experience:
+            lines += ['## Experience', '']
+            for job in cv.work_experience:
+                lines.append(f"### {e(job.job_title or 'Job Title')} - {e(job.company_name or 'Company Name')}")
+                lines.append(f"*{e(job.employment_dates_start or 'Start Date')} - {e(job.employment_dates_end or 'End Date')}*")
+                lines += ['', e(job.job_description or ''), '']
+                for project in job.projects:
+                    lines.append(f"- **{e(project.project_name or 'Project Name')}** ({e(project.client or 'Client')}): "
+                                 f"{e(project.project_description or '')}")
+                if job.projects:
+                    lines.append('')
+
+        if cv.education:
+            lines += ['## Education', '']
+            for entry in cv.education:
+                lines.append(f"### {e(entry.degree or 'Degree')}")
+                lines.append(f"*{e(entry.university_name or 'University Name')} - "
+                             f"{e(entry.attendance_dates_start or 'Start Date')} - {e(entry.attendance_dates_end or 'End Date')}*")
+                lines += ['', e(entry.study_description or ''), '']
+
+        if cv.personal_projects:
+            lines += ['## Projects & Achievements', '']
+            for project in cv.personal_projects:
+                title = e(project.project_title or 'Project Title')
+                link = _markdown_url(project.project_link) if project.project_link else None
+                lines.append(f"### [{title}]({link})" if link else f"### {title}")
+                lines += ['', e(project.project_description or ''), '']
+
+        for title, names in (('Skills', cv.skills), ('Hobbies', cv.hobbies)):
+            names = [name for name in names if name is not None]
+            if names:
+                lines += [f"## {title}", ''] + [f"- {e(name)}" for name in names] + ['']
+
+        if cv.social_links:
+            lines += ['## Links', '']
+            for link in cv.social_links:
+                network = _network(link.url)
+                url = _markdown_url(link_url(link.url))
+                text = f"<{url}>" if url else e(link.url)
+                lines.append(f"- {e(network)}: {text}" if network else f"- {text}")
+            lines.append('')
+        return _join_lines(lines)
+
+
+class TextRenderer(Renderer):
+    """A plain text document, wrapped at `G_RENDERERS_CONFIG['text_width']` columns."""
+    name = 'text'
+    extension = '.txt'
+
+    def __init__(self, width=None):
+        self.width = width or G_RENDERERS_CONFIG['text_width']
+
+    def _wrap(self, text, indent=''):
+        return textwrap.fill(str(text), self.width, initial_indent=indent, subsequent_indent=indent) if text else ''
+
+    def render(self, cv):
+        info = cv.personal_info
+        lines = [str(info.name or ''), '=' * len(str(info.name or ''))]
+        lines += [str(value) for value in (info.job, info.email, info.phone_number) if value]
+        lines.append('')
+
+        def _heading(title):
+            lines.extend([title.upper(), '-' * len(title), ''])
+
+        if cv.work_experience:
+            _heading('Experience')
+            for job in cv.work_experience:
+                lines.append(f"{job.job_title or 'Job Title'} - {job.company_name or 'Company Name'} "
+                             f"({job.employment_dates_start or 'Start Date'} - {job.employment_dates_end or 'End Date'})")
+                lines.append(self._wrap(job.job_description, '  '))
+                for project in job.projects:
+                    lines.append(self._wrap(f"* {project.project_name or 'Project Name'} ({project.client or 'Client'}): "
+                                            f"{project.project_description or ''}", '    '))
+                lines.append('')
+
+        if cv.education:
+            _heading('Education')
+            for entry in cv.education:
+                lines.append(f"{entry.degree or 'Degree'} - {entry.university_name or 'University Name'} "
+                             f"({entry.attendance_dates_start or 'Start Date'} - {entry.attendance_dates_end or 'End Date'})")
+                lines += [self._wrap(entry.study_description, '  '), '']
+
+        if cv.personal_projects:
+            _heading('Projects & Achievements')
+            for project in cv.personal_projects:
+                lines.append(str(project.project_title or 'Project Title'))
+                lines.append(self._wrap(project.project_description, '  '))
+                if project.project_link:
+                    lines.append(f"  {project.project_link}")
+                lines.append('')
+
+        for title, names in (('Skills', cv.skills), ('Hobbies', cv.hobbies)):
+            names = [str(name) for name in names if name is not None]
+            if names:
+                _heading(title)
+                lines += [self._wrap(', '.join(names)), '']
+
+        if cv.social_links:
+            _heading('Links')
+            for link in cv.social_links:
+                network = _network(link.url)
+                lines.append(f"{network}: {link.url}" if network else link.url)
+            lines.append('')
+        return _join_lines(lines)
+
+
+class JsonResumeRenderer(Renderer):
+    """A JSON Resume document, see https://jsonresume.org/schema/."""
+    name = 'json'
+    extension = '.json'
+
+    @staticmethod
+    def _compact(mapping):
+        """Removes the empty fields, which JSON Resume consumers expect to be absent."""
+        return {key: value for key, value in mapping.items() if value not in (None, '', [], {})}
+
+    def to_dict(self, cv):
+        """
+        Converts a CV to a JSON Resume document.
+
+        :param cv: The `CVData` to convert.
+        :return: The document, as a dictionary.
+        """
+        c = self._compact
+        info = cv.personal_info
+        return c({
+            'basics': c({
+                'name': info.name,
+                'label': info.job,
+                'image': info.photo_url,
+                'email': info.email,
+                'phone': info.phone_number,
+                'profiles': [c({'network': _network(link.url), 'url': link_url(link.url)}) for link in cv.social_links],
+            }),
+            'work': [c({
+                'name': job.company_name,
+                'position': job.job_title,
+                'startDate': job.employment_dates_start,
+                'endDate': job.employment_dates_end,
+                'summary': job.job_description,
+                'highlights': [
+                    ': '.join(str(part) for part in (
+                        f"{project.project_name or 'Project Name'} ({project.client})" if project.client else project.project_name,
+                        project.project_description) if part)
+                    for project in job.projects
+                ],
+            }) for job in cv.work_experience],
+            'education': [c({
+                'institution': entry.university_name,
+                'studyType': entry.degree,
+                'startDate': entry.attendance_dates_start,
+                'endDate': entry.attendance_dates_end,
+                'summary': entry.study_description,
+            }) for entry in cv.education],
+            'projects': [c({
+                'name': project.project_title,
+                'description': project.project_description,
+                'url': project.project_link,
+            }) for project in cv.personal_projects],
+            'skills': [{'name': name} for name in cv.skills if name is not None],
+            'interests': [{'name': name} for name in cv.hobbies if name is not None],
+        })
+
+    def render(self, cv):
+        return json.dumps(self.to_dict(cv), indent=2, ensure_ascii=False, default=str) + '\n'
+
+
+"""
+G_RENDERERS: dict
+
+Maps the name of each output format to its backend class, in the order the formats are listed in the command line help.
+"""
+G_RENDERERS = {
+    renderer.name: renderer
+    for renderer in (HtmlRenderer, MarkdownRenderer, TextRenderer, JsonResumeRenderer)
+}
+
+
+# =================== FUNCTIONS ===================
+
+def _join_lines(lines):
+    """Joins the lines of a document, collapsing the runs of empty lines left by missing fields."""
+    kept = [line for i, line in enumerate(lines) if line or (i and lines[i - 1])]
+    return '\n'.join(kept).strip('\n') + '\n'
+
+
+def _markdown_url(url):
+    """Returns a URL as a Markdown link destination, None if its scheme is not safe (see `cvTemplates.check_url`)."""
+    url = check_url(url)
+    return url.translate(_MARKDOWN_URL) if url else None
+
+
+def _network(url):
+    """Returns the name of the network of a social link, such as 'GitHub', None for websites and email addresses."""
+    platform = detect_platform(url)
+    return None if platform in ('website', 'email') else platform_label(platform)
+
+
+def create_renderer(name, css_files=None, assets=None, cache=None, minify=False, locales=None):
+    """
+    Creates the backend of an output format.
+
+    :param name: Name of the format, a key of `G_RENDERERS`.
+    :param css_files: Stylesheet(s) of the HTML format, required for it.
+    :param assets: Optional `cvAssets.AssetCache` of the HTML format.
+    :param cache: Optional `cvCache.RenderCache` of the HTML format.
+    :param minify: If True, the HTML format is rendered with minified templates.
+    :param locales: Optional locale code(s) of the HTML format, see `HtmlRenderer`.
+    :return: The `Renderer`.
+    :raises ValueError: If the format is unknown, or if no stylesheet is given for the HTML format.
+    """
+    if name not in G_RENDERERS:
+        raise ValueError(f"Unknown output format '{name}', expected one of {', '.join(G_RENDERERS)}")
+    if name == HtmlRenderer.name:
+        if not css_files:
+            raise ValueError("The HTML format needs a stylesheet")
+        return HtmlRenderer(css_files, assets, cache, minify, locales)
+    return G_RENDERERS[name]()
+
+
+def render_formats(cv, renderers, output_path, workers=None):
+    """
+    Writes several output formats of a CV concurrently.
+
+    :param cv: The `CVData` to render, loaded once for all the formats.
+    :param renderers: The `Renderer` of each format to write.
+    :param output_path: Directory where the files are written.
+    :param workers: Maximum number of formats rendered at once, defaults to `G_RENDERERS_CONFIG['workers']`.
+    :return: A dictionary mapping each format name to the list of its written paths, in the order of `renderers`.
+    """
+    if len(renderers) == 1:
+        return {renderers[0].name: renderers[0].write(cv, output_path)}
+    # Imported here as a single format, the common case, needs no thread pool
+    from concurrent.futures import ThreadPoolExecutor
+    workers = workers or G_RENDERERS_CONFIG['workers']
+    with ThreadPoolExecutor(max_workers=min(workers, len(renderers)), thread_name_prefix='cv-render') as executor:
+        # Each backend runs in a copy of the caller context, so that an active `cvProfile.Tracer` sees it
+        futures = [(renderer.name, executor.submit(contextvars.copy_context().run, renderer.write, cv, output_path))
+                   for renderer in renderers]
+        return {name: future.result() for name, future in futures}
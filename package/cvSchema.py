@@ -0,0 +1,344 @@
+"""
+CV Schema Script
+=================
+
+Author: Hugo REIF FAUDEMER
+Creation Date: 07/05/2023
+Purpose: This script validates and normalizes the CV documents against a declarative schema matching `templates/template.yml`, before any rendering work.
+
+Description
+-----------
+
+The schema of each version is a tree of plain dictionaries:
+    - `{'type': 'mapping', 'fields': {...}}`: a mapping whose known keys are checked, other keys are kept as they are.
+    - `{'type': 'list', 'items': {...}}`: a list whose items are all checked against the same schema.
+    - `{'type': 'text'}`: a scalar. Strings are kept, numbers and dates (such as `2020` or `2020-09-01`, which YAML does not load as strings) are converted to strings, anything else is an error.
+    - `{'type': 'flag'}`: a boolean, such as the `page_break` flag of the entries (see `cvLayout.py`).
+    - `{'type': 'table', 'values': {...}}`: a mapping with any keys, whose values are all checked against the same schema, such as the `translations` of the entries, keyed on locale codes (see `cvLocales.py`).
+Each field may set `required: True`: the key must then be present and its value must not be null or an empty string, unless `nullable: True` also allows a null value. Optional fields set to null are left out of the normalized document, as if they were missing.
+
+A schema is compiled once into nested closures: the field lists, the required keys and the path suffix of each field are resolved at compile time, so that checking a document only walks the document. Error paths are only formatted when an error is reported. Mappings and lists are copied only when one of their values is normalized, the document is returned as it is otherwise. All the errors of a document are collected in one pass, each one prefixed by the path of the faulty value (e.g. `cv.work_experience[2].job_title: missing required key`).
+
+A document may declare the schema version it follows with a top-level `schema_version` key, the latest version `G_SCHEMA_VERSION` is assumed otherwise. Compiled validators are cached per version.
+
+Modules and Functions
+---------------------
+
+- `compile_schema(schema)`: Compiles a declarative schema into a validator function.
+- `get_validator(version)`: Returns the compiled validator of a schema version, compiled on first use.
+- `validate_cv(data)`: Validates and normalizes a parsed CV document against the schema version it declares.
+
+Global Variables
+----------------
+
+- `G_SCHEMA_VERSION`: The latest version of the CV schema.
+- `G_CV_SCHEMAS`: The declarative schema of each version.
+
+Usage
+-----
+
+Example:
+    data, errors = validate_cv(parse_yaml(open('my_cv.yml', 'rb')))
+    for error in errors:
+        print(error)
+
+or, to check a whole batch without rendering it:
+    python cvBatch.py ../candidates/ --check
+
+"""
+import datetime
+
+
+# =================== VARIABLES ===================
+"""
+G_SCHEMA_VERSION: int
+
+The latest version of the CV schema, assumed for the documents without a `schema_version` key.
+"""
+G_SCHEMA_VERSION = 1
+
+_TEXT = {'type': 'text'}
+_REQUIRED_TEXT = {'type': 'text', 'required': True}
+_FLAG = {'type': 'flag'}
+
+
+def _translations(*fields):
+    """Returns the schema of the `translations` of an entry: the given text fields, for each locale code."""
+    return {'type': 'table', 'values': {'type': 'mapping', 'fields': {field: _TEXT for field in fields}}}
+
+
+"""
+G_CV_SCHEMAS: dict
+
+The declarative schema of each version, see the description of the module.
+
+Attributes:
+    1: The structure of `templates/template.yml`. The fields the builder cannot render without, such as the name and job of the personal information or the title of each entry, are required. The entries of the main column may start a new page with `page_break: true`, and the personal information and the entries may declare their language with `lang` and carry `translations` of their text fields.
+"""
+G_CV_SCHEMAS = {
+    1: {'type': 'mapping', 'fields': {
+        'schema_version': {'type': 'version'},
+        'cv': {'type': 'mapping', 'required': True, 'fields': {
+            'personal_info': {'type': 'mapping', 'required': True, 'fields': {
+                'name': _REQUIRED_TEXT,
+                'job': _REQUIRED_TEXT,
+                'email': _TEXT,
+                'phone_number': _TEXT,
+                'photo_url': _TEXT,
+                'translations': _translations('name', 'job'),
+            }},
+            'work_experience': {'type': 'list', 'items': {'type': 'mapping', 'fields': {
+                'job_title': _REQUIRED_TEXT,
+                'company_name': _REQUIRED_TEXT,
+                'employment_dates_start': _TEXT,
+                'employment_dates_end': _TEXT,
+                'job_description': _TEXT,
+                'page_break': _FLAG,
+                'lang': _TEXT,
+                'translations': _translations('job_title', 'company_name', 'employment_dates_start',
+                                              'employment_dates_end', 'job_description'),
+                'projects': {'type': 'list', 'items': {'type': 'mapping', 'fields': {
+                    'project_name': _REQUIRED_TEXT,
+                    'client': _TEXT,
+                    'project_description': _TEXT,
+                    'translations': _translations('project_name', 'client', 'project_description'),
+                }}},
+            }}},
+            'education': {'type': 'list', 'items': {'type': 'mapping', 'fields': {
+                'degree': _REQUIRED_TEXT,
+                'university_name': _REQUIRED_TEXT,
+                'attendance_dates_start': _TEXT,
+                'attendance_dates_end': _TEXT,
+                'study_description': _TEXT,
+                'page_break': _FLAG,
+                'lang': _TEXT,
+                'translations': _translations('degree', 'university_name', 'attendance_dates_start',
+                                              'attendance_dates_end', 'study_description'),
+            }}},
+            'personal_projects': {'type': 'list', 'items': {'type': 'mapping', 'fields': {
+                'project_title': _REQUIRED_TEXT,
+                'project_description': _TEXT,
+                'project_link': _TEXT,
+                'page_break': _FLAG,
+                'lang': _TEXT,
+                'translations': _translations('project_title', 'project_description', 'project_link'),
+            }}},
+            # Entries without a value are skipped by the builder
+            'skills': {'type': 'list', 'items': {'type': 'mapping', 'fields': {
+                'skill': {'type': 'text', 'required': True, 'nullable': True},
+            }}},
+            'hobbies': {'type': 'list', 'items': {'type': 'mapping', 'fields': {
+                'hobbie': {'type': 'text', 'required': True, 'nullable': True},
+            }}},
+            'social_links': {'type': 'list', 'items': {'type': 'mapping', 'fields': {
+                'url': _REQUIRED_TEXT,
+                'page_break': _FLAG,
+            }}},
+        }},
+    }},
+}
+
+# Compiled validator of each schema version, filled by `get_validator`
+_VALIDATORS = {}
+
+
+# =================== FUNCTIONS ===================
+
+def _type_name(value):
+    """Returns the YAML name of the type of a value, for error messages."""
+    if value is None:
+        return 'null'
+    if isinstance(value, dict):
+        return 'mapping'
+    if isinstance(value, list):
+        return 'list'
+    return type(value).__name__
+
+
+def _format_path(path):
+    """
+    Formats the path of a value, only when an error is reported.
+
+    Paths are built while walking the document as nested (parent, step) tuples, which is much
+    cheaper than formatting a string for every value. A step is a '.key' suffix or a list index.
+    """
+    steps = []
+    while isinstance(path, tuple):
+        path, step = path
+        steps.append(f"[{step}]" if isinstance(step, int) else step)
+    steps.append(path)
+    return ''.join(reversed(steps))
+
+
+def _compile_text(schema):
+    def check(value, path, errors):
+        if type(value) is str:
+            return value
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        if isinstance(value, datetime.date):
+            return value.isoformat()
+        errors.append(f"{_format_path(path)}: must be a string, got {_type_name(value)}")
+        return value
+    return check
+
+
+def _compile_version(schema):
+    def check(value, path, errors):
+        if isinstance(value, bool) or not isinstance(value, int):
+            errors.append(f"{_format_path(path)}: must be an integer, got {_type_name(value)}")
+        return value
+    return check
+
+
+def _compile_flag(schema):
+    def check(value, path, errors):
+        if not isinstance(value, bool):
+            errors.append(f"{_format_path(path)}: must be true or false, got {_type_name(value)}")
+        return value
+    return check
+
+
+def _compile_list(schema):
+    check_item = _compile_node(schema['items'])
+
+    def check(value, path, errors):
+        if not isinstance(value, list):
+            errors.append(f"{_format_path(path)}: must be a list, got {_type_name(value)}")
+            return value
+        checked = [check_item(item, (path, i), errors) for i, item in enumerate(value)]
+        # The list is kept as it is when none of its items was normalized
+        return value if all(item is original for item, original in zip(checked, value)) else checked
+    return check
+
+
+def _compile_table(schema):
+    check_value = _compile_node(schema['values'])
+
+    def check(value, path, errors):
+        if not isinstance(value, dict):
+            errors.append(f"{_format_path(path)}: must be a mapping, got {_type_name(value)}")
+            return value
+        checked = {key: check_value(item, (path, f".{key}"), errors) for key, item in value.items()}
+        # The mapping is kept as it is when none of its values was normalized
+        return value if all(checked[key] is item for key, item in value.items()) else checked
+    return check
+
+
+def _compile_mapping(schema):
+    # (key, path suffix, check, required, nullable, text) of each field, resolved once
+    fields = tuple(
+        (key, f".{key}", _compile_node(field), field.get('required', False), field.get('nullable', False),
+         field['type'] == 'text')
+        for key, field in schema['fields'].items()
+    )
+
+    def check(value, path, errors):
+        if not isinstance(value, dict):
+            errors.append(f"{_format_path(path)}: must be a mapping, got {_type_name(value)}")
+            return value
+        # The mapping is only copied if one of its fields is normalized
+        normalized = value
+        for key, suffix, check_field, required, nullable, text in fields:
+            field = value.get(key)
+            if field is None:
+                if not required:
+                    if key in value:
+                        if normalized is value:
+                            normalized = dict(value)
+                        del normalized[key]
+                elif key not in value:
+                    errors.append(f"{_format_path((path, suffix))}: missing required key")
+                elif not nullable:
+                    errors.append(f"{_format_path((path, suffix))}: must not be empty")
+                continue
+            if type(field) is str:
+                if required and not field:
+                    errors.append(f"{_format_path((path, suffix))}: must not be empty")
+                    continue
+                # Strings are valid text as they are, without calling the text check
+                if text:
+                    continue
+            checked = check_field(field, (path, suffix), errors)
+            if checked is not field:
+                if normalized is value:
+                    normalized = dict(value)
+                normalized[key] = checked
+        return normalized
+    return check
+
+
+_COMPILERS = {
+    'mapping': _compile_mapping,
+    'list': _compile_list,
+    'text': _compile_text,
+    'version': _compile_version,
+    'flag': _compile_flag,
+    'table': _compile_table,
+}
+
+# Check of the `schema_version` key, run before the validator of the version is chosen
+_check_version = _compile_version({'type': 'version'})
+
+
+def _compile_node(schema):
+    """Compiles one node of a schema, dispatching on its type."""
+    try:
+        compiler = _COMPILERS[schema['type']]
+    except KeyError:
+        raise ValueError(f"Unknown schema type: {schema.get('type')!r}") from None
+    return compiler(schema)
+
+
+def compile_schema(schema):
+    """
+    Compiles a declarative schema into a validator function.
+
+    :param schema: The schema of the whole document, see the description of the module.
+    :return: A function taking a parsed document and returning a (normalized document, list of errors) tuple.
+    :raises ValueError: If the schema uses an unknown type.
+    """
+    check = _compile_node(schema)
+    root = 'document'
+    prefix = f"{root}."
+
+    def validate(data):
+        errors = []
+        normalized = check(data, root, errors)
+        # Paths are reported from the root, which is only named when the document itself is invalid
+        return normalized, [error[len(prefix):] if error.startswith(prefix) else error for error in errors]
+    return validate
+
+
+def get_validator(version=None):
+    """
+    Returns the compiled validator of a schema version, compiled on first use.
+
+    :param version: The schema version, defaults to `G_SCHEMA_VERSION`.
+    :return: The validator function, see `compile_schema`.
+    :raises KeyError: If the version is unknown.
+    """
+    version = G_SCHEMA_VERSION if version is None else version
+    validator = _VALIDATORS.get(version)
+    if validator is None:
+        validator = _VALIDATORS[version] = compile_schema(G_CV_SCHEMAS[version])
+    return validator
+
+
+def validate_cv(data):
+    """
+    Validates and normalizes a parsed CV document against the schema version it declares.
+
+    :param data: The parsed document.
+    :return: A (normalized document, list of errors) tuple, the document is only usable if the list is empty.
+    """
+    version = data.get('schema_version') if isinstance(data, dict) else None
+    if version is not None:
+        # Checked before the lookup: a list is not hashable, and true would be taken for version 1
+        errors = []
+        _check_version(version, 'schema_version', errors)
+        if errors:
+            return data, errors
+        if version not in G_CV_SCHEMAS:
+            return data, [f"schema_version: unknown version {version!r}, expected one of {sorted(G_CV_SCHEMAS)}"]
+    return get_validator(version)(data)
@@ -0,0 +1,531 @@
+"""
+CV Render Server Script
+========================
+
+Author: Hugo REIF FAUDEMER
+Creation Date: 07/05/2023
+Purpose: This script runs a long-lived HTTP server that renders CVs on demand. It avoids spawning a new Python process for every preview, which costs far more than the render itself.
+
+Description
+-----------
+
+The server is built on the standard library (`http.server`) and needs no external service. Stylesheets from `styles/` are read once at startup and embedded in the returned page, and a warm-up render primes the builder before the first request. Renders run on a fixed pool of worker threads with a per-request timeout, and the server exposes its activity on a `/metrics` endpoint in the Prometheus text format.
+
+Endpoints:
+    POST /render?style=<name>&stream=<0|1>: Renders the CV sent in the request body (YAML, or JSON with a `application/json` content type) and returns the HTML page. With `stream=1`, each section is sent as soon as it is rendered.
+    GET /styles: Lists the available style names.
+    GET /metrics: Reports request counts, request rate, latency histogram, in-flight renders and queue depth.
+    GET /health: Returns 'ok' when the server is up.
+
+Modules and Functions
+---------------------
+
+- `StyleRegistry`: Preloads the stylesheets of a directory and serves them by name.
+- `ServerMetrics`: Thread-safe request counters and latency histogram.
+- `RenderService`: Parses request bodies and runs the renders on the worker pool with a timeout.
+- `CVRequestHandler`: HTTP request handler routing the endpoints.
+- `create_server(host, port, styles_dir, workers, timeout)`: Builds a ready-to-serve HTTP server.
+
+Global Variables
+----------------
+
+- `G_SERVER_CONFIG`: A dictionary holding the default server settings.
+
+Usage
+-----
+
+Start the server, then post a CV to it:
+
+Example:
+    python cvServer.py --port 8000 --workers 4 --timeout 5
+    curl --data-binary @../templates/template.yml "http://127.0.0.1:8000/render?style=style02"
+
+"""
+import argparse
+import bisect
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from cvBuilder import render_html, iter_html, CVData
+from cvDataClass import parse_yaml
+from cvTemplates import data_path
+
+
+# =================== VARIABLES ===================
+"""
+G_SERVER_CONFIG: dict
+
+A dictionary holding the default server settings.
+
+Attributes:
+    host (str): Address the server listens on.
+    port (int): Port the server listens on.
+    workers (int): Number of render worker threads.
+    timeout (float): Maximum time in seconds a request waits for its render.
+    styles_dir (str): Directory containing the stylesheets to preload.
+    default_style (str): Style used when the request does not name one.
+    max_body_size (int): Largest accepted request body, in bytes.
+    warmup_file (str): CV rendered once at startup to warm the builder, skipped if missing.
+    latency_buckets (tuple): Upper bounds in seconds of the latency histogram buckets.
+    rate_window (float): Window in seconds over which the request rate is computed.
+"""
+G_SERVER_CONFIG = {
+    'host': '127.0.0.1',
+    'port': 8000,
+    'workers': 4,
+    'timeout': 10.0,
+    'styles_dir': data_path('styles'),
+    'default_style': 'style01',
+    'max_body_size': 1024 * 1024,
+    'warmup_file': data_path('templates', 'template.yml'),
+    'latency_buckets': (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+    'rate_window': 60.0,
+}
+
+
+# =================== CLASSES ===================
+class RenderError(Exception):
+    """An error returned to the client with the given HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class StyleRegistry:
+    """
+    Preloads the stylesheets of a directory and serves them by name.
+
+    Attributes:
+        styles (Dict[str, Tuple[str, str]]): Maps a style name (file name without extension) to its path and content.
+    """
+
+    def __init__(self, styles_dir):
+        """
+        Reads every CSS file of the directory.
+
+        :param styles_dir: Directory containing the stylesheets.
+        """
+        self.styles = {}
+        for name in sorted(os.listdir(styles_dir)):
+            if name.endswith('.css'):
+                path = os.path.join(styles_dir, name)
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.styles[os.path.splitext(name)[0]] = (path, f.read())
+
+    def get(self, name):
+        """
+        Returns the path and content of a style.
+
+        :param name: The style name, such as 'style01'.
+        :return: A (path, content) tuple.
+        :raises RenderError: If the style is unknown.
+        """
+        try:
+            return self.styles[name]
+        except KeyError:
+            raise RenderError(404, f"Unknown style '{name}', available: {', '.join(self.styles)}") from None
+
+
+class ServerMetrics:
+    """
+    Thread-safe request counters and latency histogram.
+
+    Attributes:
+        requests (Dict[int, int]): Number of requests per HTTP status.
+        latency_counts (List[int]): Number of requests per latency bucket, the last one counting the requests above every bound.
+        latency_sum (float): Sum of all request latencies, in seconds.
+        queued (int): Renders waiting for a free worker.
+        in_flight (int): Renders currently running.
+    """
+
+    def __init__(self, buckets=None, rate_window=None):
+        self.buckets = tuple(buckets or G_SERVER_CONFIG['latency_buckets'])
+        self.rate_window = rate_window or G_SERVER_CONFIG['rate_window']
+        self.started = time.monotonic()
+        self.requests = {}
+        self.latency_counts = [0] * (len(self.buckets) + 1)
+        self.latency_sum = 0.0
+        self.queued = 0
+        self.in_flight = 0
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def render_queued(self):
+        """Records a render submitted to the worker pool."""
+        with self._lock:
+            self.queued += 1
+
+    def render_started(self):
+        """Records a render picked up by a worker."""
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+
+    def render_cancelled(self):
+        """Records a queued render cancelled before a worker picked it up."""
+        with self._lock:
+            self.queued -= 1
+
+    def render_finished(self):
+        """Records a render completed by a worker."""
+        with self._lock:
+            self.in_flight -= 1
+
+    def observe(self, status, latency):
+        """
+        Records a completed request.
+
+        :param status: The HTTP status returned.
+        :param latency: Time spent handling the request, in seconds.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.requests[status] = self.requests.get(status, 0) + 1
+            self.latency_counts[bisect.bisect_left(self.buckets, latency)] += 1
+            self.latency_sum += latency
+            self._recent.append(now)
+            self._prune(now)
+
+    def _prune(self, now):
+        """Drops the request timestamps older than the rate window. The lock must be held."""
+        limit = now - self.rate_window
+        while self._recent and self._recent[0] < limit:
+            self._recent.popleft()
+
+    def to_prometheus(self):
+        """
+        Formats the metrics in the Prometheus text exposition format.
+
+        :return: The metrics text.
+        :rtype: str
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            window = min(self.rate_window, max(now - self.started, 1e-9))
+            lines = [
+                '# HELP smartcv_requests_total Render requests handled, by HTTP status.',
+                '# TYPE smartcv_requests_total counter',
+            ]
+            lines += [f'smartcv_requests_total{{status="{status}"}} {count}' for status, count in sorted(self.requests.items())]
+            lines += [
+                f'# HELP smartcv_request_rate Requests per second over the last {self.rate_window:g}s.',
+                '# TYPE smartcv_request_rate gauge',
+                f'smartcv_request_rate {len(self._recent) / window:.3f}',
+                '# HELP smartcv_request_duration_seconds Request latency.',
+                '# TYPE smartcv_request_duration_seconds histogram',
+            ]
+            cumulative = 0
+            for bound, count in zip(self.buckets, self.latency_counts):
+                cumulative += count
+                lines.append(f'smartcv_request_duration_seconds_bucket{{le="{bound:g}"}} {cumulative}')
+            cumulative += self.latency_counts[-1]
+            lines += [
+                f'smartcv_request_duration_seconds_bucket{{le="+Inf"}} {cumulative}',
+                f'smartcv_request_duration_seconds_sum {self.latency_sum:.6f}',
+                f'smartcv_request_duration_seconds_count {cumulative}',
+                '# HELP smartcv_queue_depth Renders waiting for a free worker.',
+                '# TYPE smartcv_queue_depth gauge',
+                f'smartcv_queue_depth {self.queued}',
+                '# HELP smartcv_in_flight Renders currently running.',
+                '# TYPE smartcv_in_flight gauge',
+                f'smartcv_in_flight {self.in_flight}',
+                '# HELP smartcv_uptime_seconds Time since the server started.',
+                '# TYPE smartcv_uptime_seconds gauge',
+                f'smartcv_uptime_seconds {now - self.started:.3f}',
+            ]
+        return '\n'.join(lines) + '\n'
+
+
+class RenderService:
+    """
+    Parses request bodies and runs the renders on a pool of worker threads.
+
+    Since `render_html` keeps no global state, the workers render concurrently without
+    sharing anything but the preloaded stylesheets.
+    """
+
+    def __init__(self, styles, workers=None, timeout=None, metrics=None):
+        """
+        :param styles: The `StyleRegistry` holding the preloaded stylesheets.
+        :param workers: Number of worker threads.
+        :param timeout: Maximum time in seconds a request waits for its render.
+        :param metrics: The `ServerMetrics` updated by the service.
+        """
+        self.styles = styles
+        self.timeout = timeout or G_SERVER_CONFIG['timeout']
+        self.metrics = metrics or ServerMetrics()
+        self.executor = ThreadPoolExecutor(max_workers=workers or G_SERVER_CONFIG['workers'], thread_name_prefix='cv-render')
+
+    @staticmethod
+    def parse_body(body, content_type):
+        """
+        Parses a CV sent as JSON or YAML.
+
+        :param body: The raw request body.
+        :param content_type: The request content type, JSON is used for 'application/json'.
+        :return: A `CVData` object.
+        :raises RenderError: If the body cannot be parsed.
+        """
+        try:
+            text = body.decode('utf-8')
+            if content_type.split(';')[0].strip() == 'application/json':
+                data = json.loads(text)
+            else:
+                data = parse_yaml(text)
+            return CVData.from_data(data)
+        except (UnicodeDecodeError, ValueError) as error:
+            raise RenderError(400, f"Invalid CV document: {error}") from None
+        except Exception as error:
+            # PyYAML is only imported by parse_yaml, see cvDataClass.py, so its errors are looked up once one is raised
+            import yaml
+            if isinstance(error, yaml.YAMLError):
+                raise RenderError(400, f"Invalid CV document: {error}") from None
+            raise
+
+    def _tracked(self, func, *args):
+        """Runs a render function on a worker thread, keeping the queue metrics up to date."""
+        self.metrics.render_started()
+        try:
+            return func(*args)
+        finally:
+            self.metrics.render_finished()
+
+    def _run(self, func, *args):
+        """
+        Runs a render function on the worker pool and waits at most `timeout` for it.
+
+        :return: The value returned by the function.
+        :raises RenderError: If the render times out.
+        """
+        self.metrics.render_queued()
+        future = self.executor.submit(self._tracked, func, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            # A render that already started cannot be interrupted, it finishes in the background
+            if future.cancel():
+                self.metrics.render_cancelled()
+            raise RenderError(504, f"Render timed out after {self.timeout:g}s") from None
+
+    def render(self, body, content_type, style_name):
+        """
+        Renders the CV of a request body.
+
+        :param body: The raw request body.
+        :param content_type: The request content type.
+        :param style_name: The name of the style to render with.
+        :return: The HTML page.
+        :raises RenderError: If the request is invalid or the render times out.
+        """
+        path, content = self.styles.get(style_name)
+        cv = self.parse_body(body, content_type)
+        return self._run(render_html, cv, path, content)
+
+    def stream(self, body, content_type, style_name, start, write):
+        """
+        Renders the CV of a request body, sending the page section by section.
+
+        The head and the profile are rendered before `start` is called, so that a failing render
+        is still reported as an error response. Errors raised later can only cut the page short.
+
+        :param body: The raw request body.
+        :param content_type: The request content type.
+        :param style_name: The name of the style to render with.
+        :param start: Callable sending the response headers, called once before the first fragment.
+        :param write: Callable sending one HTML fragment to the client.
+        :raises RenderError: If the request is invalid or the render times out.
+        """
+        path, content = self.styles.get(style_name)
+        cv = self.parse_body(body, content_type)
+
+        def _stream():
+            fragments = iter_html(cv, path, css_content=content)
+            first = [next(fragments), next(fragments)]
+            start()
+            for fragment in itertools.chain(first, fragments):
+                write(fragment)
+
+        self._run(_stream)
+
+    def warm_up(self, yaml_file=None):
+        """
+        Renders a CV once with every style, so that the first request does not pay the warm-up cost.
+
+        :param yaml_file: The CV to render, defaults to `G_SERVER_CONFIG['warmup_file']`. Skipped if the file is missing.
+        """
+        yaml_file = yaml_file or G_SERVER_CONFIG['warmup_file']
+        if not os.path.isfile(yaml_file):
+            return
+        cv = CVData(yaml_file)
+        for path, content in self.styles.styles.values():
+            render_html(cv, path, css_content=content)
+
+    def shutdown(self):
+        """Stops the worker pool."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class CVRequestHandler(BaseHTTPRequestHandler):
+    """HTTP request handler routing the server endpoints to the `RenderService`."""
+
+    # Set by `create_server`
+    service = None
+
+    def _send(self, status, body, content_type='text/plain; charset=utf-8'):
+        """Sends a complete response."""
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _content_length(self):
+        """
+        Returns the length of the request body.
+
+        :return: The value of the Content-Length header, 0 if it is missing.
+        :raises RenderError: 400 if the header is not a non-negative integer.
+        """
+        value = self.headers.get('Content-Length')
+        try:
+            length = int(value or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # The end of the body is unknown, so the connection cannot be reused
+            self.close_connection = True
+            raise RenderError(400, f"Invalid Content-Length: {value}")
+        return length
+
+    def do_GET(self):
+        """Serves the metrics, style list and health endpoints."""
+        path = urlparse(self.path).path
+        if path == '/metrics':
+            self._send(200, self.service.metrics.to_prometheus(), 'text/plain; version=0.0.4; charset=utf-8')
+        elif path == '/styles':
+            self._send(200, json.dumps(sorted(self.service.styles.styles)), 'application/json')
+        elif path == '/health':
+            self._send(200, 'ok')
+        else:
+            self._send(404, f"Unknown endpoint {path}")
+
+    def do_POST(self):
+        """Serves the render endpoint."""
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        headers_sent = False
+
+        def _start_stream():
+            nonlocal headers_sent
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.end_headers()
+            headers_sent = True
+
+        def _write_stream(fragment):
+            self.wfile.write(fragment.encode('utf-8'))
+            self.wfile.flush()
+
+        try:
+            if url.path != '/render':
+                raise RenderError(404, f"Unknown endpoint {url.path}")
+            length = self._content_length()
+            if length > G_SERVER_CONFIG['max_body_size']:
+                # The unread body would be taken for the next request
+                self.close_connection = True
+                raise RenderError(413, f"Request body larger than {G_SERVER_CONFIG['max_body_size']} bytes")
+            body = self.rfile.read(length)
+            if len(body) < length:
+                self.close_connection = True
+                raise RenderError(400, f"Request body truncated: {len(body)} of {length} bytes received")
+            query = parse_qs(url.query)
+            style_name = query.get('style', [G_SERVER_CONFIG['default_style']])[0]
+            content_type = self.headers.get('Content-Type', '')
+            if query.get('stream', ['0'])[0].lower() in ('1', 'true', 'yes'):
+                # Without a Content-Length, the end of the page is marked by closing the connection
+                self.close_connection = True
+                self.service.stream(body, content_type, style_name, _start_stream, _write_stream)
+            else:
+                html = self.service.render(body, content_type, style_name)
+                self._send(200, html, 'text/html; charset=utf-8')
+            status = 200
+        except RenderError as error:
+            status = error.status
+            if not headers_sent:
+                self._send(status, str(error))
+        except Exception as error:
+            status = 500
+            if not headers_sent:
+                self._send(status, f"Render failed: {type(error).__name__}: {error}")
+        self.service.metrics.observe(status, time.perf_counter() - start)
+
+    def log_message(self, format, *args):
+        """Logs requests on stderr only when the server runs in verbose mode."""
+        if getattr(self.server, 'verbose', False):
+            super().log_message(format, *args)
+
+
+# =================== FUNCTIONS ===================
+
+def create_server(host=None, port=None, styles_dir=None, workers=None, timeout=None, verbose=False):
+    """
+    Builds a ready-to-serve HTTP server with preloaded styles and a warm render pool.
+
+    :param host: Address to listen on.
+    :param port: Port to listen on, 0 picks a free port.
+    :param styles_dir: Directory containing the stylesheets to preload.
+    :param workers: Number of render worker threads.
+    :param timeout: Maximum time in seconds a request waits for its render.
+    :param verbose: If True, each request is logged on stderr.
+    :return: A `ThreadingHTTPServer`, call `serve_forever` to start it.
+    """
+    styles = StyleRegistry(styles_dir or G_SERVER_CONFIG['styles_dir'])
+    service = RenderService(styles, workers=workers, timeout=timeout)
+    service.warm_up()
+
+    handler = type('BoundCVRequestHandler', (CVRequestHandler,), {'service': service})
+    server = ThreadingHTTPServer((host or G_SERVER_CONFIG['host'], G_SERVER_CONFIG['port'] if port is None else port), handler)
+    server.daemon_threads = True
+    server.verbose = verbose
+    server.service = service
+    return server
+
+
+# =================== MAIN ===================
+def main(argv=None):
+    """Parses the command line and runs the server until interrupted."""
+    parser = argparse.ArgumentParser(description="Serve CV renders over HTTP.")
+    parser.add_argument('--host', default=G_SERVER_CONFIG['host'], help="Address to listen on.")
+    parser.add_argument('--port', type=int, default=G_SERVER_CONFIG['port'], help="Port to listen on.")
+    parser.add_argument('--styles', default=G_SERVER_CONFIG['styles_dir'], help="Directory of the stylesheets to preload.")
+    parser.add_argument('--workers', type=int, default=G_SERVER_CONFIG['workers'], help="Number of render worker threads.")
+    parser.add_argument('--timeout', type=float, default=G_SERVER_CONFIG['timeout'], help="Render timeout in seconds.")
+    parser.add_argument('--verbose', action='store_true', help="Log every request.")
+    args = parser.parse_args(argv)
+
+    server = create_server(args.host, args.port, args.styles, args.workers, args.timeout, args.verbose)
+    print(f"Serving on http://{server.server_address[0]}:{server.server_address[1]} "
+          f"with styles: {', '.join(server.service.styles.styles)}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
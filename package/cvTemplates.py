@@ -0,0 +1,497 @@
+"""
+CV Templates Script
+====================
+
+Author: Hugo REIF FAUDEMER
+Creation Date: 07/05/2023
+Purpose: This script loads the HTML templates of the CV sections and compiles them into Python functions, so that the markup can be changed without editing the builder code.
+
+Description
+-----------
+
+Each section of the page has a template file in the `sections/` directory, next to `styles/`. A template file holds one or more named blocks, each starting with a `<!-- block: name -->` marker. Text before the first marker is ignored and can be used for comments. Inside a block, `{{ field }}` is replaced by the value of `field`. Blocks contain no logic: loops and optional parts are handled by the builder, which renders the inner blocks first and passes their result to the outer block as a field.
+
+Every block is compiled once into a Python function returning an f-string, so rendering an entry costs a single function call. A `TemplateSet` compiles each section on first use and keeps it; `TemplateSet.reload` picks up modified template files.
+
+Fields are escaped according to where they appear in the markup, which is determined once when the block is compiled:
+    - in text, `&`, `<` and `>` are escaped, so that a value cannot open a tag.
+    - in a quoted attribute value, quotes are escaped as well, so that a value cannot close the attribute.
+    - at the start of a URL attribute (`href`, `src`...), the URL is also checked: only relative URLs and the `http:`, `https:`, `mailto:` and `tel:` schemes (and `data:image/` for images) are kept, any other URL, such as `javascript:`, is replaced by `#`.
+    - `{{ field | safe }}` inserts the value as it is. It is meant for the markup rendered from other blocks, such as the entries of a list, never for values coming from the CV.
+A field inside a tag but outside a quoted attribute value, or inside a `<script>` or `<style>` element, is rejected unless it is marked `safe`.
+
+With `minify`, the blocks go through `minify_html` before being compiled: the indentation and line breaks of the template files are stripped once, at compile time, so minified pages cost nothing more to render. The values of the CV are never modified.
+
+A style can override the markup of any section: a template file in `sections/<style name>/` (e.g. `sections/style02/experience.html`) replaces the default one for the pages rendered with `styles/style02.css`.
+
+The fixed texts of the page, such as the section headings, are written as `{% key %}` markers, replaced by the texts of the locale of the `TemplateSet` before the blocks are compiled (see `cvLocales.py`). Each locale thus has its own compiled blocks, while the blocks without any marker compile to the same function in every locale, so that `cvBuilder.generate_html_locales` can reuse the entries rendered in one locale for the others.
+
+Modules and Functions
+---------------------
+
+- `TemplateError`: Raised when a template file is malformed.
+- `parse_blocks(text, filename)`: Splits the content of a template file into its named blocks.
+- `escape_text(value)`, `escape_attribute(value)`, `escape_url(value, images)`: Escape a field value for its context in the markup.
+- `check_url(value, images)`: Checks the scheme of a URL, None for the schemes `escape_url` replaces by '#'.
+- `minify_html(text)`: Strips the indentation and line breaks of HTML markup in a single pass.
+- `translate_block(source, texts, name)`: Replaces the `{% key %}` markers of a template block by the texts of a locale.
+- `compile_block(source, name)`: Compiles a template block into a Python function.
+- `load_template_file(path, minify, locale)`: Loads and compiles the blocks of a template file, with caching.
+- `TemplateSet`: The compiled templates of every section for one style and locale.
+- `get_template_set(css_file, minify, locale)`: Returns the cached `TemplateSet` of a stylesheet and locale.
+- `data_path(*parts)`: Returns the path of a data file of the project, such as a stylesheet, in the source checkout or as installed.
+- `source_path(*parts)`: Returns a path at the root of the source checkout, None when the package is installed.
+
+Global Variables
+----------------
+
+- `G_TEMPLATES_CONFIG`: A dictionary holding the template settings.
+
+Usage
+-----
+
+Example:
+    templates = get_template_set('../styles/style01.css')
+    html = templates['education']['entry'](degree='MSc', university_name='University', ...)
+
+"""
+import keyword
+import os
+import re
+import sys
+import threading
+
+from cvLocales import load_locale, G_LOCALES_CONFIG
+
+
+# =================== VARIABLES ===================
+# Root of the source checkout, None when the modules are installed by `pip install .`
+_SOURCE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if not os.path.isfile(os.path.join(_SOURCE_DIR, 'pyproject.toml')):
+    _SOURCE_DIR = None
+# Data files installed under `sys.prefix`, see the data-files of pyproject.toml
+_INSTALLED_DATA_DIR = os.path.join(sys.prefix, 'share', 'smartcvbuilder')
+
+"""
+G_TEMPLATES_CONFIG: dict
+
+A dictionary holding the template settings.
+
+Attributes:
+    templates_dir (str): Directory of the default section templates, `sections/` at the root of the project, or `share/smartcvbuilder/sections` of the Python prefix when the package is installed.
+    extension (str): Extension of the template files.
+"""
+G_TEMPLATES_CONFIG = {
+    'templates_dir': os.path.join(_SOURCE_DIR or _INSTALLED_DATA_DIR, 'sections'),
+    'extension': '.html',
+}
+
+_BLOCK_MARKER = re.compile(r'<!--\s*block:\s*([A-Za-z_][A-Za-z0-9_]*)\s*-->')
+_PLACEHOLDER = re.compile(r'\{\{\s*([^{}]*?)\s*\}\}')
+_TEXT_MARKER = re.compile(r'\{%\s*([^{}%]*?)\s*%\}')
+# Name and value so far of the quoted attribute a field is in, matched on the tag source before the field
+_ATTRIBUTE_VALUE = re.compile(r'([A-Za-z_:][-A-Za-z0-9_:.]*)\s*=\s*(["\'])([^"\']*)$')
+# Attributes holding a URL
+_URL_ATTRIBUTES = frozenset(('href', 'src', 'action', 'formaction', 'poster', 'cite', 'background'))
+_URL_SCHEME_NAME = re.compile(r'[a-z][a-z0-9+.-]*')
+# Characters browsers ignore when they parse the scheme of a URL, such as 'java\tscript:'
+_URL_IGNORED = re.compile(r'[\x00-\x20\x7f]+')
+_SAFE_SCHEMES = frozenset(('http', 'https', 'mailto', 'tel'))
+# Elements whose content is not markup, kept as they are by `minify_html`, and where fields are not escaped
+_RAW_TEXT_ELEMENTS = ('script', 'style')
+# Raw text elements and comments, kept as they are, or a run of whitespace spanning a line break,
+# or the indentation of a tag at the start of the text
+_MINIFY_TOKEN = re.compile(r'(<(pre|textarea|script|style)\b.*?</\2\s*>|<!--.*?-->)|[ \t\r\f]*\n\s*|\A[ \t]+(?=<)',
+                           re.DOTALL | re.IGNORECASE)
+
+# Compiled template files, keyed on path, minification and locale, with the modification time and translation table they were compiled from
+_FILE_CACHE = {}
+# Compiled blocks, keyed on their name and translated source, shared by the locales where a block is identical
+_BLOCK_CACHE = {}
+# Compiled template sets, keyed on their directories, minification and locale
+_TEMPLATE_SETS = {}
+_LOCK = threading.Lock()
+
+
+# =================== CLASSES ===================
+class TemplateError(ValueError):
+    """Raised when a template file is malformed."""
+
+
+class TemplateSet:
+    """
+    The compiled templates of every section for one style and locale.
+
+    `templates[section][block]` is the compiled function of a block. A section template is
+    looked up in the style directory first, then in the default directory.
+
+    Attributes:
+        directories (Tuple[str, ...]): The directories searched for template files, in order.
+        minify (bool): True if the blocks are minified with `minify_html` before being compiled.
+        locale (str): Code of the locale whose texts replace the `{% key %}` markers.
+    """
+
+    def __init__(self, directories, minify=False, locale=None):
+        self.directories = tuple(directories)
+        self.minify = minify
+        self.locale = locale or G_LOCALES_CONFIG['default']
+        # Section name -> compiled blocks, filled on first use
+        self._sections = {}
+
+    def path(self, section):
+        """
+        Returns the path of the template file of a section.
+
+        :param section: The section name, such as 'experience'.
+        :return: The path of the first matching template file.
+        :raises TemplateError: If no directory holds a template for the section.
+        """
+        filename = section + G_TEMPLATES_CONFIG['extension']
+        for directory in self.directories:
+            path = os.path.join(directory, filename)
+            if os.path.isfile(path):
+                return path
+        raise TemplateError(f"No template for section '{section}' in {', '.join(self.directories)}")
+
+    def files(self):
+        """
+        Lists the template files of the set, one per section, as `path` resolves them.
+
+        :return: A dictionary mapping each section name to the path of its template file.
+        """
+        extension = G_TEMPLATES_CONFIG['extension']
+        files = {}
+        for directory in self.directories:
+            try:
+                names = os.listdir(directory)
+            except FileNotFoundError:
+                continue
+            for name in names:
+                path = os.path.join(directory, name)
+                if name.endswith(extension) and os.path.isfile(path):
+                    files.setdefault(name[:-len(extension)], path)
+        return files
+
+    def __getitem__(self, section):
+        blocks = self._sections.get(section)
+        if blocks is None:
+            blocks = self._sections[section] = load_template_file(self.path(section), self.minify, self.locale)
+        return blocks
+
+    def reload(self):
+        """Forgets the compiled sections, so that modified template files are loaded again on next use."""
+        self._sections = {}
+
+
+# =================== FUNCTIONS ===================
+
+def data_path(*parts):
+    """
+    Returns the path of a data file of the project, independently of the current directory.
+
+    :param parts: The path of the file relative to the root of the project, such as ('styles', 'style01.css').
+    :return: The path in the source checkout when the modules are run from one, under `share/smartcvbuilder` of the Python prefix otherwise.
+    """
+    return os.path.join(_SOURCE_DIR or _INSTALLED_DATA_DIR, *parts)
+
+
+def source_path(*parts):
+    """
+    Returns a path at the root of the source checkout, such as its `output/` directory.
+
+    :param parts: The path relative to the root of the project.
+    :return: The absolute path, or None when the modules are installed rather than run from a checkout.
+    """
+    return os.path.join(_SOURCE_DIR, *parts) if _SOURCE_DIR else None
+
+
+def parse_blocks(text, filename='<template>'):
+    """
+    Splits the content of a template file into its named blocks.
+
+    The content of each block is stripped of its surrounding blank lines. Blocks spanning
+    several lines keep a final line break, so that consecutive blocks stay on separate lines.
+
+    :param text: The content of the template file.
+    :param filename: Name of the template file, used in error messages.
+    :return: A dictionary mapping each block name to its source.
+    :raises TemplateError: If the file has no block, or defines a block twice.
+    """
+    parts = _BLOCK_MARKER.split(text)
+    if len(parts) < 3:
+        raise TemplateError(f"{filename}: no '<!-- block: name -->' marker found")
+    blocks = {}
+    for name, source in zip(parts[1::2], parts[2::2]):
+        if name in blocks:
+            raise TemplateError(f"{filename}: block '{name}' is defined twice")
+        source = source.strip('\n').rstrip()
+        # Blocks spanning several lines end with a line break, inline blocks do not
+        blocks[name] = source + '\n' if '\n' in source else source
+    return blocks
+
+
+def escape_text(value):
+    """
+    Escapes a value inserted in the text of an element.
+
+    :param value: The value, converted to a string if needed.
+    :return: The value with `&`, `<` and `>` escaped.
+    """
+    if type(value) is not str:
+        value = str(value)
+    # Most values have nothing to escape, and testing is much cheaper than replacing
+    if '&' in value or '<' in value or '>' in value:
+        return value.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    return value
+
+
+def escape_attribute(value):
+    """
+    Escapes a value inserted in a quoted attribute value.
+
+    :param value: The value, converted to a string if needed.
+    :return: The value with `&`, `<`, `>` and both quotes escaped.
+    """
+    if type(value) is not str:
+        value = str(value)
+    if '&' in value or '<' in value or '>' in value or '"' in value or "'" in value:
+        return (value.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+                .replace('"', '&quot;').replace("'", '&#x27;'))
+    return value
+
+
+def check_url(value, images=False):
+    """
+    Checks the scheme of a URL.
+
+    :param value: The URL, converted to a string if needed.
+    :param images: If True, `data:image/` URLs are also accepted, for the `src` of images.
+    :return: The URL without surrounding whitespace, or None if its scheme is not safe (see `_SAFE_SCHEMES`).
+    """
+    if type(value) is not str:
+        value = str(value)
+    value = value.strip()
+    # Relative URLs have no colon before their path, and need no scheme check
+    colon = value.find(':')
+    if colon != -1:
+        scheme = _URL_IGNORED.sub('', value[:colon]).lower()
+        if _URL_SCHEME_NAME.fullmatch(scheme) and scheme not in _SAFE_SCHEMES \
+                and not (images and scheme == 'data' and value[colon + 1:].lstrip().lower().startswith('image/')):
+            return None
+    return value
+
+
+def escape_url(value, images=False):
+    """
+    Checks and escapes a URL inserted at the start of a URL attribute.
+
+    :param value: The URL, converted to a string if needed.
+    :param images: If True, `data:image/` URLs are also accepted, for the `src` of images.
+    :return: The escaped URL, or '#' if its scheme is not safe.
+    """
+    value = check_url(value, images)
+    return '#' if value is None else escape_attribute(value)
+
+
+def _escape_image_url(value):
+    return escape_url(value, images=True)
+
+
+def minify_html(text):
+    """
+    Strips the indentation and line breaks of HTML markup in a single pass.
+
+    Each run of whitespace spanning a line break is removed when it touches a tag or the
+    start or end of the text, and replaced by a single space otherwise, so that the words it
+    separated stay apart. The indentation of a tag starting the text is removed as well. Other
+    whitespace within a line is kept, as are comments and the content of
+    `<pre>`, `<textarea>`, `<script>` and `<style>` elements.
+
+    :param text: The HTML markup, a whole page or a template block.
+    :return: The minified markup.
+    """
+    length = len(text)
+
+    def _strip(match):
+        if match.group(1) is not None:
+            return match.group(1)
+        start, end = match.span()
+        if start == 0 or end == length or text[start - 1] == '>' or text[end] == '<':
+            return ''
+        return ' '
+
+    return _MINIFY_TOKEN.sub(_strip, text)
+
+
+def _field_context(prefix, field, name):
+    """
+    Determines where a field appears in the markup, from the block source before it.
+
+    :param prefix: The source of the block before the field.
+    :param field: The field name, used in error messages.
+    :param name: The block name, used in error messages.
+    :return: 'text', 'attribute', 'url' or 'image_url'.
+    :raises TemplateError: If the field is inside a tag but not in a quoted attribute value, or inside a raw text element.
+    """
+    lowered = prefix.lower()
+    for element in _RAW_TEXT_ELEMENTS:
+        if lowered.rfind(f"<{element}") > lowered.rfind(f"</{element}"):
+            raise TemplateError(f"{name}: field '{field}' is inside a <{element}> element, mark it '| safe' if it is trusted")
+    tag_start = prefix.rfind('<')
+    if tag_start <= prefix.rfind('>'):
+        return 'text'
+    match = _ATTRIBUTE_VALUE.search(prefix, tag_start)
+    if match is None:
+        raise TemplateError(f"{name}: field '{field}' must be in the text or in a quoted attribute value")
+    attribute, value_prefix = match.group(1).lower(), match.group(3)
+    if attribute in _URL_ATTRIBUTES and not value_prefix:
+        return 'image_url' if attribute == 'src' else 'url'
+    return 'attribute'
+
+
+# Escaping function called by the compiled blocks for each context
+_ESCAPE_FUNCTIONS = {
+    'text': '_text',
+    'attribute': '_attribute',
+    'url': '_url',
+    'image_url': '_image_url',
+}
+
+
+def translate_block(source, texts, name='block'):
+    """
+    Replaces the `{% key %}` markers of a template block by the texts of a locale.
+
+    The texts are inserted as they are, like the markup of the template around them.
+
+    :param source: The source of the block.
+    :param texts: The translation table of the locale, see `cvLocales.load_locale`.
+    :param name: The block name, used in error messages.
+    :return: The translated source.
+    :raises TemplateError: If a key has no text in the locale, or a text contains template markers.
+    """
+    def _text(match):
+        key = match.group(1)
+        text = texts.get(key)
+        if text is None:
+            raise TemplateError(f"{name}: no text for '{key}' in locale '{texts.get('lang')}'")
+        if '{{' in text or '{%' in text:
+            raise TemplateError(f"{name}: the text of '{key}' in locale '{texts.get('lang')}' contains a template marker")
+        return text
+
+    return _TEXT_MARKER.sub(_text, source)
+
+
+def compile_block(source, name='block'):
+    """
+    Compiles a template block into a Python function.
+
+    The fields of the block become keyword-only parameters, and the function returns the
+    block as a single f-string, escaping each field for its context, e.g.
+    `<h3>{{ degree }}</h3>` compiles to `def block(*, degree): return f'<h3>{_text(degree)}</h3>'`.
+
+    :param source: The source of the block.
+    :param name: Name given to the compiled function, used in error messages.
+    :return: The compiled function. Its `fields` attribute lists its parameters, and its `translated` attribute is set by `load_template_file` when the block holds texts of a locale.
+    :raises TemplateError: If a placeholder is not a valid field name, has an unknown filter or is in a context where it cannot be escaped.
+    """
+    fields = []
+    pieces = []
+    position = 0
+    for match in _PLACEHOLDER.finditer(source):
+        field, _, filter_name = (part.strip() for part in match.group(1).partition('|'))
+        if not field.isidentifier() or keyword.iskeyword(field) or field.startswith('_'):
+            raise TemplateError(f"{name}: invalid field name '{field}'")
+        if filter_name not in ('', 'safe'):
+            raise TemplateError(f"{name}: unknown filter '{filter_name}' for field '{field}'")
+        if field not in fields:
+            fields.append(field)
+        # Literal braces must be doubled in the f-string
+        pieces.append(source[position:match.start()].replace('{', '{{').replace('}', '}}'))
+        if filter_name == 'safe':
+            pieces.append('{' + field + '}')
+        else:
+            context = _field_context(source[:match.start()], field, name)
+            pieces.append('{' + _ESCAPE_FUNCTIONS[context] + '(' + field + ')}')
+        position = match.end()
+    pieces.append(source[position:].replace('{', '{{').replace('}', '}}'))
+
+    function_name = re.sub(r'\W', '_', name)
+    signature = f"*, {', '.join(fields)}" if fields else ''
+    code = f"def {function_name}({signature}):\n    return f{''.join(pieces)!r}\n"
+    namespace = {'_text': escape_text, '_attribute': escape_attribute, '_url': escape_url, '_image_url': _escape_image_url}
+    exec(compile(code, f"<template {name}>", 'exec'), namespace)
+    function = namespace[function_name]
+    function.fields = tuple(fields)
+    function.translated = False
+    return function
+
+
+def load_template_file(path, minify=False, locale=None):
+    """
+    Loads and compiles the blocks of a template file.
+
+    Compiled files are cached, and compiled again when their modification time changes or the
+    translation table of the locale is reloaded (see `cvLocales.reload_locales`).
+    The blocks identical in several locales, such as those without `{% key %}` markers, are
+    compiled once and share the same function. The functions of the blocks with markers have
+    their `translated` attribute set.
+
+    :param path: Path of the template file.
+    :param minify: If True, the blocks are minified with `minify_html` before being compiled.
+    :param locale: Code of the locale whose texts replace the markers, defaults to `G_LOCALES_CONFIG['default']`.
+    :return: A dictionary mapping each block name to its compiled function.
+    :raises TemplateError: If the file is malformed.
+    :raises cvLocales.LocaleError: If the locale has no valid translation table.
+    """
+    locale = locale or G_LOCALES_CONFIG['default']
+    mtime = os.stat(path).st_mtime_ns
+    texts = load_locale(locale).texts
+    cached = _FILE_CACHE.get((path, minify, locale))
+    if cached is not None and cached[0] == mtime and cached[1] is texts:
+        return cached[2]
+
+    with open(path, 'r', encoding='utf-8') as f:
+        blocks = parse_blocks(f.read(), path)
+    section = os.path.splitext(os.path.basename(path))[0]
+    compiled = {}
+    for name, source in blocks.items():
+        qualified_name = f"{section}.{name}"
+        translated = '{%' in source
+        if translated:
+            source = translate_block(source, texts, qualified_name)
+        if minify:
+            source = minify_html(source)
+        function = _BLOCK_CACHE.get((qualified_name, source))
+        if function is None:
+            function = compile_block(source, qualified_name)
+            function.translated = translated
+            with _LOCK:
+                function = _BLOCK_CACHE.setdefault((qualified_name, source), function)
+        compiled[name] = function
+    with _LOCK:
+        _FILE_CACHE[(path, minify, locale)] = (mtime, texts, compiled)
+    return compiled
+
+
+def get_template_set(css_file=None, minify=False, locale=None):
+    """
+    Returns the templates used to render a page with a stylesheet.
+
+    :param css_file: Path to the CSS file of the page. The templates of `sections/<style name>/`, where the style name is the CSS file name without extension, override the default ones.
+    :param minify: If True, the templates are minified, see `minify_html`.
+    :param locale: Code of the locale of the page, defaults to `G_LOCALES_CONFIG['default']`.
+    :return: The cached `TemplateSet` of the style and locale, shared by all the styles using the same template directories.
+    """
+    locale = locale or G_LOCALES_CONFIG['default']
+    templates_dir = G_TEMPLATES_CONFIG['templates_dir']
+    style_name = os.path.splitext(os.path.basename(css_file))[0] if css_file else ''
+    style_dir = os.path.join(templates_dir, style_name) if style_name else None
+    # Styles without templates of their own share the default set, and thus render identical bodies
+    directories = (style_dir, templates_dir) if style_dir and os.path.isdir(style_dir) else (templates_dir,)
+    template_set = _TEMPLATE_SETS.get((directories, minify, locale))
+    if template_set is None:
+        with _LOCK:
+            template_set = _TEMPLATE_SETS.setdefault((directories, minify, locale),
+                                                     TemplateSet(directories, minify, locale))
+    return template_set
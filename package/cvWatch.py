@@ -0,0 +1,200 @@
+"""
+CV Watch Script
+================
+
+Author: Hugo REIF FAUDEMER
+Creation Date: 07/05/2023
+Purpose: This script watches a CV YAML file and its stylesheet, and regenerates the HTML page whenever one of them changes, re-rendering only the sections whose data changed.
+
+Description
+-----------
+
+`IncrementalRenderer` keeps the HTML fragment of each body section of `cvBuilder.G_SECTION_BUILDERS` together with the data it was rendered from. On a new render, the data of each section is compared with the memoized one, and only the sections that differ are rebuilt. The page is then spliced back together from the fragments. Editing one field of one job entry thus only re-renders the experience section, whatever the size of the rest of the CV.
+
+`watch` polls the modification time and size of the YAML and CSS files, of the section templates and of the translation tables of `locales/`, so it needs no dependency and works on any file system. Pages are rendered in memory without the render cache, in a single locale and format; they can be minified, but the assets are always linked.
+
+Modules and Functions
+---------------------
+
+- `IncrementalRenderer`: Renders CVs, re-running only the section functions whose data changed since the previous render.
+- `watch(yaml_file, css_file, output_dir, interval, max_updates, minify, locale)`: Regenerates the CV page each time the YAML or CSS file, a section template or a translation table changes, until interrupted.
+
+Global Variables
+----------------
+
+- `G_WATCH_CONFIG`: A dictionary holding the default watch settings.
+
+Usage
+-----
+
+Example:
+    python cvMain.py my_cv.yml my_style.css --watch
+
+"""
+import os
+import sys
+import time
+
+from cvBuilder import (HtmlPage, init_html_structure, ending_html_page, section_inputs, render_section,
+                       html_output_filename, write_html_file, CVData)
+from cvTemplates import get_template_set
+from cvLocales import reload_locales, G_LOCALES_CONFIG
+
+
+# =================== VARIABLES ===================
+"""
+G_WATCH_CONFIG: dict
+
+A dictionary holding the default watch settings.
+
+Attributes:
+    interval (float): Delay in seconds between two checks of the watched files.
+"""
+G_WATCH_CONFIG = {
+    'interval': 0.2,
+}
+
+
+# =================== CLASSES ===================
+class IncrementalRenderer:
+    """
+    Renders CVs, re-running only the section functions whose data changed since the previous render.
+
+    Attributes:
+        css_file (str): Path to the CSS file linked in the HTML.
+        minify (bool): True if the page is rendered with minified templates.
+        locale (str): Code of the locale of the page, None for the default locale.
+        templates (TemplateSet): The section templates of the stylesheet.
+        rendered (List[str]): Names of the sections rebuilt by the last render.
+    """
+
+    def __init__(self, css_file, minify=False, locale=None):
+        self.css_file = css_file
+        self.minify = minify
+        self.locale = locale
+        self.templates = get_template_set(css_file, minify, locale)
+        self.rendered = []
+        # Section name -> (arguments the fragment was rendered from, fragment)
+        self._fragments = {}
+        self._head = self._tail = None
+
+    def _frame(self):
+        """Renders the head and the closing tags, which only depend on the stylesheet."""
+        head, tail = HtmlPage(self.templates), HtmlPage(self.templates)
+        init_html_structure(head, self.css_file)
+        ending_html_page(tail)
+        self._head, self._tail = head.getvalue(), tail.getvalue()
+
+    def set_css_file(self, css_file):
+        """
+        Changes the stylesheet linked in the page, the body sections are kept unless the style has its own templates.
+
+        :param css_file: Path to the new CSS file.
+        """
+        templates = get_template_set(css_file, self.minify, self.locale)
+        if templates is not self.templates:
+            self._fragments = {}
+        self.css_file = css_file
+        self.templates = templates
+        self._head = None
+
+    def reload_templates(self):
+        """Compiles the modified section templates again, and re-renders every section on the next render."""
+        self.templates.reload()
+        self._fragments = {}
+        self._head = None
+
+    def render(self, cv):
+        """
+        Renders the complete HTML page of a CV.
+
+        :param cv: The `CVData` to render.
+        :return: The complete HTML document.
+        :rtype: str
+        """
+        self.rendered = []
+        if self._head is None:
+            self._frame()
+
+        fragments = [self._head]
+        for name, args in section_inputs(cv, self.locale).items():
+            memo = self._fragments.get(name)
+            if memo is None or memo[0] != args:
+                memo = self._fragments[name] = (args, render_section(name, *args, templates=self.templates))
+                self.rendered.append(name)
+            fragments.append(memo[1])
+        fragments.append(self._tail)
+        return ''.join(fragments)
+
+
+# =================== FUNCTIONS ===================
+
+def _signature(path):
+    """Returns the (mtime, size) of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _directories_signature(directories):
+    """Returns the (mtime, size) of every file of some directories, such as those of a `TemplateSet`."""
+    return tuple(
+        (entry.path, _signature(entry.path))
+        for directory in directories if os.path.isdir(directory)
+        for entry in sorted(os.scandir(directory), key=lambda entry: entry.name)
+        if entry.is_file()
+    )
+
+
+def watch(yaml_file, css_file, output_dir, interval=None, max_updates=None, minify=False, locale=None):
+    """
+    Regenerates the CV page each time the YAML or CSS file, a section template or a translation table changes, until interrupted.
+
+    Parsing errors are reported and the previous page is kept, so that a half-typed edit does
+    not stop the watch.
+
+    :param yaml_file: Path to the YAML file containing the CV data.
+    :param css_file: Path to the CSS file linked in the HTML.
+    :param output_dir: Directory where the HTML page is written.
+    :param interval: Delay in seconds between two checks, defaults to `G_WATCH_CONFIG['interval']`.
+    :param max_updates: Stop after this number of regenerations, None to watch forever.
+    :param minify: If True, the page is rendered with minified templates.
+    :param locale: Code of the locale of the page, defaults to the default locale.
+    """
+    interval = interval or G_WATCH_CONFIG['interval']
+    renderer = IncrementalRenderer(css_file, minify, locale)
+    signatures = (None, None, None, None)
+    updates = 0
+    print(f"Watching {yaml_file} and {css_file}, press Ctrl+C to stop.", flush=True)
+
+    while max_updates is None or updates < max_updates:
+        current = (_signature(yaml_file), _signature(css_file), _directories_signature(renderer.templates.directories),
+                   _directories_signature((G_LOCALES_CONFIG['locales_dir'],)))
+        if current == signatures:
+            time.sleep(interval)
+            continue
+        if current[1] != signatures[1]:
+            renderer.set_css_file(css_file)
+        if signatures[3] is not None and current[3] != signatures[3]:
+            reload_locales()
+        if signatures[2] is not None and current[2:] != signatures[2:]:
+            renderer.reload_templates()
+        signatures = current
+        updates += 1
+
+        start = time.perf_counter()
+        try:
+            cv = CVData(yaml_file)
+            parsed = time.perf_counter()
+            html_content = renderer.render(cv)
+            rendered = time.perf_counter()
+            output_path = os.path.join(output_dir, html_output_filename(cv.get_personal_info()))
+            write_html_file(output_path, html_content)
+        except Exception as error:
+            print(f"[watch] {type(error).__name__}: {error}", file=sys.stderr, flush=True)
+            continue
+        sections = ', '.join(renderer.rendered) or 'nothing'
+        print(f"[watch] {output_path}: re-rendered {sections} in {(rendered - parsed) * 1000:.2f} ms "
+              f"(load {(parsed - start) * 1000:.2f} ms)", flush=True)
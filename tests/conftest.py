@@ -0,0 +1,41 @@
+"""Shared fixtures of the test suite. The modules of `package/` are importable through the `pythonpath` setting of pyproject.toml."""
+import os
+import stat
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TESTS_DIR)
+TEMPLATE_CV = os.path.join(ROOT_DIR, 'templates', 'template.yml')
+STYLE01 = os.path.join(ROOT_DIR, 'styles', 'style01.css')
+
+
+@pytest.fixture
+def template_data():
+    """A fresh copy of the data of `templates/template.yml`, to be modified by the test."""
+    from cvDataClass import parse_document
+    with open(TEMPLATE_CV, 'rb') as f:
+        return parse_document(f.read(), TEMPLATE_CV)
+
+
+@pytest.fixture
+def fake_converter(tmp_path):
+    """Path of an executable running `fake_wkhtmltopdf.py` with the current interpreter."""
+    path = tmp_path / 'fake-wkhtmltopdf'
+    path.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(TESTS_DIR, "fake_wkhtmltopdf.py")}" "$@"\n')
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
+
+
+@pytest.fixture
+def html_files(tmp_path):
+    """Factory writing small HTML pages in a temporary directory."""
+    def _write(*names):
+        paths = []
+        for name in names:
+            path = tmp_path / name
+            path.write_text(f'<html><body>{name}</body></html>', encoding='utf-8')
+            paths.append(str(path))
+        return paths
+    return _write
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Stand-in for `wkhtmltopdf`, to run the PDF stage offline.
+
+It follows the `--read-args-from-stdin` convention of `cvPdf.convert_batch`: each line of the
+standard input is an (input, output) pair, and a placeholder PDF is written for each input that
+exists. The other options are accepted and ignored.
+
+Environment variables:
+    FAKE_WKHTMLTOPDF_LOG: File where the command line of each run is appended, one run per line.
+    FAKE_WKHTMLTOPDF_FAIL: Inputs whose path contains this text are skipped silently, as by a crashing converter.
+    FAKE_WKHTMLTOPDF_SLEEP: Seconds to wait before converting, to trigger timeouts.
+    FAKE_WKHTMLTOPDF_EXIT: Exit status forced at the end of the run, without an error message.
+
+Usage:
+    WKHTMLTOPDF=tests/fake_wkhtmltopdf.py python cvBatch.py ../candidates/ --pdf
+"""
+import os
+import shlex
+import sys
+import time
+
+
+def main(argv):
+    log = os.environ.get('FAKE_WKHTMLTOPDF_LOG')
+    if log:
+        with open(log, 'a', encoding='utf-8') as f:
+            f.write(shlex.join(argv) + '\n')
+    if '--read-args-from-stdin' not in argv:
+        sys.stderr.write('fake_wkhtmltopdf: only --read-args-from-stdin is supported\n')
+        return 2
+    time.sleep(float(os.environ.get('FAKE_WKHTMLTOPDF_SLEEP') or 0))
+
+    fail = os.environ.get('FAKE_WKHTMLTOPDF_FAIL')
+    status = 0
+    for line in sys.stdin:
+        args = shlex.split(line)
+        if not args:
+            continue
+        html_file, pdf_file = args[-2:]
+        if fail and fail in html_file:
+            continue
+        if not os.path.isfile(html_file):
+            sys.stderr.write(f'Error: Failed to load {html_file}\n')
+            status = 1
+            continue
+        with open(pdf_file, 'wb') as f:
+            f.write(b'%PDF-1.4\n% placeholder for ' + os.path.basename(html_file).encode('utf-8') + b'\n%%EOF\n')
+    return int(os.environ.get('FAKE_WKHTMLTOPDF_EXIT') or status)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,87 @@
+"""Asset embedding of cvAssets.py."""
+import base64
+import os
+
+import pytest
+
+from cvAssets import AssetCache, data_uri
+from cvBuilder import render_html
+from cvDataClass import CVData
+from conftest import ROOT_DIR, STYLE01
+
+# A 1x1 PNG image
+_PNG = base64.b64decode('iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR4nGP4z8DwHwAFAAH/q842iQAAAABJRU5ErkJggg==')
+
+
+@pytest.fixture
+def page_dir(tmp_path):
+    """The directory of a page, with a photo next to it."""
+    directory = tmp_path / 'page'
+    directory.mkdir()
+    (directory / 'me & you.png').write_bytes(_PNG)
+    return directory
+
+
+@pytest.mark.parametrize('src', ['https://example.com/me.png', '//example.com/me.png', 'data:image/png;base64,AA==',
+                                 'missing.png', 'notes.txt', ''])
+def test_remote_missing_and_non_image_sources_are_not_resolved(page_dir, src):
+    (page_dir / 'notes.txt').write_text('secret')
+
+    assert AssetCache().resolve(src, str(page_dir)) is None
+
+
+def test_sources_are_resolved_from_the_page_directory(page_dir):
+    assert AssetCache().resolve('me & you.png', str(page_dir)) == os.path.join(str(page_dir), 'me & you.png')
+
+
+def test_escaped_sources_are_embedded(page_dir):
+    fragment = '<img class="photo" src="me &amp; you.png" alt="">'
+
+    assert AssetCache().inline(fragment, str(page_dir)) == f'<img class="photo" src="{data_uri(_PNG, "image/png")}" alt="">'
+
+
+def test_unresolved_sources_are_left_as_they_are(page_dir):
+    fragment = '<img src="https://example.com/me.png"><img src="missing.png">'
+
+    assert AssetCache().inline(fragment, str(page_dir)) == fragment
+
+
+def test_processed_photos_are_shared_through_the_cache_directory(tmp_path, page_dir):
+    cache_dir = tmp_path / 'assets'
+    path = str(page_dir / 'me & you.png')
+    first = AssetCache(str(cache_dir))
+    uri = first.photo(path)
+    assert first.photo(path) == uri
+    assert (first.stats.hits, first.stats.misses, first.stats.stores) == (1, 1, 1)
+
+    entry, = cache_dir.glob('*/*.uri')
+    os.utime(entry, (0, 0))
+    second = AssetCache(str(cache_dir))
+
+    assert second.photo(path) == uri
+    assert (second.stats.hits, second.stats.misses) == (1, 0)
+    # Hits refresh the entry, see cvCache.RenderCache.evict
+    assert entry.stat().st_mtime > 0
+
+
+def test_fingerprint_follows_the_photo_content(tmp_path, template_data):
+    (tmp_path / 'photo.png').write_bytes(_PNG)
+    template_data['cv']['personal_info']['photo_url'] = 'photo.png'
+    cv = CVData.from_data(template_data)
+    assets = AssetCache()
+    before = assets.fingerprint(cv, str(tmp_path))
+
+    (tmp_path / 'photo.png').write_bytes(_PNG + b'\0')
+
+    assert assets.fingerprint(cv, str(tmp_path)) != before
+
+
+def test_inlined_page_embeds_the_stylesheet_and_the_photo(template_data):
+    cv = CVData.from_data(template_data)
+    assets = AssetCache()
+    # Any directory next to templates/, as is output/ where the pages are written
+    base_dir = os.path.join(ROOT_DIR, 'styles')
+    page = assets.inline(render_html(cv, STYLE01, assets.stylesheet(STYLE01)), base_dir)
+
+    assert '<link rel="stylesheet"' not in page and '<style>' in page
+    assert 'src="data:image/jpeg;base64,' in page and 'template.jpg' not in page
@@ -0,0 +1,106 @@
+"""Asyncio batch pipeline of cvAsync.py."""
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+import cvAsync
+from cvAsync import run_async_batch, run_pipeline
+from cvBatch import build_jobs
+from cvBuilder import render_html
+from cvDataClass import CVData
+from conftest import STYLE01
+
+
+@pytest.fixture
+def corpus(tmp_path, template_data):
+    """Factory writing CVs as JSON files, each with its own name, and returning their batch jobs."""
+    def _write(count):
+        paths = []
+        for i in range(count):
+            template_data['cv']['personal_info']['name'] = f"Candidate {i}"
+            path = tmp_path / f"cv{i:03}.json"
+            path.write_text(json.dumps(template_data), encoding='utf-8')
+            paths.append(str(path))
+        return build_jobs(paths, [STYLE01], str(tmp_path / 'output'))
+    return _write
+
+
+def _run(jobs, **options):
+    """Runs the pipeline, failing instead of hanging if a stage is never stopped."""
+    return asyncio.run(asyncio.wait_for(run_pipeline(jobs, **options), timeout=30))
+
+
+@pytest.mark.parametrize('render_workers', [1, 2])
+def test_every_page_is_rendered_and_written(corpus, render_workers):
+    jobs = corpus(12)
+
+    results = _run(jobs, readers=3, writers=2, render_workers=render_workers, queue_size=2)
+
+    assert sorted(result.job.yaml_file for result in results) == [job.yaml_file for job in jobs]
+    for result in results:
+        assert result.ok, result.output
+        with open(result.output, encoding='utf-8') as f:
+            assert f.read() == render_html(CVData(result.job.yaml_file), STYLE01)
+
+
+@pytest.mark.parametrize('count', [0, 1])
+def test_stages_stop_when_there_are_fewer_jobs_than_tasks(corpus, count):
+    results = _run(corpus(count), readers=8, writers=8, render_workers=1, queue_size=1)
+
+    assert len(results) == count and all(result.ok for result in results)
+
+
+def test_failing_files_are_reported_and_the_others_rendered(tmp_path, corpus):
+    jobs = corpus(4)
+    with open(jobs[1].yaml_file, 'w', encoding='utf-8') as f:
+        f.write('{"cv": ')
+    with open(jobs[2].yaml_file, 'w', encoding='utf-8') as f:
+        f.write('{"cv": {"personal_info": {}}}')
+    (tmp_path / 'cv003.json').unlink()
+    reported = []
+
+    results = _run(jobs, readers=2, writers=2, render_workers=1, queue_size=1, on_result=reported.append)
+
+    assert reported == results
+    by_file = {result.job.yaml_file: result for result in results}
+    assert by_file[jobs[0].yaml_file].ok
+    assert by_file[jobs[1].yaml_file].output.startswith(f"JSONDecodeError: {jobs[1].yaml_file}: Expecting value")
+    assert by_file[jobs[2].yaml_file].output.startswith('CVDataError: ')
+    assert by_file[jobs[2].yaml_file].errors
+    assert by_file[jobs[3].yaml_file].output.startswith('FileNotFoundError: ')
+    assert [result.ok for result in results].count(True) == 1
+
+
+def test_queues_bound_the_files_read_ahead_of_a_stalled_writer(monkeypatch, corpus):
+    jobs = corpus(50)
+    release = threading.Event()
+    reads = []
+    read_file, write_html_file = cvAsync._read_file, cvAsync.write_html_file
+
+    def _read_file(path):
+        reads.append(path)
+        return read_file(path)
+
+    def _write_html_file(path, content):
+        release.wait(30)
+        write_html_file(path, content)
+
+    monkeypatch.setattr(cvAsync, '_read_file', _read_file)
+    monkeypatch.setattr(cvAsync, 'write_html_file', _write_html_file)
+    results = []
+    thread = threading.Thread(target=lambda: results.extend(
+        run_async_batch(jobs, readers=4, writers=1, render_workers=1, queue_size=1)))
+    thread.start()
+    try:
+        time.sleep(0.5)
+        # One page being written, one in the write queue, one held by each of the 2 render tasks,
+        # one in the render queue and one held by each of the 4 readers
+        assert len(reads) <= 1 + 1 + 2 + 1 + 4
+    finally:
+        release.set()
+        thread.join(30)
+
+    assert len(results) == 50 and all(result.ok for result in results)
@@ -0,0 +1,121 @@
+"""Page rendering of cvBuilder.py."""
+import copy
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import cvMain
+import cvTemplates
+from cvBuilder import generate_html, generate_html_styles, render_html, iter_html
+from cvDataClass import CVData
+from conftest import ROOT_DIR, STYLE01, TEMPLATE_CV
+
+STYLE02 = os.path.join(ROOT_DIR, 'styles', 'style02.css')
+
+
+def _cvs(template_data, count):
+    """Distinct CVs built from the example CV, each with its own name and entries."""
+    cvs = []
+    for i in range(count):
+        data = copy.deepcopy(template_data)
+        cv = data['cv']
+        cv['personal_info']['name'] = f"Candidate {i}"
+        cv['work_experience'] = cv['work_experience'][:1 + i % len(cv['work_experience'])]
+        cv['skills'] = [{'skill': f"Skill {i}.{j}"} for j in range(i % 5 + 1)]
+        cvs.append(CVData.from_data(data))
+    return cvs
+
+
+def test_concurrent_renders_match_serial_renders(template_data):
+    cvs = _cvs(template_data, 16)
+    serial = [render_html(cv, STYLE01) for cv in cvs]
+    assert len(set(serial)) == len(cvs)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        # Every CV several times, so that renders of the same and of different CVs overlap
+        concurrent = list(executor.map(lambda cv: render_html(cv, STYLE01), cvs * 4))
+
+    assert concurrent == serial * 4
+
+
+def test_concurrent_files_match_serial_renders(tmp_path, template_data):
+    cvs = _cvs(template_data, 8)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        paths = list(executor.map(lambda cv: generate_html(cv, STYLE01, str(tmp_path)), cvs))
+
+    assert len(set(paths)) == len(cvs)
+    for cv, path in zip(cvs, paths):
+        with open(path, encoding='utf-8') as f:
+            assert f.read() == render_html(cv, STYLE01)
+
+
+@pytest.mark.parametrize('options', [{}, {'minify': True}, {'locale': 'fr'}, {'css_content': 'body { margin: 0; }'}])
+def test_streamed_page_matches_the_rendered_page(template_data, options):
+    cv = CVData.from_data(template_data)
+    fragments = list(iter_html(cv, STYLE01, **options))
+
+    assert len(fragments) > 2
+    assert ''.join(fragments) == render_html(cv, STYLE01, **options)
+
+
+@pytest.mark.parametrize('options', [[], ['--minify', '--locale', 'fr']])
+def test_stdout_streams_the_page_without_writing_files(tmp_path, capsys, options):
+    output_dir = tmp_path / 'output'
+
+    assert cvMain.main([TEMPLATE_CV, STYLE01, '--stdout', '--no-cache', '--output', str(output_dir)] + options) == 0
+
+    locale = options[-1] if options else None
+    expected = render_html(CVData(TEMPLATE_CV), STYLE01, minify=bool(options), locale=locale)
+    assert capsys.readouterr().out == expected
+    assert not output_dir.exists()
+
+
+@pytest.mark.parametrize('options', [['--pdf'], ['--format', 'markdown'], ['--profile', 'profile.json'], ['--watch'],
+                                     ['--locale', 'en', 'fr']])
+def test_stdout_rejects_the_flags_it_would_ignore(capsys, options):
+    with pytest.raises(SystemExit) as excinfo:
+        cvMain.main([TEMPLATE_CV, STYLE01, '--stdout', '--no-cache'] + options)
+
+    assert excinfo.value.code == 2
+    assert 'stdout' in capsys.readouterr().err
+
+
+def test_style_pages_match_single_renders(tmp_path, template_data):
+    cv = CVData.from_data(template_data)
+    css_files = [STYLE01, STYLE02]
+
+    paths = generate_html_styles(cv, css_files, str(tmp_path))
+
+    assert [os.path.basename(path) for path in paths] == ['CV_Your_Name_style01.html', 'CV_Your_Name_style02.html']
+    for path, css_file in zip(paths, css_files):
+        with open(path, encoding='utf-8') as f:
+            assert f.read() == render_html(cv, css_file)
+
+
+def test_styles_with_the_same_name_are_rejected(tmp_path, template_data):
+    with pytest.raises(ValueError, match='style01'):
+        generate_html_styles(CVData.from_data(template_data), [STYLE01, str(tmp_path / 'style01.css')], str(tmp_path))
+
+
+def test_styles_with_their_own_templates_get_their_own_body(tmp_path, monkeypatch, template_data):
+    sections_dir = tmp_path / 'sections'
+    shutil.copytree(os.path.join(ROOT_DIR, 'sections'), sections_dir)
+    (sections_dir / 'style02').mkdir()
+    education = (sections_dir / 'education.html').read_text(encoding='utf-8')
+    (sections_dir / 'style02' / 'education.html').write_text(education.replace('<h2', '<h2 class="own"'),
+                                                             encoding='utf-8')
+    monkeypatch.setitem(cvTemplates.G_TEMPLATES_CONFIG, 'templates_dir', str(sections_dir))
+    cv = CVData.from_data(template_data)
+    output_dir = tmp_path / 'output'
+    output_dir.mkdir()
+
+    paths = generate_html_styles(cv, [STYLE01, STYLE02], str(output_dir))
+
+    pages = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            pages.append(f.read())
+    assert pages == [render_html(cv, STYLE01), render_html(cv, STYLE02)]
+    assert 'class="own"' not in pages[0] and 'class="own"' in pages[1]
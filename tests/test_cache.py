@@ -0,0 +1,131 @@
+"""Render cache of cvCache.py."""
+import os
+import shutil
+import time
+
+import pytest
+
+import cvTemplates
+from cvCache import RenderCache
+from cvDataClass import CVData
+from conftest import ROOT_DIR, STYLE01
+
+
+@pytest.fixture
+def cv(template_data):
+    return CVData.from_data(template_data)
+
+
+@pytest.fixture
+def sections_dir(tmp_path, monkeypatch):
+    """A copy of `sections/` used as the template directory, so that the test can edit the templates."""
+    path = tmp_path / 'sections'
+    shutil.copytree(os.path.join(ROOT_DIR, 'sections'), path)
+    monkeypatch.setitem(cvTemplates.G_TEMPLATES_CONFIG, 'templates_dir', str(path))
+    return path
+
+
+def test_second_render_is_a_hit(tmp_path, cv):
+    cache = RenderCache(str(tmp_path / 'cache'))
+    output = tmp_path / 'output'
+    output.mkdir()
+
+    first = cache.generate_html(cv, STYLE01, str(output))
+    with open(first, encoding='utf-8') as f:
+        page = f.read()
+    os.remove(first)
+    second = cache.generate_html(cv, STYLE01, str(output))
+
+    assert second == first
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.stores) == (1, 1, 1)
+    with open(second, encoding='utf-8') as f:
+        assert f.read() == page
+
+
+def test_key_depends_on_the_document_and_the_options(tmp_path, template_data):
+    cache = RenderCache(str(tmp_path / 'cache'))
+    key = cache.key(CVData.from_data(template_data), STYLE01)
+
+    assert cache.key(CVData.from_data(template_data), STYLE01) == key
+    assert cache.key(CVData.from_data(template_data), STYLE01, minify=True) != key
+    template_data['cv']['personal_info']['name'] = 'Someone Else'
+    assert cache.key(CVData.from_data(template_data), STYLE01) != key
+
+
+def test_editing_a_section_template_invalidates_the_key(tmp_path, sections_dir, cv):
+    cache = RenderCache(str(tmp_path / 'cache'))
+    key = cache.key(cv, STYLE01)
+
+    template = sections_dir / 'education.html'
+    template.write_text(template.read_text(encoding='utf-8') + '\n<!-- edited -->\n', encoding='utf-8')
+
+    assert cache.key(cv, STYLE01) != key
+
+
+def test_style_override_is_part_of_the_key(tmp_path, sections_dir, cv):
+    cache = RenderCache(str(tmp_path / 'cache'))
+    key = cache.key(cv, STYLE01)
+
+    (sections_dir / 'style01').mkdir(exist_ok=True)
+    shutil.copy(sections_dir / 'education.html', sections_dir / 'style01' / 'education.html')
+
+    assert cache.key(cv, STYLE01) != key
+
+
+def _entry(path, size=1, age=0):
+    """Writes a cache file of the given size, last used `age` seconds ago."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'x' * size)
+    used = time.time() - age
+    os.utime(path, (used, used))
+    return path
+
+
+def _layout(cache_dir, name, size=1, age=0):
+    """A rendered page, a parsed document and a processed photo."""
+    return [
+        _entry(cache_dir / name[:2] / f"{name}.html", size, age),
+        _entry(cache_dir / 'parsed' / f"{name}.pickle", size, age),
+        _entry(cache_dir / 'assets' / name[:2] / f"{name}.uri", size, age),
+    ]
+
+
+def test_evict_removes_expired_entries_of_every_cache(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    cache = RenderCache(str(cache_dir), max_age=60)
+    expired = _layout(cache_dir, 'ab' + '0' * 62, age=3600)
+    recent = _layout(cache_dir, 'cd' + '0' * 62)
+    # Files of no cache, and files being written
+    others = [_entry(cache_dir / 'notes.txt', age=3600), _entry(cache_dir / 'parsed' / 'x.pickle.1234.tmp', age=3600),
+              _entry(cache_dir / 'assets' / 'other' / 'y.uri', age=3600)]
+
+    assert cache.evict() == 3
+    assert cache.stats.evictions == 3
+    assert not any(path.exists() for path in expired)
+    assert all(path.exists() for path in recent + others)
+
+
+def test_evict_bounds_the_size_of_every_cache(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    cache = RenderCache(str(cache_dir), max_size=1000)
+    oldest = _layout(cache_dir, 'ab' + '0' * 62, size=200, age=30)
+    newest = _layout(cache_dir, 'cd' + '0' * 62, size=200, age=10)
+
+    # 1200 bytes: the oldest entry goes, whichever cache it belongs to
+    assert cache.evict() == 1
+    assert [path.exists() for path in oldest] == [False, True, True]
+    assert all(path.exists() for path in newest)
+
+
+def test_parse_cache_hits_refresh_their_entry(tmp_path):
+    from cvDataClass import load_document
+
+    document = tmp_path / 'cv.json'
+    document.write_text('{"cv": {}}')
+    parsed_dir = tmp_path / 'cache' / 'parsed'
+    load_document(str(document), str(parsed_dir))
+    entry, = parsed_dir.iterdir()
+    os.utime(entry, (0, 0))
+
+    assert load_document(str(document), str(parsed_dir)) == {'cv': {}}
+    assert time.time() - entry.stat().st_mtime < 60
@@ -0,0 +1,108 @@
+"""Document loading and parse cache of cvDataClass.py."""
+import json
+import os
+import pickle
+import re
+
+import pytest
+
+import cvDataClass
+from cvDataClass import CVData, CVDataError, load_document
+from conftest import TEMPLATE_CV
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Records the paths of the files actually parsed, as opposed to loaded from the parse cache."""
+    paths = []
+    parse_file = cvDataClass._parse_file
+
+    def _parse_file(file_path):
+        paths.append(file_path)
+        return parse_file(file_path)
+
+    monkeypatch.setattr(cvDataClass, '_parse_file', _parse_file)
+    return paths
+
+
+@pytest.fixture
+def document(tmp_path, template_data):
+    """The example CV written as a JSON file."""
+    path = tmp_path / 'cv.json'
+    path.write_text(json.dumps(template_data), encoding='utf-8')
+    return path
+
+
+def test_unchanged_file_is_loaded_from_the_parse_cache(tmp_path, document, template_data, parses):
+    parsed_dir = str(tmp_path / 'parsed')
+
+    assert load_document(str(document), parsed_dir) == template_data
+    assert load_document(str(document), parsed_dir) == template_data
+    assert parses == [str(document)]
+
+
+def test_modified_file_is_parsed_again(tmp_path, document, parses):
+    parsed_dir = str(tmp_path / 'parsed')
+    load_document(str(document), parsed_dir)
+
+    # Same size, other modification time
+    stat = document.stat()
+    os.utime(document, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    load_document(str(document), parsed_dir)
+    # Same modification time, other size
+    mtime = document.stat().st_mtime_ns
+    document.write_text('{"cv": {}}', encoding='utf-8')
+    os.utime(document, ns=(mtime, mtime))
+
+    assert load_document(str(document), parsed_dir) == {'cv': {}}
+    assert parses == [str(document)] * 3
+
+
+def test_corrupt_cache_entry_is_replaced(tmp_path, document, template_data, parses):
+    parsed_dir = tmp_path / 'parsed'
+    load_document(str(document), str(parsed_dir))
+    entry, = parsed_dir.iterdir()
+    entry.write_bytes(b'not a pickle')
+
+    assert load_document(str(document), str(parsed_dir)) == template_data
+    assert len(parses) == 2
+    with open(entry, 'rb') as f:
+        assert pickle.load(f)[1] == template_data
+
+
+def test_json_and_yaml_files_load_the_same_cv(document):
+    from_json, from_yaml = CVData(str(document)), CVData(TEMPLATE_CV)
+
+    assert from_json.data == from_yaml.data
+    assert from_json.work_experience == from_yaml.work_experience
+    assert from_json.personal_info == from_yaml.personal_info
+
+
+def test_malformed_json_error_names_the_file(tmp_path):
+    path = tmp_path / 'broken.json'
+    path.write_text('{"cv": {"personal_info": }}', encoding='utf-8')
+
+    with pytest.raises(json.JSONDecodeError) as excinfo:
+        CVData(str(path))
+    assert str(excinfo.value).startswith(f"{path}: Expecting value: line 1 column 26")
+
+
+def test_json_document_without_a_cv_is_rejected(tmp_path):
+    path = tmp_path / 'list.json'
+    path.write_text('[1, 2]', encoding='utf-8')
+
+    with pytest.raises(CVDataError, match=rf"^{re.escape(str(path))}: 1 error"):
+        CVData(str(path))
+
+
+def test_views_are_read_only_at_every_level(template_data):
+    cv = CVData.from_data(template_data)
+    job = next(job for job in cv.get_work_experience() if job.get('projects'))
+
+    with pytest.raises(TypeError):
+        job['job_title'] = 'Other'
+    with pytest.raises(TypeError):
+        job['projects'][0]['project_name'] = 'Other'
+    with pytest.raises(AttributeError):
+        job['projects'].append({'project_name': 'Other'})
+    assert isinstance(job['projects'], tuple)
@@ -0,0 +1,70 @@
+"""Social links of cvIcons.py and their section of the page."""
+import pytest
+
+from cvBuilder import render_section, section_inputs
+from cvDataClass import CVData
+from cvIcons import detect_platform, icon_sprite, link_text, link_url
+
+
+@pytest.mark.parametrize('url, platform', [
+    ('https://www.linkedin.com/in/your-name', 'linkedin'),
+    ('https://gist.github.com/your-name', 'github'),
+    ('github.com/your-name', 'github'),
+    ('mailto:me@example.com', 'email'),
+    ('https://notgithub.com/your-name', 'website'),
+    ('https://example.com', 'website'),
+])
+def test_detect_platform(url, platform):
+    assert detect_platform(url) == platform
+
+
+@pytest.mark.parametrize('url, target', [
+    ('github.com/your-name', 'https://github.com/your-name'),
+    ('www.example.com', 'https://www.example.com'),
+    ('example.com:8080/cv', 'https://example.com:8080/cv'),
+    ('//gitlab.com/your-name', 'https://gitlab.com/your-name'),
+    ('me@example.com', 'mailto:me@example.com'),
+    (' https://github.com/your-name ', 'https://github.com/your-name'),
+    ('tel:+33600000000', 'tel:+33600000000'),
+    ('projects/demo', 'projects/demo'),
+])
+def test_link_url_adds_the_missing_scheme(url, target):
+    assert link_url(url) == target
+
+
+def test_link_text():
+    assert link_text('https://www.github.com/your-name/') == 'github.com/your-name'
+    assert link_text('mailto:me@example.com') == 'me@example.com'
+
+
+def test_sprite_holds_the_requested_platforms_only():
+    sprite = icon_sprite(['github', 'email', 'github', 'unknown'])
+    assert sprite.count('<symbol') == 2
+    assert 'id="icon-github"' in sprite and 'id="icon-email"' in sprite
+    assert icon_sprite(['email', 'github']) is sprite
+    assert icon_sprite().count('<symbol') > 2
+
+
+def _social_links(template_data, *links):
+    template_data['cv']['social_links'] = list(links)
+    return render_section('social_links', *section_inputs(CVData.from_data(template_data))['social_links'])
+
+
+def test_section_links_scheme_less_urls_to_their_site(template_data):
+    html = _social_links(template_data, {'url': 'github.com/your-name'}, {'url': 'me@example.com'})
+    assert 'href="https://github.com/your-name"' in html
+    assert 'href="mailto:me@example.com"' in html
+    assert html.count('<symbol') == 2
+
+
+def test_section_renders_the_page_breaks(template_data):
+    html = _social_links(template_data, {'url': 'https://github.com/a', 'page_break': True},
+                         {'url': 'https://github.com/b'}, {'url': 'https://github.com/c', 'page_break': True})
+    assert html.count('class="page-break"') == 2
+    assert html.index('class="page-break"') < html.index('<section')
+    # The list is closed around the second break
+    assert html.count('<ul>') == 2 and html.count('</ul>') == 2
+
+
+def test_no_section_without_links(template_data):
+    assert _social_links(template_data) == ''
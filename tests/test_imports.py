@@ -0,0 +1,54 @@
+"""Start-up of the command line entry points: imports, import time and default paths."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from cvBench import import_times, G_BENCH_CONFIG
+from conftest import ROOT_DIR
+
+# Modules the entry points only import for the options using them
+_LAZY_MODULES = ('yaml', 'cvPdf', 'cvAssets', 'cvLayout', 'cvWatch', 'cProfile')
+
+
+@pytest.mark.parametrize('module', ['cvMain', 'cvBatch', 'cvServer'])
+def test_entry_point_does_not_import_optional_modules(module):
+    # A fresh interpreter, as the other tests import these modules
+    code = (f"import sys, {module}; "
+            f"print(' '.join(name for name in {_LAZY_MODULES!r} if name in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], cwd=os.path.join(ROOT_DIR, "package"),
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.split() == []
+
+
+def test_import_stays_within_the_startup_budget(tmp_path, monkeypatch):
+    # Compiled once in a private bytecode cache, as the modules of an installed package are
+    monkeypatch.delenv('PYTHONDONTWRITEBYTECODE', raising=False)
+    monkeypatch.setenv('PYTHONPYCACHEPREFIX', str(tmp_path))
+    import_times('cvMain')
+
+    best = min(import_times('cvMain')['cvMain'][1] for _ in range(3))
+
+    assert best < G_BENCH_CONFIG['startup_budget']
+
+
+@pytest.mark.parametrize('script', ['cvMain.py', 'cvBatch.py'])
+def test_default_paths_do_not_depend_on_the_current_directory(tmp_path, script):
+    output_dir = tmp_path / 'output'
+    args = [] if script == 'cvMain.py' else [os.path.join(ROOT_DIR, 'templates', 'template.yml')]
+    subprocess.run([sys.executable, os.path.join(ROOT_DIR, 'package', script), *args, '--no-cache',
+                    '--output', str(output_dir)], cwd=tmp_path, capture_output=True, text=True, check=True)
+
+    assert [path.suffix for path in output_dir.iterdir()] == ['.html']
+    assert os.listdir(tmp_path) == ['output']
+
+
+def test_default_data_and_cache_paths_are_absolute():
+    from cvBuilder import G_CONFIG_HTML
+    from cvCache import G_CACHE_CONFIG
+    from cvServer import G_SERVER_CONFIG
+
+    assert os.path.isdir(G_SERVER_CONFIG['styles_dir'])
+    assert os.path.isfile(G_SERVER_CONFIG['warmup_file'])
+    assert os.path.isabs(G_CACHE_CONFIG['cache_dir']) and os.path.isabs(G_CONFIG_HTML['output_dir'])
@@ -0,0 +1,180 @@
+"""Page layout estimation of cvLayout.py."""
+import json
+import os
+
+import pytest
+
+import cvMain
+from cvBuilder import render_html
+from cvDataClass import CVData
+from cvLayout import (LayoutBlock, estimate_lines, format_layout, layout_metrics, measure_blocks, paginate,
+                      paginate_cv)
+from conftest import ROOT_DIR, STYLE01, TEMPLATE_CV
+
+STYLE02 = os.path.join(ROOT_DIR, 'styles', 'style02.css')
+
+_LONG_TEXT = ' '.join(['word'] * 150)
+
+
+def _job(title, description='Short description.'):
+    return {'job_title': title, 'company_name': 'Company', 'dates': '2020 - 2021', 'job_description': description}
+
+
+@pytest.mark.parametrize('text, chars, lines', [
+    ('', 10, 0),
+    ('short', 10, 1),
+    ('aaaa bbbb cccc', 9, 2),
+    ('a' * 25, 10, 3),
+    ('漢字漢字漢', 4, 3),
+])
+def test_estimate_lines(text, chars, lines):
+    assert estimate_lines(text, chars) == lines
+
+
+def test_empty_section_has_a_heading_block(template_data):
+    template_data['cv']['personal_projects'] = []
+    blocks = measure_blocks(CVData.from_data(template_data).data, layout_metrics(STYLE01))
+    assert [block.index for block in blocks if block.section == 'projects'] == [-1]
+
+
+def test_first_entry_carries_the_heading(template_data):
+    metrics = layout_metrics(STYLE01)
+    template_data['cv']['work_experience'] = [_job('A'), _job('A'), _job('A')]
+    blocks = [block for block in measure_blocks(template_data, metrics) if block.section == 'experience']
+    assert blocks[0].height == pytest.approx(blocks[1].height + metrics['heading_height'])
+    assert blocks[2].height == pytest.approx(blocks[1].height + metrics['section_gap'])
+
+
+def test_entry_not_fitting_starts_a_page():
+    metrics = layout_metrics(STYLE01)
+    blocks = [LayoutBlock('experience', i, 400.0) for i in range(4)]
+    pages, breaks, overflow = paginate(blocks, metrics, 'A4')
+    # The header leaves room for one entry on the first page, then two entries fit per page
+    assert pages == 3
+    assert [block.index for block in breaks] == [1, 3]
+    assert overflow == []
+
+
+def test_forced_and_tall_entries():
+    metrics = layout_metrics(STYLE01)
+    blocks = [LayoutBlock('experience', 0, 100.0), LayoutBlock('experience', 1, 100.0, forced=True),
+              LayoutBlock('experience', 2, 5000.0)]
+    pages, breaks, overflow = paginate(blocks, metrics, 'A4')
+    assert [block.index for block in breaks] == [1]
+    assert [block.index for block in overflow] == [2]
+    assert pages >= 5
+
+
+def test_unknown_page_size():
+    with pytest.raises(ValueError):
+        paginate([], layout_metrics(), 'B5')
+
+
+def test_paginate_cv_flags_the_entries_starting_a_page(template_data):
+    template_data['cv']['work_experience'] = [_job(f'Job {i}', _LONG_TEXT) for i in range(4)]
+    cv = CVData.from_data(template_data)
+
+    paginated, plan = paginate_cv(cv, STYLE01)
+
+    assert plan.pages > 1 and plan.breaks
+    flagged = [('experience', i) for i, job in enumerate(paginated.data['cv']['work_experience']) if job.get('page_break')]
+    assert flagged == [b for b in plan.breaks if b[0] == 'experience']
+    # The input CV is left as it is
+    assert not any(job.get('page_break') for job in cv.data['cv']['work_experience'])
+
+
+def test_short_cv_is_returned_as_it_is(template_data):
+    template_data['cv']['work_experience'] = [_job('Job')]
+    template_data['cv']['education'] = []
+    template_data['cv']['personal_projects'] = []
+    cv = CVData.from_data(template_data)
+    assert paginate_cv(cv, STYLE01) == (cv, paginate_cv(cv, STYLE01)[1])
+    assert paginate_cv(cv, STYLE01)[1].pages == 1
+
+
+def test_max_pages_condenses_then_trims(template_data):
+    template_data['cv']['work_experience'] = [_job(f'Job {i}', _LONG_TEXT) for i in range(6)]
+    cv = CVData.from_data(template_data)
+
+    condensed, plan = paginate_cv(cv, STYLE01, max_pages=2)
+    assert plan.pages <= 2 and plan.condensed and not plan.trimmed
+    jobs = condensed.data['cv']['work_experience']
+    # The first (most recent) entries keep their descriptions
+    assert jobs[0]['job_description'] == _LONG_TEXT
+    assert jobs[-1]['job_description'].endswith('…')
+
+    trimmed, plan = paginate_cv(cv, STYLE01, max_pages=1)
+    assert plan.pages == 1 and plan.trimmed
+    assert 'dropped to fit' in format_layout(plan)
+
+
+def test_social_links_are_measured(template_data):
+    metrics = layout_metrics(STYLE01)
+    template_data['cv']['social_links'] = [{'url': 'https://github.com/your-name'}, {'url': 'https://example.com/' + 'a' * 200}]
+    blocks = [block for block in measure_blocks(template_data, metrics) if block.section == 'social_links']
+    assert [block.index for block in blocks] == [0, 1]
+    assert blocks[0].height > metrics['heading_height']
+    # The long URL wraps over several lines
+    assert blocks[1].height - metrics['section_gap'] > 2 * metrics['line']
+
+    template_data['cv']['social_links'] = []
+    assert not [block for block in measure_blocks(template_data, metrics) if block.section == 'social_links']
+
+
+def test_social_links_are_kept_when_fitting(template_data):
+    template_data['cv']['work_experience'] = [_job(f'Job {i}', _LONG_TEXT) for i in range(6)]
+    links = [{'url': f'https://example.com/{i}'} for i in range(20)]
+    template_data['cv']['social_links'] = links
+    cv = CVData.from_data(template_data)
+
+    fitted, plan = paginate_cv(cv, STYLE01, max_pages=1)
+    assert plan.trimmed
+    assert [link.url for link in fitted.social_links] == [link['url'] for link in links]
+
+
+@pytest.mark.parametrize('css_file', [STYLE01, STYLE02])
+def test_example_cv_fits_one_page(css_file):
+    cv = CVData(TEMPLATE_CV)
+
+    assert paginate_cv(cv, css_file) == (cv, paginate_cv(cv, css_file)[1])
+    assert paginate_cv(cv, css_file, max_pages=1) == (cv, (1, (), (), 0, 0, ()))
+
+
+def test_margin_below_a_section_may_fall_past_the_page_bottom():
+    metrics = layout_metrics(STYLE01)
+    first = metrics['header_height'] + metrics['page_padding'] + metrics['column_padding']
+    room = 297 / 25.4 * 96 - metrics['page_margin'] - first
+    block = LayoutBlock('experience', 0, room + metrics['section_gap'], margin=metrics['section_gap'])
+
+    assert paginate([block, LayoutBlock('education', 0, 100.0)], metrics, 'A4')[1] == [LayoutBlock('education', 0, 100.0)]
+
+
+def test_fitting_never_leaves_a_section_heading_alone(template_data):
+    template_data['cv']['work_experience'] = [_job(f'Job {i}', _LONG_TEXT) for i in range(6)]
+    cv = CVData.from_data(template_data)
+
+    fitted, plan = paginate_cv(cv, STYLE01, max_pages=1)
+
+    assert plan.pages == 1 and plan.trimmed == 3 and not plan.kept
+    assert [len(fitted.work_experience), len(fitted.education), len(fitted.personal_projects)] == [3, 1, 1]
+    page = render_html(fitted, STYLE01)
+    assert 'Degree Obtained' in page and 'Project Title' in page
+
+
+def test_first_entries_are_kept_over_the_budget(tmp_path, capsys, template_data):
+    template_data['cv']['work_experience'] = [_job('Job 0', _LONG_TEXT), _job('Job 1')]
+    template_data['cv']['work_experience'][0]['projects'] = [
+        {'project_name': f'Project {i}', 'client': 'Client', 'project_description': 'Description.'} for i in range(4)]
+    cv = CVData.from_data(template_data)
+
+    fitted, plan = paginate_cv(cv, STYLE01, max_pages=1)
+
+    assert plan.pages == 2 and plan.trimmed == 1 and plan.kept == ('experience', 'education', 'projects')
+    assert [job.job_title for job in fitted.work_experience] == ['Job 0']
+    assert 'the first entry of experience, education, projects kept' in format_layout(plan)
+
+    path = tmp_path / 'cv.json'
+    path.write_text(json.dumps(template_data), encoding='utf-8')
+    assert cvMain.main([str(path), STYLE01, '--stdout', '--no-cache', '--max-pages', '1']) == 0
+    assert capsys.readouterr().err.startswith(
+        "Warning: the CV does not fit 1 page(s) without dropping the only entry of experience, education, projects")
@@ -0,0 +1,115 @@
+"""Translation tables, entry localization and multi-locale rendering of cvLocales.py and cvBuilder.py."""
+import pytest
+
+import cvLocales
+from cvBuilder import (HtmlPage, adding_education_content, adding_work_experience, generate_html_locales,
+                       render_html)
+from cvDataClass import CVData
+from cvLocales import LocaleError, load_locale, localize
+from cvTemplates import get_template_set
+from conftest import STYLE01
+
+
+@pytest.fixture
+def locales_dir(tmp_path, monkeypatch):
+    """An empty locales directory, used for the duration of the test."""
+    monkeypatch.setitem(cvLocales.G_LOCALES_CONFIG, 'locales_dir', str(tmp_path))
+    cvLocales.reload_locales()
+    yield tmp_path
+    monkeypatch.undo()
+    cvLocales.reload_locales()
+
+
+@pytest.fixture
+def translated_data(template_data):
+    """The example CV, with a job written in German and translated in English."""
+    job = template_data['cv']['work_experience'][0]
+    job['job_title'] = 'Softwareentwickler'
+    job['lang'] = 'de'
+    job['translations'] = {'en': {'job_title': 'Software Developer'}}
+    return template_data
+
+
+def test_missing_texts_fall_back_to_the_default_locale(locales_dir):
+    (locales_dir / 'en.yml').write_text('experience: Experience\neducation: Education\n', encoding='utf-8')
+    (locales_dir / 'xx.yml').write_text('experience: Xperience\n', encoding='utf-8')
+
+    locale = load_locale('xx')
+
+    assert dict(locale.texts) == {'experience': 'Xperience', 'education': 'Education', 'lang': 'xx'}
+    assert load_locale('xx') is locale
+
+
+def test_unknown_locale_lists_the_available_ones(locales_dir):
+    (locales_dir / 'en.yml').write_text('experience: Experience\n', encoding='utf-8')
+
+    with pytest.raises(LocaleError, match="No translation table for locale 'xx', available locales: en"):
+        load_locale('xx')
+
+
+def test_malformed_table_is_rejected(locales_dir):
+    (locales_dir / 'en.yml').write_text('experience: [Experience]\n', encoding='utf-8')
+
+    with pytest.raises(LocaleError, match="the text of 'experience' must be a string"):
+        load_locale('en')
+
+
+def test_translations_replace_the_fields_of_the_locale(translated_data):
+    job = CVData.from_data(translated_data).get_work_experience()[0]
+
+    localized = localize(job, 'en')
+
+    assert localized['job_title'] == 'Software Developer'
+    assert 'lang' not in localized
+    assert localize(job, 'fr') is job
+
+
+def test_translated_projects_are_localized(template_data):
+    job = next(job for job in template_data['cv']['work_experience'] if job.get('projects'))
+    job['projects'][0]['translations'] = {'fr': {'project_name': 'Projet'}}
+    job = next(job for job in CVData.from_data(template_data).get_work_experience() if job.get('projects'))
+
+    localized = localize(job, 'fr')
+
+    assert localized['projects'][0]['project_name'] == 'Projet'
+    assert localized['projects'][1:] == job['projects'][1:]
+
+
+def test_entries_in_another_language_keep_their_lang(translated_data):
+    cv = CVData.from_data(translated_data)
+
+    french = render_html(cv, STYLE01, locale='fr')
+    english = render_html(cv, STYLE01, locale='en')
+
+    assert '<html lang="fr">' in french and '<div lang="de">' in french and 'Softwareentwickler' in french
+    assert '<div lang="de">' not in english and 'Software Developer' in english
+
+
+def test_locale_pages_match_single_renders(tmp_path, translated_data):
+    cv = CVData.from_data(translated_data)
+    locales = ['en', 'fr', 'de']
+
+    paths = generate_html_locales(cv, STYLE01, str(tmp_path), locales)
+
+    for path, locale in zip(paths, locales):
+        with open(path, encoding='utf-8') as f:
+            assert f.read() == render_html(cv, STYLE01, locale=locale)
+
+
+def test_shared_fragments_are_never_stale(template_data):
+    templates = get_template_set(STYLE01)
+    shared = {}
+    # Entries are created and dropped on each pass, so that their ids could be reused
+    for i in range(50):
+        for job in template_data['cv']['work_experience']:
+            job['job_title'] = f"Engineer #{i}#"
+        for entry in template_data['cv']['education']:
+            entry['degree'] = f"Degree #{i}#"
+        cv = CVData.from_data(template_data)
+        for builder, entries in ((adding_work_experience, cv.get_work_experience()),
+                                 (adding_education_content, cv.get_education())):
+            page, fresh = HtmlPage(templates, shared), HtmlPage(templates)
+            builder(page, entries)
+            builder(fresh, entries)
+            assert page.getvalue() == fresh.getvalue()
+            assert f"#{i}#" in page.getvalue()
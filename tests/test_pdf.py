@@ -0,0 +1,110 @@
+"""PDF stage of cvPdf.py, run offline against tests/fake_wkhtmltopdf.py."""
+import os
+
+import pytest
+
+from cvPdf import PdfError, PdfPipeline, convert_batch, convert_to_pdf, find_converter
+
+
+def _is_pdf(path):
+    with open(path, 'rb') as f:
+        return f.read(5) == b'%PDF-'
+
+
+def test_convert_batch_writes_a_pdf_next_to_each_page(fake_converter, html_files, tmp_path, monkeypatch):
+    log = tmp_path / 'runs.log'
+    monkeypatch.setenv('FAKE_WKHTMLTOPDF_LOG', str(log))
+    pages = html_files('a.html', 'b c.html', 'd"e.html')
+
+    results = convert_batch(pages, fake_converter, {'page-size': 'A4', 'print-media-type': ''})
+
+    assert [result.html_file for result in results] == pages
+    assert all(result.ok and result.error == '' for result in results)
+    assert all(_is_pdf(result.pdf_file) for result in results)
+    assert results[1].pdf_file == os.path.splitext(pages[1])[0] + '.pdf'
+    # One converter process for the whole batch, with the options on its command line
+    runs = log.read_text().splitlines()
+    assert len(runs) == 1
+    assert '--page-size A4 --print-media-type --read-args-from-stdin' in runs[0]
+
+
+def test_convert_batch_reports_the_failed_documents_only(fake_converter, html_files, tmp_path):
+    pages = html_files('good.html') + [str(tmp_path / 'missing.html')]
+
+    good, broken = convert_batch(pages, fake_converter)
+
+    assert good.ok
+    assert not broken.ok and not os.path.exists(broken.pdf_file)
+    assert 'Failed to load' in broken.error
+
+
+def test_convert_batch_removes_stale_pdfs(fake_converter, html_files, monkeypatch):
+    page, = html_files('page.html')
+    stale = os.path.splitext(page)[0] + '.pdf'
+    with open(stale, 'wb') as f:
+        f.write(b'%PDF- stale')
+    monkeypatch.setenv('FAKE_WKHTMLTOPDF_FAIL', 'page')
+
+    result, = convert_batch([page], fake_converter)
+
+    assert not result.ok and not os.path.exists(stale)
+
+
+def test_convert_batch_reports_the_exit_status_without_error_output(fake_converter, html_files, monkeypatch):
+    monkeypatch.setenv('FAKE_WKHTMLTOPDF_EXIT', '3')
+    monkeypatch.setenv('FAKE_WKHTMLTOPDF_FAIL', 'page')
+
+    result, = convert_batch(html_files('page.html'), fake_converter)
+
+    assert not result.ok and result.error == 'converter exited with status 3'
+
+
+def test_convert_batch_times_out(fake_converter, html_files, monkeypatch):
+    monkeypatch.setenv('FAKE_WKHTMLTOPDF_SLEEP', '5')
+
+    result, = convert_batch(html_files('page.html'), fake_converter, timeout=0.5)
+
+    assert not result.ok and 'timed out' in result.error
+
+
+def test_missing_converter_raises_pdf_error(tmp_path):
+    with pytest.raises(PdfError):
+        find_converter(str(tmp_path / 'no-such-converter'))
+    with pytest.raises(PdfError):
+        PdfPipeline(str(tmp_path / 'no-such-converter'))
+
+
+def test_unstartable_converter_raises_pdf_error(tmp_path, html_files):
+    not_executable = tmp_path / 'converter.txt'
+    not_executable.write_text('not a program')
+    with pytest.raises(PdfError):
+        convert_batch(html_files('page.html'), str(not_executable))
+
+
+def test_pipeline_converts_in_batches(fake_converter, html_files, tmp_path, monkeypatch):
+    log = tmp_path / 'runs.log'
+    monkeypatch.setenv('FAKE_WKHTMLTOPDF_LOG', str(log))
+    pages = html_files(*(f'cv{i}.html' for i in range(5)))
+    seen = []
+
+    with PdfPipeline(fake_converter, workers=2, batch_size=2, on_result=seen.append) as pipeline:
+        for page in pages:
+            pipeline.submit(page)
+
+    assert pipeline.documents == 5 and pipeline.batches == 3
+    assert len(log.read_text().splitlines()) == 3
+    assert sorted(result.html_file for result in pipeline.results) == sorted(pages)
+    assert all(result.ok for result in pipeline.results)
+    assert len(seen) == 5
+    assert pipeline.elapsed > 0 and pipeline.busy_time > 0
+
+
+def test_convert_to_pdf_spreads_the_files_over_the_workers(fake_converter, html_files, tmp_path, monkeypatch):
+    log = tmp_path / 'runs.log'
+    monkeypatch.setenv('FAKE_WKHTMLTOPDF_LOG', str(log))
+    pages = html_files(*(f'cv{i}.html' for i in range(4)))
+
+    results = convert_to_pdf(pages, fake_converter, workers=2, batch_size=16)
+
+    assert len(results) == 4 and all(result.ok for result in results)
+    assert len(log.read_text().splitlines()) == 2
@@ -0,0 +1,31 @@
+"""Step measures of cvProfile.py."""
+from cvProfile import Tracer, current_tracer, trace
+
+
+def test_nested_span_keeps_the_allocation_peak_of_the_enclosing_span():
+    with Tracer() as tracer:
+        with trace('outer'):
+            buffer = bytearray(4_000_000)
+            del buffer
+            with trace('inner'):
+                small = bytearray(10_000)
+                del small
+
+    assert tracer.stages['inner'].allocated < 1_000_000
+    assert tracer.stages['outer'].allocated >= 4_000_000
+
+
+def test_spans_accumulate_calls_and_bytes():
+    with Tracer(allocations=False) as tracer:
+        for size in (10, 20):
+            with trace('write') as span:
+                span.bytes = size
+
+    stats = tracer.stages['write']
+    assert (stats.calls, stats.bytes, stats.allocated) == (2, 30, 0)
+
+
+def test_trace_does_nothing_without_an_active_tracer():
+    assert current_tracer() is None
+    with trace('step') as span:
+        assert span is None
@@ -0,0 +1,72 @@
+"""Output format backends of cvRenderers.py."""
+import os
+import shutil
+
+import pytest
+
+from conftest import STYLE01, TEMPLATE_CV
+from cvAssets import AssetCache
+from cvDataClass import CVData
+from cvRenderers import G_RENDERERS, HtmlRenderer, JsonResumeRenderer, MarkdownRenderer, Renderer
+
+
+def _cv(data, **changes):
+    data['cv'].update(changes)
+    return CVData.from_data(data)
+
+
+def test_markdown_drops_links_with_unsafe_schemes(template_data):
+    cv = _cv(template_data,
+             personal_projects=[{'project_title': 'Demo', 'project_description': 'd',
+                                 'project_link': 'javascript:alert(1)'}],
+             social_links=[{'url': ' JaVaScRiPt:alert(2)'}])
+
+    document = MarkdownRenderer().render(cv)
+
+    assert '### Demo' in document
+    assert '](javascript' not in document.lower() and '<javascript' not in document.lower()
+    assert 'JaVaScRiPt:alert(2)' in document
+
+
+def test_markdown_encodes_the_link_delimiters(template_data):
+    cv = _cv(template_data,
+             personal_projects=[{'project_title': 'Demo', 'project_description': 'd',
+                                 'project_link': 'https://example.com/a) [x](javascript:alert(1)'}],
+             social_links=[{'url': 'https://github.com/me> <script>'}])
+
+    document = MarkdownRenderer().render(cv)
+
+    assert '### [Demo](https://example.com/a%29%20[x]%28javascript:alert%281%29)' in document
+    assert '- GitHub: <https://github.com/me%3E%20%3Cscript%3E>' in document
+
+
+def test_json_resume_names_the_network_of_the_profiles(template_data):
+    cv = _cv(template_data, social_links=[{'url': 'https://gist.github.com/me'}, {'url': 'https://example.org'}])
+
+    profiles = JsonResumeRenderer().to_dict(cv)['basics']['profiles']
+
+    assert profiles == [{'network': 'GitHub', 'url': 'https://gist.github.com/me'}, {'url': 'https://example.org'}]
+
+
+def test_html_render_resolves_the_photo_from_the_output_directory(tmp_path):
+    cv = CVData(TEMPLATE_CV)
+    # The photo path of the template, '../templates/template.jpg', is relative to the output directory
+    output_dir = tmp_path / 'output'
+    output_dir.mkdir()
+    (tmp_path / 'templates').mkdir()
+    shutil.copy(os.path.join(os.path.dirname(TEMPLATE_CV), 'template.jpg'), tmp_path / 'templates')
+    renderer = HtmlRenderer(STYLE01, assets=AssetCache(None))
+
+    assert 'src="data:image/' in renderer.render(cv, str(output_dir))
+    assert 'src="data:image/' not in renderer.render(cv, str(tmp_path))
+
+
+def test_backends_must_implement_render():
+    class IncompleteRenderer(Renderer):
+        name, extension = 'incomplete', '.txt'
+
+    with pytest.raises(TypeError, match='render'):
+        IncompleteRenderer()
+    assert {cls.__name__ for cls in G_RENDERERS.values()} >= {'HtmlRenderer', 'TextRenderer'}
+    for cls in G_RENDERERS.values():
+        assert not getattr(cls, '__abstractmethods__', None)
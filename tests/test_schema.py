@@ -0,0 +1,71 @@
+"""CV document validation of cvSchema.py."""
+import pytest
+
+from cvDataClass import CVData, CVDataError
+from cvSchema import compile_schema, validate_cv
+
+
+def test_template_is_valid(template_data):
+    _, errors = validate_cv(template_data)
+    assert errors == []
+
+
+def test_all_errors_are_reported_with_their_path(template_data):
+    cv = template_data['cv']
+    del cv['personal_info']['name']
+    cv['work_experience'][1]['job_title'] = ['Engineer']
+    cv['education'][0]['page_break'] = 'yes'
+    cv['skills'] = 'Python'
+
+    _, errors = validate_cv(template_data)
+
+    assert sorted(errors) == sorted([
+        'cv.personal_info.name: missing required key',
+        'cv.work_experience[1].job_title: must be a string, got list',
+        'cv.education[0].page_break: must be true or false, got str',
+        'cv.skills: must be a list, got str',
+    ])
+
+
+def test_document_must_be_a_mapping():
+    _, errors = validate_cv(['not', 'a', 'mapping'])
+    assert errors == ['document: must be a mapping, got list']
+
+
+@pytest.mark.parametrize('version, message', [
+    ([1], 'schema_version: must be an integer, got list'),
+    ({'v': 1}, 'schema_version: must be an integer, got mapping'),
+    (True, 'schema_version: must be an integer, got bool'),
+    ('1', 'schema_version: must be an integer, got str'),
+    (99, 'schema_version: unknown version 99, expected one of [1]'),
+])
+def test_invalid_schema_versions_are_reported(template_data, version, message):
+    template_data['schema_version'] = version
+    assert validate_cv(template_data)[1] == [message]
+
+
+def test_declared_schema_version_is_accepted(template_data):
+    template_data['schema_version'] = 1
+    assert validate_cv(template_data)[1] == []
+
+
+def test_invalid_schema_version_is_a_cv_data_error(template_data):
+    template_data['schema_version'] = [1]
+    with pytest.raises(CVDataError) as info:
+        CVData.from_data(template_data)
+    assert info.value.errors == ('schema_version: must be an integer, got list',)
+
+
+def test_translations_are_validated_per_locale(template_data):
+    job = template_data['cv']['work_experience'][0]
+    job['translations'] = {'fr': {'job_title': 'Ingénieur'}, 'de': 'Ingenieur', 'es': {'job_title': ['x']}}
+
+    _, errors = validate_cv(template_data)
+
+    assert sorted(errors) == ['cv.work_experience[0].translations.de: must be a mapping, got str',
+                              'cv.work_experience[0].translations.es.job_title: must be a string, got list']
+
+
+def test_unknown_schema_types_are_rejected_when_compiling():
+    with pytest.raises(ValueError):
+        compile_schema({'type': 'mapping', 'fields': {'x': {'type': 'nope'}}})
@@ -0,0 +1,129 @@
+"""HTTP render service of cvServer.py, started on a free port."""
+import http.client
+import json
+import os
+import socket
+import threading
+
+import pytest
+
+from cvServer import create_server
+from conftest import ROOT_DIR, TEMPLATE_CV
+
+
+@pytest.fixture(scope='module')
+def server():
+    server = create_server(port=0, styles_dir=os.path.join(ROOT_DIR, 'styles'), workers=2, timeout=10)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    server.service.shutdown()
+
+
+@pytest.fixture(scope='module')
+def cv_yaml():
+    with open(TEMPLATE_CV, 'rb') as f:
+        return f.read()
+
+
+def _request(server, method, path, body=None, headers=None):
+    """Sends a request and returns the status, headers and body of the response."""
+    connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), response.read().decode('utf-8')
+    finally:
+        connection.close()
+
+
+def _raw_request(server, content_length, body=b''):
+    """Sends a POST request with a verbatim Content-Length header."""
+    connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+    try:
+        connection.putrequest('POST', '/render')
+        connection.putheader('Content-Length', content_length)
+        connection.endheaders(body)
+        response = connection.getresponse()
+        return response.status, response.read().decode('utf-8')
+    finally:
+        connection.close()
+
+
+def test_render(server, cv_yaml):
+    status, headers, html = _request(server, 'POST', '/render?style=style02', cv_yaml)
+    assert status == 200
+    assert headers['Content-Type'].startswith('text/html')
+    assert html.startswith('<!DOCTYPE html>') and html.rstrip().endswith('</html>')
+    assert 'Your Name' in html
+
+
+def test_render_json(server, template_data):
+    status, _, html = _request(server, 'POST', '/render', json.dumps(template_data),
+                               {'Content-Type': 'application/json'})
+    assert status == 200 and 'Your Name' in html
+
+
+def test_stream_matches_the_plain_render(server, cv_yaml):
+    _, _, page = _request(server, 'POST', '/render', cv_yaml)
+    status, headers, streamed = _request(server, 'POST', '/render?stream=1', cv_yaml)
+    assert status == 200
+    # The end of a streamed page is marked by closing the connection
+    assert 'Content-Length' not in headers
+    assert streamed == page
+
+
+def test_unknown_style(server, cv_yaml):
+    status, _, message = _request(server, 'POST', '/render?style=nope', cv_yaml)
+    assert status == 404
+    assert "Unknown style 'nope'" in message
+
+
+def test_unknown_endpoint(server):
+    assert _request(server, 'GET', '/nope')[0] == 404
+    assert _request(server, 'POST', '/nope', b'')[0] == 404
+
+
+@pytest.mark.parametrize('body', [b'cv: [unclosed', b'\xff\xfe', b'cv:\n  personal_info: {}\n'])
+def test_invalid_body(server, body):
+    status, _, message = _request(server, 'POST', '/render', body)
+    assert status == 400
+    assert message.startswith('Invalid CV document')
+
+
+@pytest.mark.parametrize('content_length', ['-1', 'abc'])
+def test_invalid_content_length(server, content_length):
+    status, message = _raw_request(server, content_length)
+    assert status == 400
+    assert message == f"Invalid Content-Length: {content_length}"
+
+
+def test_truncated_body(server):
+    # The client stops sending before the announced length
+    with socket.create_connection(server.server_address, timeout=10) as sock:
+        sock.sendall(b'POST /render HTTP/1.1\r\nHost: test\r\nContent-Length: 100\r\n\r\ncv: {}')
+        sock.shutdown(socket.SHUT_WR)
+        response = sock.makefile('rb').read().decode('utf-8')
+    assert response.startswith('HTTP/1.0 400') or response.startswith('HTTP/1.1 400')
+    assert 'Request body truncated: 6 of 100 bytes received' in response
+
+
+def test_styles_and_health(server):
+    status, _, styles = _request(server, 'GET', '/styles')
+    assert status == 200 and json.loads(styles) == ['style01', 'style02']
+    assert _request(server, 'GET', '/health')[2] == 'ok'
+
+
+def test_metrics(server, cv_yaml):
+    _request(server, 'POST', '/render', cv_yaml)
+    _request(server, 'POST', '/render?style=nope', cv_yaml)
+    status, headers, metrics = _request(server, 'GET', '/metrics')
+    assert status == 200
+    assert headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    values = dict(line.rsplit(' ', 1) for line in metrics.splitlines() if not line.startswith('#'))
+    assert int(values['smartcv_requests_total{status="200"}']) >= 1
+    assert int(values['smartcv_requests_total{status="404"}']) >= 1
+    assert values['smartcv_in_flight'] == '0' and values['smartcv_queue_depth'] == '0'
+    assert int(values['smartcv_request_duration_seconds_count']) >= 2
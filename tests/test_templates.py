@@ -0,0 +1,78 @@
+"""Context-aware escaping and minification of the compiled blocks of cvTemplates.py."""
+import pytest
+
+from cvTemplates import TemplateError, check_url, compile_block, escape_url, minify_html, parse_blocks
+
+
+def test_text_fields_are_escaped():
+    block = compile_block('<p>{{ name }}</p>')
+    assert block(name='<b>Tom & Jerry</b>') == '<p>&lt;b&gt;Tom &amp; Jerry&lt;/b&gt;</p>'
+    assert block.fields == ('name',)
+
+
+def test_attribute_fields_escape_quotes():
+    block = compile_block('<img alt="{{ name }}">')
+    assert block(name='"><script>') == '<img alt="&quot;&gt;&lt;script&gt;">'
+    assert compile_block("<p title='{{ name }}'></p>")(name="it's") == "<p title='it&#x27;s'></p>"
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://example.com/?a=1&b=2', 'https://example.com/?a=1&amp;b=2'),
+    ('mailto:me@example.com', 'mailto:me@example.com'),
+    ('projects/demo', 'projects/demo'),
+    ('javascript:alert(1)', '#'),
+    (' JavaScript:alert(1)', '#'),
+    ('java\tscript:alert(1)', '#'),
+    ('data:text/html,<p>', '#'),
+])
+def test_url_fields_are_checked(url, expected):
+    assert compile_block('<a href="{{ link }}"></a>')(link=url) == f'<a href="{expected}"></a>'
+
+
+def test_image_urls_accept_data_images_only():
+    block = compile_block('<img src="{{ photo }}">')
+    assert block(photo='data:image/png;base64,AAAA') == '<img src="data:image/png;base64,AAAA">'
+    assert escape_url('data:image/png;base64,AAAA') == '#'
+    assert check_url('vbscript:msgbox') is None
+
+
+def test_url_is_only_checked_at_the_start_of_the_attribute():
+    block = compile_block('<a href="https://example.com/{{ path }}"></a>')
+    assert block(path='javascript:x') == '<a href="https://example.com/javascript:x"></a>'
+
+
+@pytest.mark.parametrize('source', [
+    '<a {{ attributes }}></a>',
+    '<a href={{ link }}></a>',
+    '<script>var name = "{{ name }}";</script>',
+    '<style>p { color: {{ color }} }</style>',
+])
+def test_fields_that_cannot_be_escaped_are_rejected(source):
+    with pytest.raises(TemplateError):
+        compile_block(source)
+
+
+def test_safe_fields_are_inserted_as_they_are():
+    assert compile_block('<ul>{{ items | safe }}</ul>')(items='<li>a</li>') == '<ul><li>a</li></ul>'
+
+
+@pytest.mark.parametrize('source', ['{{ 1name }}', '{{ _private }}', '{{ class }}', '{{ name | upper }}'])
+def test_invalid_placeholders_are_rejected(source):
+    with pytest.raises(TemplateError):
+        compile_block(source)
+
+
+def test_literal_braces_are_kept():
+    assert compile_block('<style>p { margin: 0 }</style><p>{{ a }}</p>')(a='x') == '<style>p { margin: 0 }</style><p>x</p>'
+
+
+def test_parse_blocks():
+    blocks = parse_blocks('comment\n<!-- block: entry -->\n<li>{{ a }}</li>\n<!-- block: list -->\n<ul>\n  {{ items | safe }}\n</ul>\n')
+    assert blocks == {'entry': '<li>{{ a }}</li>', 'list': '<ul>\n  {{ items | safe }}\n</ul>\n'}
+    with pytest.raises(TemplateError):
+        parse_blocks('<!-- block: a -->x<!-- block: a -->y')
+
+
+def test_minify_keeps_words_apart_and_raw_elements():
+    html = '<div>\n    <p>\n        Hello\n        world\n    </p>\n    <pre>  a\n  b</pre>\n</div>\n'
+    assert minify_html(html) == '<div><p>Hello world</p><pre>  a\n  b</pre></div>'
@@ -0,0 +1,89 @@
+"""Incremental rendering and watch mode of cvWatch.py."""
+import copy
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+import cvLocales
+from cvBuilder import render_html, html_output_filename
+from cvDataClass import CVData
+from cvWatch import IncrementalRenderer, watch
+from conftest import ROOT_DIR, STYLE01, TEMPLATE_CV
+
+
+@pytest.fixture
+def locales_dir(tmp_path, monkeypatch):
+    """A copy of `locales/`, used as the locales directory for the duration of the test."""
+    directory = tmp_path / 'locales'
+    shutil.copytree(os.path.join(ROOT_DIR, 'locales'), directory)
+    monkeypatch.setitem(cvLocales.G_LOCALES_CONFIG, 'locales_dir', str(directory))
+    cvLocales.reload_locales()
+    yield directory
+    monkeypatch.undo()
+    cvLocales.reload_locales()
+
+
+def _wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_first_render_builds_every_section(template_data):
+    renderer = IncrementalRenderer(STYLE01)
+    cv = CVData.from_data(template_data)
+
+    assert renderer.render(cv) == render_html(cv, STYLE01)
+    assert 'experience' in renderer.rendered and 'education' in renderer.rendered
+
+
+def test_unchanged_cv_rebuilds_nothing(template_data):
+    renderer = IncrementalRenderer(STYLE01)
+    renderer.render(CVData.from_data(template_data))
+
+    html_content = renderer.render(CVData.from_data(copy.deepcopy(template_data)))
+
+    assert renderer.rendered == []
+    assert html_content == render_html(CVData.from_data(template_data), STYLE01)
+
+
+def test_edit_of_one_section_rebuilds_only_that_section(template_data):
+    renderer = IncrementalRenderer(STYLE01)
+    renderer.render(CVData.from_data(template_data))
+
+    edited = copy.deepcopy(template_data)
+    edited['cv']['work_experience'][0]['job_title'] = 'Principal Engineer'
+    cv = CVData.from_data(edited)
+    html_content = renderer.render(cv)
+
+    assert renderer.rendered == ['experience']
+    assert 'Principal Engineer' in html_content
+    assert html_content == render_html(cv, STYLE01)
+
+
+def test_watch_regenerates_the_page_when_a_translation_table_changes(tmp_path, template_data, locales_dir):
+    yaml_file = tmp_path / 'cv.yml'
+    shutil.copy(TEMPLATE_CV, yaml_file)
+    output_dir = tmp_path / 'output'
+    output_dir.mkdir()
+    output_path = output_dir / html_output_filename(CVData.from_data(template_data).get_personal_info())
+
+    thread = threading.Thread(target=watch, args=(str(yaml_file), STYLE01, str(output_dir)),
+                              kwargs={'interval': 0.01, 'max_updates': 2}, daemon=True)
+    thread.start()
+    _wait_for(lambda: output_path.exists() and '>Experience<' in output_path.read_text(encoding='utf-8'))
+
+    # Replaced at once, so that the watch never reads a half-written table
+    table, edited = locales_dir / 'en.yml', tmp_path / 'en.yml'
+    edited.write_text(table.read_text(encoding='utf-8').replace('experience: Experience', 'experience: Career'),
+                      encoding='utf-8')
+    os.replace(edited, table)
+    thread.join(10)
+
+    assert not thread.is_alive()
+    html_content = output_path.read_text(encoding='utf-8')
+    assert '>Career<' in html_content and '>Experience<' not in html_content